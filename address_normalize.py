@@ -0,0 +1,97 @@
+"""
+RCFE Address Normalization
+Reduces facility addresses to a canonical USPS-style key so facilities that
+share a building (several licenses at one address, relicensed facilities
+under a new number) are geocoded once and share the result.
+
+Usage:
+    from address_normalize import normalize_address
+    normalize_address('744 Vandal Way, Suite 2', 'Palmdale', 'CA', '93551-1234')
+    # -> '744 VANDAL WAY|PALMDALE|CA|93551'
+"""
+
+import re
+
+# USPS Publication 28 street suffix abbreviations (the ones seen in CCLD data)
+STREET_SUFFIXES = {
+    'ALLEY': 'ALY', 'AVENUE': 'AVE', 'AV': 'AVE', 'BOULEVARD': 'BLVD',
+    'CANYON': 'CYN', 'CIRCLE': 'CIR', 'COURT': 'CT', 'COVE': 'CV',
+    'CREEK': 'CRK', 'CRESCENT': 'CRES', 'CROSSING': 'XING', 'DRIVE': 'DR',
+    'EXPRESSWAY': 'EXPY', 'FREEWAY': 'FWY', 'GARDENS': 'GDNS', 'GLEN': 'GLN',
+    'GROVE': 'GRV', 'HEIGHTS': 'HTS', 'HIGHWAY': 'HWY', 'HILL': 'HL',
+    'HOLLOW': 'HOLW', 'LANE': 'LN', 'LOOP': 'LOOP', 'MEADOWS': 'MDWS',
+    'MOUNT': 'MT', 'MOUNTAIN': 'MTN', 'PARKWAY': 'PKWY', 'PASS': 'PASS',
+    'PATH': 'PATH', 'PLACE': 'PL', 'PLAZA': 'PLZ', 'POINT': 'PT',
+    'RANCH': 'RNCH', 'ROAD': 'RD', 'ROUTE': 'RTE', 'SQUARE': 'SQ',
+    'STREET': 'ST', 'TERRACE': 'TER', 'TRAIL': 'TRL', 'VALLEY': 'VLY',
+    'VIEW': 'VW', 'VILLAGE': 'VLG', 'VISTA': 'VIS', 'WALK': 'WALK',
+}
+
+DIRECTIONALS = {
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+
+# Secondary unit designators; at the end of the line, the designator and the
+# token after it are dropped
+UNIT_DESIGNATORS = {
+    'APT', 'APARTMENT', 'BLDG', 'BUILDING', 'FL', 'FLOOR', 'RM', 'ROOM',
+    'SPC', 'SPACE', 'STE', 'SUITE', 'UNIT', 'LOT', 'TRLR',
+}
+
+_PUNCTUATION = re.compile(r"[.,;:'\"()]")
+_UNIT_HASH = re.compile(r'\s#\s*\S+')
+_ZIP = re.compile(r'(\d{5})(?:-?\d{4})?')
+
+def normalize_street(address):
+    """
+    Normalize a street address line.
+
+    Args:
+        address: Street address (e.g., "9857 La Tuna Canyon Road, Suite B")
+
+    Returns:
+        Upper-case address with USPS abbreviations and no unit designator
+        (e.g., "9857 LA TUNA CYN RD")
+    """
+    text = ' ' + str(address or '').upper() + ' '
+    text = _UNIT_HASH.sub(' ', text)
+    text = _PUNCTUATION.sub(' ', text)
+
+    # Units follow the street ("... RD STE 5", "... BLDG 2 STE 5"); a
+    # designator word earlier in the line is part of the street name
+    # ("12 LOT 5 RD", "100 SPACE CENTER DR")
+    tokens = text.split()
+    while len(tokens) >= 4 and tokens[-2] in UNIT_DESIGNATORS:
+        del tokens[-2:]
+
+    # The first token is the house number. Directionals are only abbreviated
+    # as a prefix or suffix, so a street named "NORTH ST" keeps its name.
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        if i == 0:
+            continue
+        if token in STREET_SUFFIXES:
+            tokens[i] = STREET_SUFFIXES[token]
+        elif token in DIRECTIONALS and ((i == 1 and last >= 3) or (i == last and i >= 3)):
+            tokens[i] = DIRECTIONALS[token]
+    return ' '.join(tokens)
+
+def normalize_zip(zip_code):
+    """Fold ZIP+4 to the 5-digit ZIP ('93551-1234' -> '93551')."""
+    match = _ZIP.search(str(zip_code or ''))
+    return match.group(1) if match else ''
+
+def normalize_address(address, city, state, zip_code):
+    """
+    Build the canonical key for an address.
+
+    Args:
+        address, city, state, zip_code: Address components from the CSV
+
+    Returns:
+        Key string; equal keys are treated as the same geocoding target
+    """
+    city = ' '.join(_PUNCTUATION.sub(' ', str(city or '').upper()).split())
+    state = str(state or '').strip().upper()
+    return '|'.join([normalize_street(address), city, state, normalize_zip(zip_code)])
@@ -2,48 +2,526 @@
 RCFE Proximity Search - Flask Backend
 Web application for finding RCFE facilities by proximity with violation data.
 
+Other CCLD facility categories are served alongside RCFEs when enabled (see
+datasets.py); each is loaded and indexed as its own partition. Changelogs
+from the update pipeline (see facility_delta.py) patch a loaded partition in
+place, without a reload.
+
 Usage: python app.py
+       DATASETS=rcfe,adult_residential python app.py
 Access: http://localhost:5000
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 import csv
+import hashlib
+import hmac
+import io
 import json
+import os
 import requests
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
 from math import radians, sin, cos, sqrt, asin
 from datetime import datetime, timedelta
+from pathlib import Path
+
+import citation_store
+import compact_dataset
+import datasets
+import facility_delta
+import facility_search
+import facility_stats
+import geocode_store
+import name_index
+import place_tables
+import static_assets
+import static_pages
 
 app = Flask(__name__)
 
 # Configuration
-CSV_FILE = 'data/rcfe_data_latest.csv'
-CACHE_FILE = 'geocode_cache.json'
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
 NOMINATIM_USER_AGENT = 'RCFE-Finder/1.0'
+PORT = int(os.environ.get('PORT', 5001))
+WARMUP_FILE = os.environ.get('WARMUP_FILE')  # Hot searches handed over by the previous instance
+HOT_SEARCH_FILE = os.environ.get('HOT_SEARCH_FILE', f'logs/hot_searches_{PORT}.json')  # Read by the next instance
+HOT_SEARCH_SAVE_SECONDS = 60  # How often this instance saves its hot searches
+RESULT_CACHE_SIZE = 1024  # Cached geocode and search results
+HOT_SEARCH_LIMIT = 200    # Searches handed to the next instance for warmup
+CITATIONS_DB = citation_store.CITATIONS_DB
+STATS_MAX_AGE = 3600      # Browser/CDN cache lifetime for /api/stats (seconds)
+SUGGEST_MAX_LIMIT = 25    # Most suggestions returned per keystroke
+BATCH_MAX_ORIGINS = 500   # Origins per /api/search/batch request
+BATCH_MAX_GEOCODES = 25   # New (uncached) addresses geocoded per batch request
+BATCH_MAX_LIMIT = 200     # Results per origin in a batch
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_FIELDS = ('facility_number', 'name', 'status', 'address', 'city', 'state', 'zip',
+                 'county', 'phone', 'capacity', 'total_citations', 'ownership_change',
+                 'lat', 'lon', 'distance', 'details_url', 'dataset')
+EXPORT_CHUNK_ROWS = 500   # Rows buffered per streamed chunk
+DETAILS_URL = 'https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/{facility}'
+ASSET_SOURCES = {'app.css': 'static/css/app.css', 'app.js': 'static/js/app.js',
+                 'offline.js': 'static/js/offline.js'}
+ASSET_MAX_AGE = 365 * 24 * 3600  # Fingerprinted assets never change under the same URL
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')  # Bearer token for /admin/*; unset: /admin/* is disabled
+DELTA_POLL_SECONDS = float(os.environ.get('DELTA_POLL_SECONDS', 0))  # Changelog directory polling (0: off)
+PAGE_DIR = static_pages.SITE_DIR / static_pages.PAGE_DIR_NAME  # Static facility pages (see static_pages.py)
+PAGE_MAX_AGE = 3600       # Browser/CDN cache lifetime for facility pages (seconds)
 
 # Global data (loaded on startup)
-facilities_data = None
-geocode_cache = None
+partitions = {}     # Dataset name -> loaded data and indexes (see load_partition)
+delta_lock = threading.Lock()  # One changelog applied at a time
+ready = False
+assets = None       # Fingerprinted, precompressed CSS/JS (see static_assets.py)
+page_shell = None   # Rendered index.html: {'etag', 'variants'}
+compact_data = {}   # Dataset name -> encoded /api/data body (see compact_entry)
+
+# Recently used results (address -> geocode, (lat, lon, radius, datasets) -> search results)
+address_cache = OrderedDict()
+search_cache = OrderedDict()
+address_counts = Counter()
+search_counts = Counter()
+cache_lock = threading.Lock()  # Guards the caches and counters above (requests run in threads)
+
+def cache_get(cache, key):
+    """Look up a key in an LRU result cache."""
+    with cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def cache_put(cache, key, value):
+    """Store a value in an LRU result cache, evicting the oldest entry."""
+    with cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > RESULT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def address_key(address):
+    """Normalize a typed address for the address cache (case and spacing)."""
+    return ' '.join(address.lower().split())
+
+def count_hit(counter, key):
+    """Count a search for warmup, keeping only the most popular keys."""
+    with cache_lock:
+        counter[key] += 1
+        if len(counter) > RESULT_CACHE_SIZE * 10:
+            popular = counter.most_common(RESULT_CACHE_SIZE)
+            counter.clear()
+            counter.update(dict(popular))
+
+def load_partition(dataset):
+    """
+    Load one dataset and build its search indexes.
 
-def load_data():
-    """Load CSV data and geocode cache on app startup."""
-    global facilities_data, geocode_cache
+    Args:
+        dataset: Dataset from datasets.py
+
+    Returns:
+        Partition dict with 'dataset', 'version' (SHA-256 of the CSV),
+        'facilities_data', 'rows' (facility number -> position in
+        facilities_data), 'geocode_cache', 'search_table' (active, geocoded
+        facilities laid out for proximity search), 'names' (typeahead index
+        over facility and licensee names), 'cube' (rollups), 'places' (ZIP
+        code and city lookup table, see place_tables.py) and 'stats'
+        ((source mtime, stats dict)), or None when the dataset hasn't been
+        downloaded
+    """
+    if not dataset.csv_file.exists():
+        print(f"Warning: {dataset.csv_file} not found. "
+              f"Run update_data.py --dataset {dataset.name} first!")
+        return None
 
-    print("Loading facilities data...")
-    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+    print(f"Loading {dataset.label} data...")
+    with open(dataset.csv_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         facilities_data = list(reader)
     print(f"Loaded {len(facilities_data)} facilities")
 
     print("Loading geocode cache...")
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            geocode_cache = json.load(f)
+    # Read-only: a legacy geocode_cache.json is used as-is until the geocoder migrates it
+    geocode_cache = geocode_store.load_cache(dataset.geocode_journal, dataset.legacy_cache,
+                                             migrate=False)
+    if geocode_cache:
         print(f"Loaded {len(geocode_cache)} geocoded facilities")
-    except FileNotFoundError:
-        print(f"Warning: {CACHE_FILE} not found. Run geocode_facilities.py first!")
-        geocode_cache = {}
+    else:
+        print(f"Warning: {dataset.geocode_journal} not found. Run geocode_facilities.py first!")
+
+    partition = {
+        'dataset': dataset,
+        'version': facility_delta.file_sha256(dataset.csv_file),
+        'facilities_data': facilities_data,
+        'rows': row_positions(facilities_data),
+        'geocode_cache': geocode_cache,
+        'search_table': build_search_table(facilities_data, geocode_cache, dataset.name),
+        'names': name_index.build_index(facilities_data, geocode_cache),
+        'cube': facility_stats.compute_cube(facilities_data),
+        'places': None,
+        'stats': None,
+    }
+    print(f"Indexed {len(partition['names']['docs'])} facility names")
+    print(f"Built rollup cube ({len(partition['cube']['cells'])} cells)")
+
+    partition['places'] = place_tables.load_places(place_tables.places_file(dataset),
+                                                   partition['version'])
+    if partition['places']:
+        print(f"Loaded lookup tables for {len(partition['places']['zip'])} ZIP codes "
+              f"and {len(partition['places']['city'])} cities")
+    else:
+        print(f"Warning: no current ZIP/city lookup table. Run place_tables.py --dataset {dataset.name}")
+    load_stats(partition)
+    return partition
+
+def row_positions(facilities_data):
+    """Facility number -> position of its CSV row."""
+    return {str(row.get('Facility Number', '')): i for i, row in enumerate(facilities_data)}
+
+def load_data():
+    """Load every enabled dataset (see datasets.py) on app startup."""
+    global partitions
+
+    loaded = {}
+    for dataset in datasets.enabled():
+        partition = load_partition(dataset)
+        if partition is not None:
+            loaded[dataset.name] = partition
+    partitions = loaded
+
+    # Results computed from the old data are no longer valid
+    with cache_lock:
+        search_cache.clear()
+    print(f"App ready! Datasets: {', '.join(partitions) or 'none'}")
+
+def load_stats(partition):
+    """
+    Load the statistics saved by a dataset's last update run.
+
+    Falls back to computing them from the loaded data (one pass) when no
+    saved statistics exist. Re-read only when the file changes.
+
+    Args:
+        partition: Partition dict from load_partition()
+    """
+    stats_file = partition['dataset'].stats_dir / facility_stats.LATEST_STATS_FILE.name
+    cached = partition['stats']
+    try:
+        mtime = os.path.getmtime(stats_file)
+    except OSError:
+        if cached is None or cached[0] is not None:
+            cached = (None, facility_stats.compute_stats(partition['facilities_data'],
+                                                         partition['geocode_cache']))
+            partition['stats'] = cached
+        return cached[1]
+
+    if cached is None or cached[0] != mtime:
+        with open(stats_file, 'r') as f:
+            cached = (mtime, json.load(f))
+        partition['stats'] = cached
+    return cached[1]
+
+def selected_partitions(names=None):
+    """
+    The loaded partitions a request asks for.
+
+    Args:
+        names: Dataset names, or None/empty for the default dataset
+
+    Returns:
+        List of partition dicts, in the order asked for
+
+    Raises:
+        ValueError: A dataset that is unknown or not enabled
+    """
+    if isinstance(names, str):
+        names = [names]
+    if not names:
+        if not partitions:
+            raise ValueError('No datasets loaded')
+        names = [datasets.DEFAULT] if datasets.DEFAULT in partitions else list(partitions)[:1]
+
+    selected = []
+    for name in names:
+        if name not in partitions:
+            raise ValueError(f"Dataset '{name}' is not available "
+                             f"(enabled: {', '.join(partitions) or 'none'})")
+        if partitions[name] not in selected:
+            selected.append(partitions[name])
+    return selected
+
+class DeltaConflict(Exception):
+    """A changelog was made against different data than the app has loaded."""
+
+def patch_partition(partition, delta):
+    """
+    Apply a changelog to a copy of a partition.
 
-    print("App ready!")
+    Only the changed facilities are re-processed; everything unchanged is
+    shared with the old partition, which is never modified.
+
+    Args:
+        partition: Partition dict from load_partition()
+        delta: Changelog dict (see facility_delta.py)
+
+    Returns:
+        (new partition dict, list of (lat, lon) of facilities that moved in,
+        out of or within the search table)
+    """
+    name = partition['dataset'].name
+    upserts = {str(row['Facility Number']): row for row in delta['upserts']}
+    deletes = {str(number) for number in delta['deletes']} - set(upserts)
+    old_rows_by_number = partition['rows']
+    old_rows = [partition['facilities_data'][old_rows_by_number[number]]
+                for number in list(upserts) + sorted(deletes) if number in old_rows_by_number]
+
+    # CSV rows: replaced in place, new ones appended
+    facilities_data = list(partition['facilities_data'])
+    rows = dict(old_rows_by_number)
+    for number, row in upserts.items():
+        if number in rows:
+            facilities_data[rows[number]] = row
+        else:
+            rows[number] = len(facilities_data)
+            facilities_data.append(row)
+    if deletes:
+        facilities_data = [row for row in facilities_data
+                           if str(row.get('Facility Number', '')) not in deletes]
+        rows = row_positions(facilities_data)
+
+    # Geocodes: None means the facility has no coordinates any more
+    geocodes = delta.get('geocodes') or {}
+    geocode_cache = dict(partition['geocode_cache'])
+    for number, coords in geocodes.items():
+        if coords is None:
+            geocode_cache.pop(number, None)
+        else:
+            geocode_cache[number] = coords
+    for number in deletes:
+        geocode_cache.pop(number, None)
+
+    # Facilities whose coordinates changed without a change to their row
+    # are re-processed like upserts
+    changed = dict(upserts)
+    for number in geocodes:
+        if number not in changed and number in rows:
+            changed[number] = facilities_data[rows[number]]
+
+    # Search table: facilities that are no longer active (or lost their
+    # coordinates) leave it like deleted ones
+    table = partition['search_table']
+    results = []
+    removed = set(deletes)
+    for number, row in changed.items():
+        result = search_result(row, geocode_cache, name)
+        if result is None:
+            removed.add(number)
+        else:
+            results.append(result)
+
+    moved = [(result['lat'], result['lon']) for result in results]
+    for number in set(changed) | removed:
+        position = table['positions'].get(number)
+        if position is not None:
+            old = table['facilities'][position]
+            moved.append((old['lat'], old['lon']))
+
+    patched = dict(partition,
+                   version=delta['version'],
+                   facilities_data=facilities_data,
+                   rows=rows,
+                   geocode_cache=geocode_cache,
+                   search_table=facility_search.patch_table(table, results, removed),
+                   names=name_index.patch_index(partition['names'], set(changed) | deletes,
+                                                list(changed.values()), geocode_cache),
+                   cube=facility_stats.patch_cube(partition['cube'], old_rows,
+                                                  list(upserts.values())),
+                   # Only a table built from the changelog's data still applies
+                   places=place_tables.load_places(place_tables.places_file(partition['dataset']),
+                                                   delta['version']),
+                   stats=None)
+    return patched, moved
+
+def evict_searches(dataset_name, points):
+    """
+    Drop cached searches a changelog may have changed: those over the
+    dataset whose radius reaches any of the given points.
+    """
+    default = selected_partitions()[0]['dataset'].name
+    with cache_lock:
+        for key in list(search_cache):
+            lat, lon, radius_miles, dataset_names = key
+            if dataset_name not in (dataset_names or (default,)):
+                continue
+            if any(haversine_distance(lat, lon, point_lat, point_lon) <= radius_miles
+                   for point_lat, point_lon in points):
+                search_cache.pop(key, None)
+
+def apply_delta(delta):
+    """
+    Apply a changelog from the update pipeline to the running app.
+
+    The patched partition is built on the side and swapped in with a single
+    assignment, so a request sees either all of a changelog or none of it.
+
+    Args:
+        delta: Changelog dict (see facility_delta.py)
+
+    Returns:
+        Summary dict ('applied' is False when the changelog was already applied)
+
+    Raises:
+        ValueError: Malformed changelog, or its dataset isn't loaded
+        DeltaConflict: The changelog doesn't apply to the loaded data
+    """
+    global partitions
+    required = ('dataset', 'base', 'version', 'upserts', 'deletes')
+    if not isinstance(delta, dict) or any(key not in delta for key in required):
+        raise ValueError(f"Changelog needs {', '.join(required)}")
+    name, base, version = delta['dataset'], delta['base'], delta['version']
+
+    with delta_lock:
+        partition = partitions.get(name)
+        if partition is None:
+            raise ValueError(f"Dataset '{name}' is not loaded")
+        if partition['version'] == version:
+            return {'applied': False, 'dataset': name, 'version': version}
+        if partition['version'] != base:
+            raise DeltaConflict(f"Changelog applies to {base[:12]}, "
+                                f"but {name} is at {partition['version'][:12]}")
+
+        started = time.perf_counter()
+        patched, moved = patch_partition(partition, delta)
+        partitions = dict(partitions, **{name: patched})
+        evict_searches(name, moved)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    print(f"Applied changelog to {name}: {len(delta['upserts'])} upserts, "
+          f"{len(delta['deletes'])} deletes in {elapsed_ms} ms")
+    return {
+        'applied': True,
+        'dataset': name,
+        'version': version,
+        'upserts': len(delta['upserts']),
+        'deletes': len(delta['deletes']),
+        'elapsed_ms': elapsed_ms,
+    }
+
+def watch_deltas(interval):
+    """
+    Apply changelogs dropped into each loaded dataset's delta directory
+    (runs on a background thread).
+    """
+    # Changelogs already on disk are older than the data loaded at startup
+    seen = {
+        name: {path.name for path in facility_delta.delta_dir(dataset).glob('delta_*.json')}
+        for name, dataset in datasets.DATASETS.items()
+    }
+    while True:
+        for name, partition in list(partitions.items()):
+            directory = facility_delta.delta_dir(partition['dataset'])
+            for path, delta in facility_delta.read_deltas(directory, seen[name]):
+                try:
+                    apply_delta(delta)
+                except (ValueError, DeltaConflict) as e:
+                    print(f"Warning: skipped changelog {path}: {e}")
+        time.sleep(interval)
+
+def warm_caches(path):
+    """
+    Pre-fill the result caches from another instance's hot searches.
+
+    Args:
+        path: JSON file from save_hot_searches() with 'addresses'
+              (address -> geocode result) and 'searches' ([lat, lon, radius,
+              datasets]; older instances leave out datasets)
+
+    Returns:
+        Number of searches replayed
+    """
+    try:
+        with open(path, 'r') as f:
+            hot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read warmup file {path}: {e}")
+        return 0
+
+    # Geocoding results are copied over, so warmup makes no Nominatim calls
+    for address, result in hot.get('addresses', {}).items():
+        cache_put(address_cache, address, result)
+
+    replayed = 0
+    for search in hot.get('searches', []):
+        lat, lon, radius_miles = search[:3]
+        dataset_names = tuple(search[3]) if len(search) > 3 else ()
+        try:
+            facilities = search_facilities(lat, lon, radius_miles, dataset_names)
+        except ValueError:
+            continue  # Dataset no longer enabled
+        cache_put(search_cache, (lat, lon, radius_miles, dataset_names), facilities)
+        replayed += 1
+    return replayed
+
+def save_hot_searches(path):
+    """
+    Save the most frequent searches, for the next instance to warm its
+    caches with (see warm_caches). The file holds addresses users typed, so
+    it is only readable by the app's user and never served over HTTP.
+
+    Returns:
+        Number of searches saved
+    """
+    addresses = {}
+    with cache_lock:
+        for address, _ in address_counts.most_common(HOT_SEARCH_LIMIT):
+            result = address_cache.get(address)
+            if result is not None:
+                addresses[address] = result
+        searches = [list(key) for key, _ in search_counts.most_common(HOT_SEARCH_LIMIT)]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'addresses': addresses, 'searches': searches}, f)
+    os.replace(tmp_path, path)
+    return len(searches)
+
+def watch_hot_searches(path, interval):
+    """Background thread: save the hot searches every interval seconds."""
+    while True:
+        time.sleep(interval)
+        try:
+            save_hot_searches(path)
+        except OSError as e:
+            print(f"Warning: could not save hot searches to {path}: {e}")
+
+def load_assets():
+    """Fingerprint and precompress the page's CSS/JS; the page is re-rendered on next visit."""
+    global assets, page_shell
+    assets = static_assets.build_assets(ASSET_SOURCES)
+    page_shell = None
+    print(f"Built {len(assets['files'])} static assets")
+
+def start_app():
+    """Load data, warm caches and mark the instance ready to serve."""
+    global ready
+    load_assets()
+    load_data()
+    if WARMUP_FILE:
+        replayed = warm_caches(WARMUP_FILE)
+        print(f"Warmed caches with {replayed} searches")
+    if HOT_SEARCH_FILE:
+        threading.Thread(target=watch_hot_searches,
+                         args=(HOT_SEARCH_FILE, HOT_SEARCH_SAVE_SECONDS), daemon=True).start()
+    if DELTA_POLL_SECONDS > 0:
+        threading.Thread(target=watch_deltas, args=(DELTA_POLL_SECONDS,), daemon=True).start()
+        print(f"Watching for changelogs every {DELTA_POLL_SECONDS:g}s")
+    ready = True
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -79,7 +557,7 @@ def geocode_address(address):
     Returns:
         dict with 'lat', 'lon', and 'display_name', or None if failed
     """
-    url = "https://nominatim.openstreetmap.org/search"
+    url = f"{NOMINATIM_URL}/search"
     params = {
         'q': address,
         'format': 'json',
@@ -196,10 +674,53 @@ def get_severity_shade(citation_count):
     else:
         return 'dark'
 
+def send_variant(variants, etag, mimetype, cache_control):
+    """
+    Respond with the best precompressed variant, or 304 if the client's copy
+    is current.
+    """
+    encoding, body = static_assets.choose_variant(variants, request.accept_encodings)
+    etag = etag if encoding == 'identity' else f'{etag}-{encoding}'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.template_global()
+def asset_url(name):
+    """Fingerprinted URL of a static asset (used by the templates)."""
+    return assets['urls'][name]
+
 @app.route('/')
 def index():
-    """Serve the main page."""
-    return render_template('index.html')
+    """Serve the main page (rendered once, then served from memory)."""
+    global page_shell
+    if app.debug:
+        load_assets()  # Pick up template/CSS/JS edits while developing
+    if page_shell is None:
+        body = render_template('index.html').encode('utf-8')
+        page_shell = {
+            'etag': hashlib.sha256(body).hexdigest()[:16],
+            'variants': static_assets.precompress(body),
+        }
+    # Browsers revalidate the page each visit (a 304 when nothing changed)
+    return send_variant(page_shell['variants'], page_shell['etag'],
+                        'text/html', 'no-cache')
+
+@app.route('/assets/<filename>')
+def asset(filename):
+    """Serve a fingerprinted asset with a far-future, immutable cache lifetime."""
+    entry = assets['files'].get(filename)
+    if entry is None:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return send_variant(entry['variants'], entry['etag'], entry['mimetype'],
+                        f'public, max-age={ASSET_MAX_AGE}, immutable')
 
 @app.route('/api/geocode', methods=['POST'])
 def api_geocode():
@@ -215,7 +736,13 @@ def api_geocode():
     if not address:
         return jsonify({'success': False, 'error': 'Address is required'}), 400
 
-    result = geocode_address(address)
+    key = address_key(address)
+    count_hit(address_counts, key)
+    result = cache_get(address_cache, key)
+    if result is None:
+        result = geocode_address(address)
+        if result:
+            cache_put(address_cache, key, result)
 
     if result:
         return jsonify({
@@ -235,110 +762,679 @@ def api_search():
     """
     Search for nearby facilities.
 
-    Request body: {"lat": 34.0522, "lon": -118.2437, "radius_miles": 10}
+    Request body: {"lat": 34.0522, "lon": -118.2437, "radius_miles": 10,
+                   "datasets": ["rcfe", "adult_residential"]}  (datasets optional)
     Response: {"success": true, "facilities": [...]}
     """
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
     user_lat = data.get('lat')
     user_lon = data.get('lon')
     radius_miles = data.get('radius_miles', 50)  # Default 50 miles
+    dataset_names = data.get('datasets') or []
+    if isinstance(dataset_names, str):
+        dataset_names = [dataset_names]
 
     if user_lat is None or user_lon is None:
         return jsonify({'success': False, 'error': 'Latitude and longitude required'}), 400
 
-    facilities = []
+    # The cache key must be hashable: plain numbers and a tuple of names
+    try:
+        user_lat, user_lon = json_number(user_lat, 'lat', float), json_number(user_lon, 'lon', float)
+        radius_miles = json_number(radius_miles, 'radius_miles', float)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not isinstance(dataset_names, list) or not all(isinstance(name, str) for name in dataset_names):
+        return jsonify({'success': False, 'error': 'datasets must be a list of names'}), 400
+    dataset_names = tuple(dataset_names)
+
+    key = (user_lat, user_lon, radius_miles, dataset_names)
+    facilities = cache_get(search_cache, key)
+    if facilities is None:
+        try:
+            facilities = search_facilities(user_lat, user_lon, radius_miles, dataset_names)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        cache_put(search_cache, key, facilities)
+    count_hit(search_counts, key)
 
+    return jsonify({
+        'success': True,
+        'count': len(facilities),
+        'facilities': facilities
+    })
+
+@app.route('/api/suggest')
+def api_suggest():
+    """
+    Facility name typeahead, statewide.
+
+    Query string: ?q=sunrise&lat=34.05&lon=-118.24&limit=10&dataset=rcfe
+    (lat/lon optional, ranks nearby facilities higher)
+    Response: {"success": true, "suggestions": [{"facility_number": "...",
+        "name": "...", "licensee": "...", "city": "...", "lat": ..., "lon": ...}]}
+    """
+    query = request.args.get('q', '')
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    limit = max(1, min(request.args.get('limit', 10, type=int), SUGGEST_MAX_LIMIT))
+    try:
+        partition, = selected_partitions(request.args.get('dataset'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    suggestions = name_index.suggest(partition['names'], query, limit=limit, lat=lat, lon=lon)
+    return jsonify({'success': True, 'suggestions': suggestions})
+
+def search_result(row, geocode_cache, dataset_name):
+    """
+    The search result dict for a facility.
+
+    Args:
+        row: CSV row
+        geocode_cache: The dataset's geocode cache
+        dataset_name: Dataset name, included in the result
+
+    Returns:
+        Result dict, or None if the facility is closed or not geocoded
+    """
     # Filter to LICENSED, PENDING, and ON PROBATION facilities
+    facility_status = row.get('Facility Status', '')
+    if facility_status not in ['LICENSED', 'PENDING', 'ON PROBATION']:
+        return None
+
+    facility_num = str(row.get('Facility Number', ''))
+
+    # Get geocoded coordinates from cache
+    if facility_num not in geocode_cache:
+        return None  # Skip facilities without geocoded data
+
+    coords = geocode_cache[facility_num]
+
+    # Count total citations
+    citations_str = row.get('Citation Numbers', '').strip()
+    if citations_str:
+        # Split by comma and count
+        citation_list = [c.strip() for c in citations_str.split(',') if c.strip()]
+        total_citations = len(citation_list)
+    else:
+        total_citations = 0
+
+    # Parse capacity
+    try:
+        capacity = int(row.get('Facility Capacity', '0'))
+    except (ValueError, TypeError):
+        capacity = 0
+
+    return {
+        'facility_number': facility_num,
+        'name': row.get('Facility Name', 'Unknown'),
+        'address': row.get('Facility Address', ''),
+        'city': row.get('Facility City', ''),
+        'state': row.get('Facility State', ''),
+        'zip': row.get('Facility Zip', ''),
+        'county': row.get('County Name', ''),
+        'phone': row.get('Facility Telephone Number', ''),
+        'capacity': capacity,
+        'status': facility_status,
+        'lat': coords['lat'],
+        'lon': coords['lon'],
+        'total_citations': total_citations,
+        'ownership_change': check_ownership_change(row.get('License First Date', '')),
+        'shade': get_severity_shade(total_citations),
+        'dataset': dataset_name
+    }
+
+@app.route('/api/place')
+def api_place():
+    """
+    Facilities near a ZIP code or city, answered from the precomputed lookup
+    table (no geocoding). Anything else - a street address, a place not in
+    the data - gets a 404 and goes through /api/geocode and /api/search.
+
+    Query string: ?q=95814 (or q=Sacramento, CA)&radius_miles=50&dataset=rcfe
+    Response: {"success": true, "kind": "zip", "place": "95814", "lat": ...,
+        "lon": ..., "count": 50, "facilities": [...]}
+    """
+    query = request.args.get('q', '')
+    radius_miles = request.args.get('radius_miles', 50, type=float)
+    try:
+        partition, = selected_partitions(request.args.get('dataset'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    places = partition['places']
+    entry = place_tables.lookup(places, query)
+    if entry is None:
+        return jsonify({'success': False, 'error': 'Not a known ZIP code or city'}), 404
+
+    if radius_miles <= places['radius_miles']:
+        # The ranking within the table's radius holds for any smaller one
+        table = partition['search_table']
+        facilities, positions = table['facilities'], table['positions']
+        results = [dict(facilities[positions[number]], distance=distance)
+                   for number, distance in entry['hits']
+                   if distance <= radius_miles and number in positions]
+    else:
+        results = search_facilities(entry['lat'], entry['lon'], radius_miles,
+                                    (partition['dataset'].name,))
+
+    return jsonify({
+        'success': True,
+        'kind': entry['kind'],
+        'place': entry['key'],
+        'lat': entry['lat'],
+        'lon': entry['lon'],
+        'count': len(results),
+        'facilities': results
+    })
+
+def build_search_table(facilities_data, geocode_cache, dataset_name):
+    """
+    Build the result dict for every active, geocoded facility once, and lay
+    them out for the search engine.
+
+    Args:
+        facilities_data: CSV rows of one dataset
+        geocode_cache: That dataset's geocode cache
+        dataset_name: Dataset name, included in each result
+    """
+    facilities = []
     for row in facilities_data:
-        # Skip closed facilities
-        facility_status = row.get('Facility Status', '')
-        if facility_status not in ['LICENSED', 'PENDING', 'ON PROBATION']:
-            continue
+        result = search_result(row, geocode_cache, dataset_name)
+        if result is not None:
+            facilities.append(result)
+    return facility_search.build_table(facilities)
+
+def search_facilities(user_lat, user_lon, radius_miles, dataset_names=()):
+    """
+    Find the nearest active, geocoded facilities.
+
+    Args:
+        user_lat, user_lon: Search origin
+        radius_miles: Search radius
+        dataset_names: Datasets to search (default: the default dataset)
+
+    Returns:
+        Up to 50 facility dicts, nearest first
+
+    Raises:
+        ValueError: A dataset that is unknown or not enabled
+    """
+    tables = [p['search_table'] for p in selected_partitions(dataset_names)]
+    return facility_search.nearest_across(tables, [(user_lat, user_lon)], radius_miles)[0]
+
+def json_number(value, name, cast):
+    """
+    Validate a numeric field of a JSON request body.
+
+    Args:
+        value: Value from the request body
+        name: Field name, for the error message
+        cast: int or float
+
+    Returns:
+        The value as cast
+
+    Raises:
+        ValueError: Not a number (or, for int, not a whole number)
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (cast is int and value != int(value)):
+        raise ValueError(f'{name} must be a {"whole " if cast is int else ""}number')
+    return cast(value)
 
-        facility_num = str(row.get('Facility Number', ''))
+def batch_filters(filters):
+    """
+    Validate the search filters of a batch request.
 
-        # Get geocoded coordinates from cache
-        if facility_num not in geocode_cache:
-            continue  # Skip facilities without geocoded data
+    Args:
+        filters: 'filters' value from the request body (None for no filters)
 
-        coords = geocode_cache[facility_num]
-        fac_lat = coords['lat']
-        fac_lon = coords['lon']
+    Returns:
+        Filter dict for facility_search.facility_filter, or None
 
-        # Calculate distance
-        distance = haversine_distance(user_lat, user_lon, fac_lat, fac_lon)
+    Raises:
+        ValueError: An unknown filter or a value of the wrong type
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError('filters must be an object')
 
-        # Filter by radius
-        if distance > radius_miles:
+    clean = {}
+    for key, value in filters.items():
+        if value is None:
             continue
+        if key in ('statuses', 'counties'):
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise ValueError(f'filters.{key} must be a list of strings')
+            clean[key] = value
+        elif key in ('min_capacity', 'max_capacity', 'max_citations'):
+            clean[key] = json_number(value, f'filters.{key}', int)
+        elif key == 'name':
+            if not isinstance(value, str):
+                raise ValueError('filters.name must be a string')
+            clean[key] = value
+        else:
+            raise ValueError(f'Unknown filter: {key}')
+    return clean or None
 
-        # Count total citations
-        citations_str = row.get('Citation Numbers', '').strip()
-        if citations_str:
-            # Split by comma and count
-            citation_list = [c.strip() for c in citations_str.split(',') if c.strip()]
-            total_citations = len(citation_list)
+@app.route('/api/search/batch', methods=['POST'])
+def api_search_batch():
+    """
+    Search around many origins at once (e.g. placing several clients).
+
+    Request body: {"origins": [{"id": "client-1", "lat": 34.05, "lon": -118.24},
+                               {"id": "client-2", "address": "123 Main St, Fresno, CA"}],
+                   "radius_miles": 25, "limit": 10, "datasets": ["rcfe"],
+                   "filters": {"statuses": ["LICENSED"], "counties": ["FRESNO"], "min_capacity": 7,
+                               "max_capacity": 49, "max_citations": 5, "name": "villa"}}
+    Response: {"success": true, "results": [{"id": "client-1", "lat": ..., "lon": ...,
+               "count": 10, "facilities": [...]}, {"id": "client-2", "error": "..."}]}
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+    origins = data.get('origins') or []
+
+    if not origins:
+        return jsonify({'success': False, 'error': 'origins required'}), 400
+    if not isinstance(origins, list):
+        return jsonify({'success': False, 'error': 'origins must be a list'}), 400
+    if len(origins) > BATCH_MAX_ORIGINS:
+        return jsonify({'success': False,
+                        'error': f'At most {BATCH_MAX_ORIGINS} origins per request'}), 400
+    for origin in origins:
+        if not isinstance(origin, dict):
+            return jsonify({'success': False, 'error': 'Each origin must be an object'}), 400
+        if origin.get('address') is not None and not isinstance(origin['address'], str):
+            return jsonify({'success': False, 'error': 'Origin addresses must be strings'}), 400
+    try:
+        radius_miles = json_number(data.get('radius_miles', 50), 'radius_miles', float)
+        limit = json_number(data.get('limit', facility_search.DEFAULT_LIMIT), 'limit', int)
+        if radius_miles <= 0 or limit < 1:
+            raise ValueError('radius_miles and limit must be positive')
+        filters = batch_filters(data.get('filters'))
+        tables = [p['search_table'] for p in selected_partitions(data.get('datasets'))]
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    limit = min(limit, BATCH_MAX_LIMIT)
+
+    # Resolve addresses (cached ones are free; new ones cost a Nominatim call)
+    results = []
+    points = []
+    geocodes = 0
+    for i, origin in enumerate(origins):
+        result = {'id': origin.get('id', i)}
+        lat, lon = origin.get('lat'), origin.get('lon')
+        if (lat is None or lon is None) and origin.get('address'):
+            address = origin['address']
+            key = address_key(address)
+            geocoded = cache_get(address_cache, key)
+            if geocoded is None:
+                if geocodes >= BATCH_MAX_GEOCODES:
+                    result['error'] = 'Too many new addresses in one request - send coordinates'
+                else:
+                    geocodes += 1
+                    geocoded = geocode_address(address)
+                    if geocoded:
+                        cache_put(address_cache, key, geocoded)
+                    else:
+                        result['error'] = 'Could not find address'
+            if geocoded:
+                lat, lon = geocoded['lat'], geocoded['lon']
+
+        if 'error' not in result:
+            try:
+                lat, lon = float(lat), float(lon)
+            except (TypeError, ValueError):
+                result['error'] = 'Latitude and longitude (or an address) required'
+        if 'error' not in result:
+            result.update(lat=lat, lon=lon)
+            points.append((len(results), (lat, lon)))
+        results.append(result)
+
+    # One blocked distance computation for all resolved origins
+    found = facility_search.nearest_across(tables, [point for _, point in points],
+                                           radius_miles, limit, filters)
+    for (position, _), facilities in zip(points, found):
+        results[position].update(count=len(facilities), facilities=facilities)
+
+    return jsonify({'success': True, 'results': results})
+
+def export_filters(args):
+    """Search filters from export query string parameters."""
+    filters = {
+        'statuses': args.getlist('status'),
+        'counties': args.getlist('county'),
+        'min_capacity': args.get('min_capacity', type=int),
+        'max_capacity': args.get('max_capacity', type=int),
+        'max_citations': args.get('max_citations', type=int),
+        'name': args.get('name'),
+    }
+    # 0 is a real bound (max_citations=0: no citations); only drop what is unset
+    return {key: value for key, value in filters.items() if value is not None and value != []}
+
+def export_rows(matches, fmt):
+    """
+    Encode facilities as CSV or NDJSON text, a few hundred rows per chunk.
+
+    Args:
+        matches: Iterable of facility dicts
+        fmt: 'csv' or 'ndjson'
+
+    Yields:
+        Text chunks
+    """
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+
+    rows = 0
+    for facility in matches:
+        row = {field: facility.get(field) for field in EXPORT_FIELDS}
+        row['details_url'] = DETAILS_URL.format(facility=facility['facility_number'])
+        if fmt == 'csv':
+            row['ownership_change'] = 'Yes' if row['ownership_change'] else 'No'
+            writer.writerow(row)
         else:
-            total_citations = 0
+            buffer.write(json.dumps(row) + '\n')
+
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks as it is produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/export')
+def api_export():
+    """
+    Download every facility matching the search filters, statewide or
+    around a point, streamed as it is written.
+
+    Query string: ?format=csv|ndjson&lat=34.05&lon=-118.24&radius_miles=25
+        &status=LICENSED&status=PENDING&county=FRESNO&min_capacity=7
+        &max_capacity=49&max_citations=5&name=villa&dataset=rcfe
+    (all optional; without lat/lon the whole state is exported). Facilities
+    come in data file order, one dataset after another, not by distance. The response is gzipped when
+    the client accepts it.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False,
+                        'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if (lat is None) != (lon is None):
+        return jsonify({'success': False, 'error': 'Both lat and lon required'}), 400
+    origin = (lat, lon) if lat is not None else None
+    radius_miles = request.args.get('radius_miles', 50, type=float) if origin else None
 
-        # Check ownership change
-        ownership_change = check_ownership_change(row.get('License First Date', ''))
+    try:
+        selected = selected_partitions(request.args.getlist('dataset'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    filters = export_filters(request.args)
+    matches = (facility
+               for partition in selected
+               for facility in facility_search.iter_matches(partition['search_table'], filters,
+                                                            origin, radius_miles))
+    chunks = export_rows(matches, fmt)
+
+    prefix = '_'.join(partition['dataset'].name for partition in selected)
+    headers = {
+        'Content-Disposition':
+            f'attachment; filename={prefix}_export_{datetime.now():%Y%m%d}.{fmt}',
+        'Vary': 'Accept-Encoding',
+    }
+    if 'gzip' in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(chunks, mimetype=EXPORT_FORMATS[fmt], headers=headers)
 
-        # Determine shade based on total citations
-        shade = get_severity_shade(total_citations)
+@app.route('/facility/<filename>')
+def facility_page(filename):
+    """
+    Serve a static facility page or its JSON twin (site/facility/).
 
-        # Parse capacity
-        try:
-            capacity = int(row.get('Facility Capacity', '0'))
-        except (ValueError, TypeError):
-            capacity = 0
-
-        # Build facility object
-        facility = {
-            'facility_number': facility_num,
-            'name': row.get('Facility Name', 'Unknown'),
-            'address': row.get('Facility Address', ''),
-            'city': row.get('Facility City', ''),
-            'state': row.get('Facility State', ''),
-            'zip': row.get('Facility Zip', ''),
-            'phone': row.get('Facility Telephone Number', ''),
-            'capacity': capacity,
-            'status': facility_status,
-            'lat': fac_lat,
-            'lon': fac_lon,
-            'distance': round(distance, 2),
-            'total_citations': total_citations,
-            'ownership_change': ownership_change,
-            'shade': shade
-        }
+    In production the web server or CDN serves this directory directly;
+    this route covers running the app on its own.
+    """
+    return send_from_directory(PAGE_DIR.resolve(), filename, max_age=PAGE_MAX_AGE)
+
+@app.route('/api/facility/<facility_number>/citations')
+def api_facility_citations(facility_number):
+    """
+    Inspection visits and citations for one facility, newest first.
 
-        facilities.append(facility)
+    Response: {"success": true, "facility_number": "...", "visits": [
+        {"visit_date": "2025-05-22", "report_url": "...",
+         "citations": [{"number": "...", "type": "B", "code": "87303(a)",
+                        "narrative": "..."}]}]}
+    """
+    if not facility_number.isdigit():
+        return jsonify({'success': False, 'error': 'Invalid facility number'}), 400
 
-    # Sort by distance
-    facilities.sort(key=lambda x: x['distance'])
+    result = citation_store.facility_citations(facility_number, CITATIONS_DB)
+    if result is None:
+        return jsonify({'success': False, 'error': 'Citation data not available'}), 404
+    return jsonify({'success': True, **result})
 
-    # Limit to top 50
-    facilities = facilities[:50]
+@app.route('/api/stats')
+def api_stats():
+    """
+    Dataset statistics: counts and geocoding coverage by status, county,
+    regional office and facility type, plus capacity and citation distributions.
 
+    Query string: ?dataset=rcfe (optional)
+    """
+    try:
+        partition, = selected_partitions(request.args.get('dataset'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    response = jsonify(load_stats(partition))
+    response.headers['Cache-Control'] = f'public, max-age={STATS_MAX_AGE}'
+    return response
+
+@app.route('/api/rollup')
+def api_rollup():
+    """
+    Facilities, beds, citations and substantiated allegations grouped by
+    county, regional office, facility type or status (for choropleth and
+    heatmap layers).
+
+    Query string: ?by=county (or by=county,status for a heatmap) plus
+        optional fixed dimensions, e.g. &status=ON PROBATION&regional_office=26,
+        and &dataset=rcfe (optional)
+    Response: {"success": true, "by": ["county"], "fixed": {...},
+        "rows": [{"county": "FRESNO", "facilities": 312, "capacity": 9120,
+                  "citations": 401, "substantiated_allegations": 88,
+                  "citations_per_bed": 0.044, ...}],
+        "range": {"citations_per_bed": [0.01, 0.09], ...}}
+    """
+    by = [name.strip() for name in request.args.get('by', 'county').split(',') if name.strip()]
+    if not 1 <= len(by) <= 2:
+        return jsonify({'success': False, 'error': 'by takes one or two dimensions'}), 400
+    fixed = {name: request.args[name] for name in facility_stats.CUBE_DIMENSIONS
+             if request.args.get(name) and name not in by}
+
+    try:
+        partition, = selected_partitions(request.args.get('dataset'))
+        result = facility_stats.cube_slice(partition['cube'], by, fixed)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    response = jsonify({'success': True, 'by': by, 'fixed': fixed, **result})
+    response.headers['Cache-Control'] = f'public, max-age={STATS_MAX_AGE}'
+    return response
+
+@app.route('/api/datasets')
+def api_datasets():
+    """
+    The facility categories this instance serves.
+
+    Response: {"success": true, "default": "rcfe", "datasets": [{"name": "rcfe",
+        "label": "Elderly Assisted Living (RCFE)", "facilities": 12000,
+        "searchable": 9000}]}
+    """
+    served = [{
+        'name': name,
+        'label': p['dataset'].label,
+        'facilities': len(p['facilities_data']),
+        'searchable': len(p['search_table']['positions'])
+    } for name, p in partitions.items()]
     return jsonify({
         'success': True,
-        'count': len(facilities),
-        'facilities': facilities
+        'default': selected_partitions()[0]['dataset'].name if partitions else None,
+        'datasets': served
     })
 
+def compact_entry(partition):
+    """
+    A partition's compact dataset, encoded and precompressed on first request
+    and again whenever the partition's data version changes.
+
+    Returns:
+        dict with 'version', 'count', 'etag' and 'variants'
+    """
+    name = partition['dataset'].name
+    entry = compact_data.get(name)
+    if entry is None or entry['version'] != partition['version']:
+        facilities = [f for f in partition['search_table']['facilities'] if f is not None]
+        body = json.dumps(compact_dataset.encode(facilities, name, partition['version']),
+                          separators=(',', ':')).encode('utf-8')
+        entry = {
+            'version': partition['version'],
+            'count': len(facilities),
+            'etag': partition['version'][:16],
+            'variants': static_assets.precompress(body),
+        }
+        compact_data[name] = entry
+    return entry
+
+@app.route('/api/data-version')
+def api_data_version():
+    """
+    Current version of each dataset's compact download, for offline clients
+    to check before using their stored copy. Revalidate with If-None-Match.
+
+    Response: {"success": true, "default": "rcfe", "datasets": {"rcfe":
+        {"version": "<sha256>", "count": 9000, "url": "/api/data?dataset=rcfe"}}}
+    """
+    versions = {name: {
+        'version': p['version'],
+        'count': len(p['search_table']['positions']),
+        'url': f'/api/data?dataset={name}'
+    } for name, p in partitions.items()}
+    body = json.dumps({
+        'success': True,
+        'default': selected_partitions()[0]['dataset'].name if partitions else None,
+        'datasets': versions
+    }, sort_keys=True).encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:16]
+    return send_variant({'identity': body}, etag, 'application/json', 'no-cache')
+
+@app.route('/api/data')
+def api_data():
+    """
+    Every searchable facility of a dataset in compact, columnar form (see
+    compact_dataset.py), for clients that search locally. The ETag is the
+    data version, so revalidating an unchanged copy costs a 304.
+
+    Query string: ?dataset=rcfe (optional)
+    """
+    try:
+        partition, = selected_partitions(request.args.get('dataset'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    entry = compact_entry(partition)
+    return send_variant(entry['variants'], entry['etag'], 'application/json', 'no-cache')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: data is loaded and caches are warm."""
+    if not ready or not partitions:
+        return jsonify({'ready': False}), 503
+    loaded = {
+        name: {'facilities': len(p['facilities_data']), 'geocoded': len(p['geocode_cache'])}
+        for name, p in partitions.items()
+    }
+    return jsonify({
+        'ready': True,
+        'facilities': sum(counts['facilities'] for counts in loaded.values()),
+        'geocoded': sum(counts['geocoded'] for counts in loaded.values()),
+        'warm_searches': len(search_cache),
+        'datasets': loaded
+    })
+
+def is_admin_request():
+    """
+    Whether a request may use the /admin endpoints: it carries the
+    ADMIN_TOKEN bearer token. Without a configured token every admin request
+    is refused - behind a local reverse proxy all requests come from
+    127.0.0.1, so the client address proves nothing.
+    """
+    if not ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f'Bearer {ADMIN_TOKEN}'.encode())
+
+@app.route('/admin/delta', methods=['POST'])
+def admin_delta():
+    """
+    Apply a changelog of facility upserts and deletes (see facility_delta.py)
+    without reloading. Admin requests only (see is_admin_request).
+
+    Request body: the changelog JSON written by update_data.py
+    Response: {"success": true, "applied": true, "dataset": "rcfe",
+        "version": "...", "upserts": 31, "deletes": 2, "elapsed_ms": 4.2}
+    (409 when the changelog was made against other data - reload instead)
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+
+    try:
+        summary = apply_delta(request.get_json(silent=True))
+    except DeltaConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, **summary})
+
 if __name__ == '__main__':
     # Load data on startup
-    load_data()
+    start_app()
 
     # Run Flask app
     print("\nStarting RCFE Proximity Search App...")
-    print("Access the app at: http://localhost:5001")
+    print(f"Access the app at: http://localhost:{PORT}")
     print("Press Ctrl+C to stop\n")
 
     # Use debug mode only in development (not in production)
-    import os
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
-    app.run(debug=debug_mode, host='0.0.0.0', port=5001)
+    app.run(debug=debug_mode, host='0.0.0.0', port=PORT)
 else:
     # When running via WSGI (PythonAnywhere, Heroku, etc.)
-    load_data()
+    start_app()
@@ -0,0 +1,407 @@
+"""
+RCFE Citation Store
+Extracts visits and citations from crawled CCLD transparency pages (see
+facility_crawler.py) into an indexed SQLite database that app.py queries.
+
+Pages are not parsed into a DOM. The detail page parser cuts out the visit
+list and matches the report links in it (checked against the saved
+citations_page.html). The report parser strips tags once and scans the text
+for "Type A/B ... section" deficiency blocks; its patterns follow the field
+labels of the LIC 809 report forms and the section format of the CSV's
+Citation Numbers column, and `check` runs it over every crawled report page
+to confirm them. Pages are parsed across a process pool; only facilities
+whose crawl changed since the last import are re-parsed.
+
+Tables:
+    visits(facility_number, report_index, visit_date, report_url)
+    citations(facility_number, report_index, seq, visit_date, citation_type,
+              deficiency_code, narrative, citation_number)
+
+Usage:
+    python citation_store.py import [--workers N]   # from data/crawl/
+    python citation_store.py parse citations_page.html
+    python citation_store.py parse --report data/crawl/pages/ab/abcdef....html
+    python citation_store.py check   # the report parser over every crawled report
+    python citation_store.py show 015601302
+"""
+
+import argparse
+import html
+import json
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import facility_crawler
+import jsonl_journal
+
+# Configuration
+CITATIONS_DB = Path('data/citations.sqlite3')
+NARRATIVE_MAX_CHARS = 4000
+
+# Detail page: facility number, the "All Visits" tab, and each visit's report link/date
+_FACILITY_NUMBER = re.compile(r'Facility&nbsp;Number:</td>\s*<td[^>]*>\s*(\d+)')
+_VISIT_LINK = re.compile(
+    r'FacilityReports\?facNum=(\d+)&(?:amp;)?inx=(\d+)"[^>]*>\s*(?:<[^>]+>\s*)*'
+    r'(\d{1,2}/\d{1,2}/\d{4})')
+
+# Report pages: a visit date, then deficiency blocks ("Type B ... 87303(a) ...").
+# Sections are written as in the CSV's Citation Numbers ("87555(b)(7)",
+# "87468.2(a)(4)"); Health and Safety Code sections as "1569.31".
+_TAGS = re.compile(r'<(script|style)\b.*?</\1>|<[^>]+>', re.S | re.I)
+_SPACE = re.compile(r'\s+')
+_REPORT_DATE = re.compile(r'VISIT DATE:?\s*(\d{1,2}/\d{1,2}/\d{4})', re.I)
+_DEFICIENCY = re.compile(
+    r'\bType\s+([AB])\b.{0,300}?\b((?:8[0-9]{4}(?:\.\d+)?|1569\.\d+)(?:\s*\([a-z0-9]+\))*)', re.I | re.S)
+_CITATION_NUMBER = re.compile(r'\bCitation\s*(?:Number|No\.?|#)\s*:?\s*([0-9][0-9A-Z-]*)', re.I)
+_REPORT_FOOTER = re.compile(r"\b(?:SUPERVISOR'S NAME|LICENSING EVALUATOR NAME)\b", re.I)
+
+def _iso_date(date_str):
+    """'05/22/2025' -> '2025-05-22' (None if unparseable)."""
+    try:
+        return datetime.strptime(date_str, '%m/%d/%Y').date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def parse_detail_page(page_html):
+    """
+    Extract the facility number and visit list from a facility detail page.
+
+    Returns:
+        dict with 'facility_number' (or None) and 'visits', a list of
+        {'report_index', 'visit_date'} sorted by report index
+    """
+    match = _FACILITY_NUMBER.search(page_html)
+    facility_number = match.group(1) if match else None
+
+    # Only the All Visits tab; the other tabs repeat the same links
+    start = page_html.find('id="allvisits"')
+    if start < 0:
+        start = 0
+    end = page_html.find('</table>', start)
+    section = page_html[start:end if end > 0 else None]
+
+    visits = {}
+    for fac_num, inx, date_str in _VISIT_LINK.findall(section):
+        if facility_number is None:
+            facility_number = fac_num
+        visits[int(inx)] = _iso_date(date_str)
+
+    return {
+        'facility_number': facility_number,
+        'visits': [
+            {'report_index': inx, 'visit_date': visit_date}
+            for inx, visit_date in sorted(visits.items())
+        ],
+    }
+
+def page_text(page_html):
+    """Visible text of a page, whitespace-collapsed."""
+    return _SPACE.sub(' ', html.unescape(_TAGS.sub(' ', page_html))).strip()
+
+def parse_report_page(page_html):
+    """
+    Extract citations from a facility report (evaluation or complaint) page.
+
+    No report page could be downloaded when this was written; run `check`
+    after a crawl to see how many real pages it reads.
+
+    Returns:
+        dict with 'visit_date' (or None) and 'citations', a list of
+        {'citation_number' (or None), 'citation_type', 'deficiency_code',
+        'narrative'}
+    """
+    text = page_text(page_html)
+    date_match = _REPORT_DATE.search(text)
+    footer = _REPORT_FOOTER.search(text)
+    text_end = footer.start() if footer else len(text)
+
+    citations = []
+    matches = list(_DEFICIENCY.finditer(text, 0, text_end))
+    for i, match in enumerate(matches):
+        block = text[match.end():matches[i + 1].start() if i + 1 < len(matches) else text_end]
+        number = _CITATION_NUMBER.search(block)
+        if number:
+            block = block[:number.start()] + block[number.end():]
+        citations.append({
+            'citation_number': number.group(1) if number else None,
+            'citation_type': match.group(1).upper(),
+            'deficiency_code': _SPACE.sub('', match.group(2)),
+            'narrative': _SPACE.sub(' ', block).strip(' :-')[:NARRATIVE_MAX_CHARS],
+        })
+
+    return {'visit_date': _iso_date(date_match.group(1)) if date_match else None,
+            'citations': citations}
+
+def parse_facility(job):
+    """
+    Parse one facility's crawled pages (runs in a worker process).
+
+    Args:
+        job: (facility number, detail page path or None, {report index: (url, page path)})
+
+    Returns:
+        (facility number, visit rows, citation rows, report pages parsed,
+        report pages with neither a visit date nor citations)
+    """
+    facility_number, detail_path, reports = job
+    visit_dates = {}
+    if detail_path:
+        with open(detail_path, 'r', encoding='utf-8', errors='replace') as f:
+            detail = parse_detail_page(f.read())
+        visit_dates = {v['report_index']: v['visit_date'] for v in detail['visits']}
+
+    visits = []
+    citations = []
+    parsed = empty = 0
+    for inx in sorted(set(visit_dates) | set(reports)):
+        url, path = reports.get(inx, (None, None))
+        visit_date = visit_dates.get(inx)
+        if path:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                report = parse_report_page(f.read())
+            parsed += 1
+            empty += not report['visit_date'] and not report['citations']
+            visit_date = visit_date or report['visit_date']
+            if inx not in visit_dates and not visit_date and not report['citations']:
+                continue  # A probed index with no report behind it
+            for seq, citation in enumerate(report['citations']):
+                citations.append((facility_number, inx, seq, visit_date,
+                                  citation['citation_type'], citation['deficiency_code'],
+                                  citation['narrative'], citation['citation_number']))
+        visits.append((facility_number, inx, visit_date, url))
+    return facility_number, visits, citations, parsed, empty
+
+def connect(db_path=CITATIONS_DB):
+    """Open the citation database, creating the schema if needed."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS visits (
+            facility_number TEXT NOT NULL,
+            report_index INTEGER NOT NULL,
+            visit_date TEXT,
+            report_url TEXT,
+            PRIMARY KEY (facility_number, report_index)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS citations (
+            facility_number TEXT NOT NULL,
+            report_index INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            visit_date TEXT,
+            citation_type TEXT,
+            deficiency_code TEXT,
+            narrative TEXT,
+            citation_number TEXT,
+            PRIMARY KEY (facility_number, report_index, seq)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_citations_code ON citations(deficiency_code);
+        CREATE TABLE IF NOT EXISTS parsed (
+            facility_number TEXT PRIMARY KEY,
+            crawled TEXT,
+            parsed TEXT
+        ) WITHOUT ROWID;
+    ''')
+
+    # Databases from before citation numbers: add the column and re-parse everything
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(citations)')]
+    if 'citation_number' not in columns:
+        with conn:
+            conn.execute('ALTER TABLE citations ADD COLUMN citation_number TEXT')
+            conn.execute('DELETE FROM parsed')
+    return conn
+
+def _crawl_jobs(conn, force=False):
+    """Build parse jobs for crawled facilities that changed since the last import."""
+    state = jsonl_journal.load(facility_crawler.STATE_FILE)
+    index = jsonl_journal.load(facility_crawler.INDEX_FILE)
+    parsed = dict(conn.execute('SELECT facility_number, crawled FROM parsed'))
+
+    def path_for(url):
+        entry = index.get(url)
+        if not entry:
+            return None
+        path = facility_crawler.page_path(entry['sha256'])
+        return str(path) if path.exists() else None
+
+    jobs = {}
+    for fac_num, info in state.items():
+        if not force and parsed.get(fac_num) == info.get('crawled'):
+            continue
+        detail_path = path_for(info['detail']) if info.get('detail') else None
+        if info.get('detail') and not detail_path:
+            continue
+        reports = {}
+        indexes = info.get('report_indexes')
+        for i, url in enumerate(info.get('reports', [])):
+            if indexes is not None:
+                inx = indexes[i]
+            else:
+                match = re.search(r'inx=(\d+)', url)  # Crawls from before report_indexes
+                if not match:
+                    continue
+                inx = int(match.group(1))
+            reports[inx] = (url, path_for(url))
+        jobs[fac_num] = ((fac_num, detail_path, reports), info.get('crawled'))
+    return jobs
+
+def import_crawl(db_path=CITATIONS_DB, workers=None, force=False):
+    """
+    Parse crawled pages into the citation database.
+
+    Args:
+        db_path: Citation database
+        workers: Parser processes (default: one per CPU)
+        force: Re-parse every facility, not just re-crawled ones
+
+    Returns:
+        dict with 'facilities', 'visits', 'citations', 'reports' and
+        'empty_reports' (report pages the parser found nothing in) counts
+        and 'seconds'
+    """
+    start = time.monotonic()
+    conn = connect(db_path)
+    jobs = _crawl_jobs(conn, force)
+    summary = {'facilities': 0, 'visits': 0, 'citations': 0, 'reports': 0, 'empty_reports': 0}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(parse_facility, [job for job, _ in jobs.values()], chunksize=16)
+        with conn:
+            for facility_number, visits, citations, parsed, empty in results:
+                conn.execute('DELETE FROM visits WHERE facility_number = ?', (facility_number,))
+                conn.execute('DELETE FROM citations WHERE facility_number = ?', (facility_number,))
+                conn.executemany('INSERT INTO visits VALUES (?, ?, ?, ?)', visits)
+                conn.executemany(
+                    'INSERT INTO citations (facility_number, report_index, seq, visit_date, '
+                    'citation_type, deficiency_code, narrative, citation_number) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', citations)
+                conn.execute('INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)', (
+                    facility_number, jobs[facility_number][1],
+                    datetime.now().isoformat(timespec='seconds')))
+                summary['facilities'] += 1
+                summary['visits'] += len(visits)
+                summary['citations'] += len(citations)
+                summary['reports'] += parsed
+                summary['empty_reports'] += empty
+    conn.close()
+    summary['seconds'] = round(time.monotonic() - start, 2)
+    return summary
+
+def check_reports(show=5):
+    """
+    Run the report parser over every crawled report page.
+
+    Args:
+        show: How many pages the parser found nothing in to list
+
+    Returns:
+        dict with 'pages', 'dated', 'with_citations' and 'citations' counts
+        and 'empty' (paths of up to `show` pages with neither a visit date
+        nor a citation)
+    """
+    state = jsonl_journal.load(facility_crawler.STATE_FILE)
+    index = jsonl_journal.load(facility_crawler.INDEX_FILE)
+    result = {'pages': 0, 'dated': 0, 'with_citations': 0, 'citations': 0, 'empty': []}
+    for info in state.values():
+        for url in info.get('reports', []):
+            entry = index.get(url)
+            path = facility_crawler.page_path(entry['sha256']) if entry else None
+            if path is None or not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                report = parse_report_page(f.read())
+            result['pages'] += 1
+            result['dated'] += bool(report['visit_date'])
+            result['with_citations'] += bool(report['citations'])
+            result['citations'] += len(report['citations'])
+            if not report['visit_date'] and not report['citations'] and len(result['empty']) < show:
+                result['empty'].append(str(path))
+    return result
+
+def facility_citations(facility_number, db_path=CITATIONS_DB):
+    """
+    Visits and citations for one facility, newest visit first.
+
+    Returns:
+        dict with 'visits' (each with its 'citations'), or None if the
+        database doesn't exist yet
+    """
+    if not Path(db_path).exists():
+        return None
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        visits = {
+            inx: {'report_index': inx, 'visit_date': visit_date, 'report_url': url, 'citations': []}
+            for inx, visit_date, url in conn.execute(
+                'SELECT report_index, visit_date, report_url FROM visits '
+                'WHERE facility_number = ?', (facility_number,))
+        }
+        rows = conn.execute(
+            'SELECT report_index, citation_number, citation_type, deficiency_code, narrative '
+            'FROM citations WHERE facility_number = ? ORDER BY report_index, seq',
+            (facility_number,))
+        for inx, number, citation_type, code, narrative in rows:
+            visit = visits.setdefault(inx, {'report_index': inx, 'visit_date': None,
+                                            'report_url': None, 'citations': []})
+            visit['citations'].append({'number': number, 'type': citation_type, 'code': code,
+                                       'narrative': narrative})
+    except sqlite3.OperationalError:
+        return None  # Database from before citation numbers; the next import upgrades it
+    finally:
+        conn.close()
+
+    ordered = sorted(visits.values(), key=lambda v: v['visit_date'] or '', reverse=True)
+    return {'facility_number': facility_number, 'visits': ordered}
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='RCFE citation store')
+    parser.add_argument('--db', default=str(CITATIONS_DB), help='SQLite database path')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help='Parse crawled pages into the database')
+    p_import.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    p_import.add_argument('--force', action='store_true', help='Re-parse every facility')
+
+    p_parse = sub.add_parser('parse', help='Parse a saved page and print the result')
+    p_parse.add_argument('html_file')
+    p_parse.add_argument('--report', action='store_true', help='Parse as a report page')
+
+    p_check = sub.add_parser('check', help='Run the report parser over every crawled report page')
+    p_check.add_argument('--show', type=int, default=5, help='Empty pages to list')
+
+    p_show = sub.add_parser('show', help="Show a facility's visits and citations")
+    p_show.add_argument('facility_number')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        summary = import_crawl(args.db, args.workers, args.force)
+        print(f"Parsed {summary['facilities']:,} facilities in {summary['seconds']}s: "
+              f"{summary['visits']:,} visits, {summary['citations']:,} citations")
+        if summary['reports'] and summary['empty_reports'] == summary['reports']:
+            # Probed indexes without a report are empty too, but never all of them
+            print(f"Warning: no visit date or citation found in any of {summary['reports']:,} "
+                  f"report pages - the report layout may have changed; check one with "
+                  f"'citation_store.py parse --report <page>'")
+    elif args.command == 'parse':
+        with open(args.html_file, 'r', encoding='utf-8', errors='replace') as f:
+            page_html = f.read()
+        result = parse_report_page(page_html) if args.report else parse_detail_page(page_html)
+        print(json.dumps(result, indent=2))
+    elif args.command == 'check':
+        result = check_reports(args.show)
+        print(f"{result['pages']:,} report pages: {result['dated']:,} with a visit date, "
+              f"{result['with_citations']:,} with citations ({result['citations']:,} in all)")
+        for path in result['empty']:
+            print(f'  nothing found in {path}')
+    elif args.command == 'show':
+        result = facility_citations(args.facility_number, args.db)
+        print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
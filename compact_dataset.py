@@ -0,0 +1,106 @@
+"""
+RCFE Compact Dataset
+The searchable facilities of a dataset in a compact, columnar form, which
+the browser downloads once, keeps in IndexedDB and searches locally (see
+static/js/offline.js). The app serves it at /api/data, precompressed and
+revalidated by ETag; /api/data-version tells clients when to fetch it again.
+
+Layout (JSON):
+    format    layout version (FORMAT)
+    dataset   dataset name (see datasets.py)
+    version   SHA-256 of the CSV it was built from
+    count     number of facilities
+    scale     lat/lon are integers: degrees * scale
+    columns   field -> list of values, one per facility, in search order;
+              dictionary-encoded fields are {"values": [...], "codes": [...]}
+              where codes index values
+
+Decoding row i of every column gives the same dict /api/search returns
+(without 'distance'), except that coordinates are rounded to 1/scale
+degrees (about a meter).
+
+Usage:
+    from compact_dataset import encode
+    compact = encode(facilities, 'rcfe', version)
+"""
+
+# Configuration
+FORMAT = 1
+COORD_SCALE = 100000   # 5 decimal places
+COORD_FIELDS = ('lat', 'lon')
+TEXT_FIELDS = ('facility_number', 'name', 'address', 'phone')
+INTEGER_FIELDS = ('capacity', 'total_citations')
+BOOLEAN_FIELDS = ('ownership_change',)
+DICTIONARY_FIELDS = ('city', 'state', 'zip', 'county', 'status', 'shade', 'dataset')
+
+def dictionary_encode(values):
+    """
+    Replace repeated strings with indexes into a table of distinct values.
+
+    Returns:
+        {'values': [...distinct values, most common first], 'codes': [...]}
+    """
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    # Most common values get the smallest codes (the fewest digits)
+    distinct = sorted(counts, key=lambda value: (-counts[value], value))
+    codes = {value: code for code, value in enumerate(distinct)}
+    return {'values': distinct, 'codes': [codes[value] for value in values]}
+
+def encode(facilities, dataset_name, version):
+    """
+    Encode search result dicts column by column.
+
+    Args:
+        facilities: Result dicts, as in a search table (see app.search_result)
+        dataset_name: Dataset the facilities belong to
+        version: SHA-256 of the CSV they came from
+
+    Returns:
+        Compact dataset dict (see the module docstring)
+    """
+    columns = {}
+    for field in COORD_FIELDS:
+        columns[field] = [round(f[field] * COORD_SCALE) for f in facilities]
+    for field in TEXT_FIELDS:
+        columns[field] = [f[field] for f in facilities]
+    for field in INTEGER_FIELDS:
+        columns[field] = [f[field] for f in facilities]
+    for field in BOOLEAN_FIELDS:
+        columns[field] = [1 if f[field] else 0 for f in facilities]
+    for field in DICTIONARY_FIELDS:
+        columns[field] = dictionary_encode([f[field] for f in facilities])
+
+    return {
+        'format': FORMAT,
+        'dataset': dataset_name,
+        'version': version,
+        'count': len(facilities),
+        'scale': COORD_SCALE,
+        'columns': columns,
+    }
+
+def decode(compact):
+    """
+    Rebuild the result dicts (the Python twin of offline.js's decoder).
+
+    Returns:
+        List of facility dicts
+    """
+    columns = compact['columns']
+    scale = compact['scale']
+    facilities = []
+    for i in range(compact['count']):
+        facility = {}
+        for field in COORD_FIELDS:
+            facility[field] = columns[field][i] / scale
+        for field in TEXT_FIELDS + INTEGER_FIELDS:
+            facility[field] = columns[field][i]
+        for field in BOOLEAN_FIELDS:
+            facility[field] = bool(columns[field][i])
+        for field in DICTIONARY_FIELDS:
+            column = columns[field]
+            facility[field] = column['values'][column['codes'][i]]
+        facilities.append(facility)
+    return facilities
@@ -0,0 +1,124 @@
+"""
+CCLD Dataset Registry
+The CCLD facility categories this project can serve, each handled as its
+own partition: separate download, geocode cache, history, statistics and
+(in the app) search indexes.
+
+The RCFE dataset keeps the original file locations; the other categories
+live under data/<name>/. Which partitions the app loads comes from the
+DATASETS environment variable (comma-separated, default "rcfe"), so memory
+grows only with what is enabled.
+
+Usage:
+    import datasets
+    dataset = datasets.get('adult_residential')
+    dataset.csv_file, dataset.geocode_journal
+    datasets.enabled()          # Datasets named in $DATASETS
+
+    python rcfe_scraper.py --dataset adult_residential
+    python geocode_facilities.py --dataset adult_residential
+    python update_data.py --dataset adult_residential
+    DATASETS=rcfe,adult_residential python app.py
+"""
+
+import os
+from collections import namedtuple
+from pathlib import Path
+
+# Configuration
+DATA_DIR = Path('data')
+DEFAULT = 'rcfe'
+ENABLED = os.environ.get('DATASETS', DEFAULT)
+
+Dataset = namedtuple('Dataset', [
+    'name',             # Partition key, used in URLs and file names
+    'label',            # Human-readable category name
+    'link_texts',       # Texts of the category's link on the CCLD download page
+    'export_url',       # Direct CSV export URL (from $<NAME>_EXPORT_URL), if known
+    'data_dir',         # Download directory (download state, timestamped files)
+    'csv_file',         # Latest download
+    'previous_csv',     # Data as of the last completed update
+    'download_pattern', # Timestamped downloads pruned after each update
+    'geocode_journal',  # Geocode cache (see geocode_store.py)
+    'legacy_cache',     # Pre-journal JSON geocode cache, if any
+    'failures_file',    # Negative cache of addresses that failed to geocode
+    'report_file',      # Active facilities missing from the map
+    'stats_dir',        # Per-run statistics and latest.json
+    'history_db',       # Field-level history of every run (see history_store.py)
+])
+
+def _dataset(name, label, link_texts):
+    """A dataset stored under data/<name>/."""
+    data_dir = DATA_DIR / name
+    return Dataset(
+        name=name,
+        label=label,
+        link_texts=link_texts,
+        export_url=os.environ.get(f'{name.upper()}_EXPORT_URL'),
+        data_dir=data_dir,
+        csv_file=data_dir / f'{name}_data_latest.csv',
+        previous_csv=data_dir / f'{name}_data_previous.csv',
+        download_pattern=f'{name}_data_2*.csv',
+        geocode_journal=data_dir / 'geocode_cache.jsonl',
+        legacy_cache=None,
+        failures_file=data_dir / 'geocode_failures.jsonl',
+        report_file=data_dir / 'not_geocoded.txt',
+        stats_dir=data_dir / 'stats',
+        history_db=data_dir / 'history.sqlite3',
+    )
+
+DATASETS = {
+    # The original dataset, at the paths it has always used
+    'rcfe': Dataset(
+        name='rcfe',
+        label='Elderly Assisted Living (RCFE)',
+        link_texts=('Elderly Assisted Living', 'Residential Care Facilities for the Elderly', 'RCFE'),
+        export_url=os.environ.get('RCFE_EXPORT_URL'),
+        data_dir=DATA_DIR,
+        csv_file=DATA_DIR / 'rcfe_data_latest.csv',
+        previous_csv=DATA_DIR / 'rcfe_data_previous.csv',
+        download_pattern='rcfe_data_2*.csv',
+        geocode_journal=Path('geocode_cache.jsonl'),
+        legacy_cache=Path('geocode_cache.json'),
+        failures_file=Path('geocode_failures.jsonl'),
+        report_file=Path('static/not_geocoded.txt'),
+        stats_dir=DATA_DIR / 'stats',
+        history_db=DATA_DIR / 'history.sqlite3',
+    ),
+    'adult_residential': _dataset(
+        'adult_residential', 'Adult Residential Facilities',
+        ('Adult Residential', 'ARF')),
+    'child_care': _dataset(
+        'child_care', 'Child Care Centers',
+        ('Child Care Center', 'Child Care')),
+    'home_care': _dataset(
+        'home_care', 'Home Care Organizations',
+        ('Home Care Organization', 'Home Care')),
+}
+
+def get(name=None):
+    """
+    Look up a dataset by name (the default dataset if None).
+
+    Raises:
+        ValueError: Unknown dataset
+    """
+    name = name or DEFAULT
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset '{name}' (known: {', '.join(DATASETS)})")
+    return DATASETS[name]
+
+def enabled(names=ENABLED):
+    """
+    The datasets to serve.
+
+    Args:
+        names: Comma-separated dataset names (default: $DATASETS)
+
+    Returns:
+        List of Dataset, in the order given
+
+    Raises:
+        ValueError: Unknown dataset
+    """
+    return [get(name.strip()) for name in names.split(',') if name.strip()]
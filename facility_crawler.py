@@ -0,0 +1,308 @@
+"""
+RCFE Facility Page Crawler
+Fetches facility detail pages and their inspection/citation report pages
+from the CCLD transparency site.
+
+Only facilities whose citations or visit dates changed since the last crawl
+are fetched. Pages are stored once per content hash under data/crawl/pages/,
+with a URL index so unchanged pages are revalidated with conditional
+requests. Progress is journaled per facility (jsonl_journal.py), so an interrupted crawl
+resumes where it stopped.
+
+Usage:
+    python facility_crawler.py [--csv data/rcfe_data_latest.csv] [--workers 4] [--rate 1]
+
+The public detail page (carefacilitysearch/?Rewrite=FacDetail/...) is an
+Angular shell with no report links; the browser builds them from API calls
+(see sample_facility_page.html). So unless a detail URL whose response
+lists the reports is configured, the report indexes are derived from the
+CSV's visit counts and probed, skipping indexes that don't exist.
+
+Base URLs can be pointed at a local server, e.g. one serving the saved
+(browser-rendered) citations_page.html:
+    python facility_crawler.py \\
+        --detail-url 'http://localhost:8000/citations_page.html?fac={facility}' \\
+        --report-url 'http://localhost:8000/report.html?fac={facility}&inx={index}'
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+import jsonl_journal
+
+# Configuration
+CSV_FILE = Path('data/rcfe_data_latest.csv')
+CRAWL_DIR = Path('data/crawl')
+PAGES_DIR = CRAWL_DIR / 'pages'
+STATE_FILE = CRAWL_DIR / 'crawl_state.jsonl'  # facility -> signature, pages
+INDEX_FILE = CRAWL_DIR / 'page_index.jsonl'   # URL -> content hash, ETag, Last-Modified
+DETAIL_URL = os.environ.get('CCLD_DETAIL_URL')  # Page listing the reports (optional, see above)
+REPORT_URL = os.environ.get(
+    'CCLD_REPORT_URL',
+    'https://www.ccld.dss.ca.gov/transparencyapi/api/FacilityReports?facNum={facility}&inx={index}')
+WORKERS = 4
+REQUESTS_PER_SECOND = 1.0  # Per host
+USER_AGENT = 'RCFE-Finder/1.0'
+REPORT_INDEX_SLACK = 2  # Report indexes probed beyond the visit count (numbering has gaps)
+
+# A facility is re-crawled when any of these change
+SIGNATURE_FIELDS = ('Citation Numbers', 'Last Visit Date', 'All Visit Dates', 'POC Dates')
+
+_REPORT_LINK = re.compile(r'FacilityReports\?facNum=(\d+)&(?:amp;)?inx=(\d+)')
+_REPORT_INDEX = re.compile(r'"inx"\s*:\s*(\d+)')  # JSON visit lists (ReportPage.inx)
+
+class HostRateLimiter:
+    """Spaces out requests to each host by a minimum interval."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to this URL's host is allowed."""
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def facility_signature(row):
+    """Hash of the fields whose change means the facility's pages changed."""
+    text = '|'.join(str(row.get(field, '')).strip() for field in SIGNATURE_FIELDS)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def page_path(content_hash, pages_dir=PAGES_DIR):
+    """Where the page with this content hash is stored."""
+    return Path(pages_dir) / content_hash[:2] / f'{content_hash}.html'
+
+def read_page(url, index, pages_dir=PAGES_DIR):
+    """Return the cached HTML for a URL, or None if it hasn't been fetched."""
+    entry = index.get(url)
+    if not entry:
+        return None
+    path = page_path(entry['sha256'], pages_dir)
+    if not path.exists():
+        return None
+    return path.read_text(encoding='utf-8', errors='replace')
+
+def fetch_page(url, index, limiter, pages_dir=PAGES_DIR):
+    """
+    Fetch a page, revalidating the cached copy if there is one.
+
+    Args:
+        url: Page URL
+        index: URL index (read only; the caller journals the returned entry)
+        limiter: HostRateLimiter shared by all workers
+        pages_dir: Content-addressed page store
+
+    Returns:
+        (html, index entry, changed) tuple
+    """
+    entry = index.get(url)
+    headers = {'User-Agent': USER_AGENT}
+    if entry and page_path(entry['sha256'], pages_dir).exists():
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    limiter.wait(url)
+    response = requests.get(url, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return read_page(url, index, pages_dir), entry, False
+    response.raise_for_status()
+
+    content = response.content
+    content_hash = hashlib.sha256(content).hexdigest()
+    path = page_path(content_hash, pages_dir)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + f'.{threading.get_ident()}.tmp')
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    new_entry = {
+        'sha256': content_hash,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched': datetime.now().isoformat(timespec='seconds'),
+    }
+    changed = not entry or entry.get('sha256') != content_hash
+    return content.decode(response.encoding or 'utf-8', errors='replace'), new_entry, changed
+
+def visit_count(row):
+    """Number of visits the CSV records for a facility."""
+    try:
+        total = int(row.get('Total Visits') or 0)
+    except ValueError:
+        total = 0
+    dates = [d for d in str(row.get('All Visit Dates', '')).split(',') if d.strip()]
+    return max(total, len(dates))
+
+def report_indexes(facility_number, detail_text):
+    """
+    Report indexes listed on a facility detail page: links in a rendered
+    page, or "inx" values in the JSON the site's app loads. The unrendered
+    app shell lists none.
+    """
+    indexes = {
+        int(inx) for fac, inx in _REPORT_LINK.findall(detail_text)
+        if fac.lstrip('0') == facility_number.lstrip('0')
+    }
+    if not indexes:
+        indexes = {int(inx) for inx in _REPORT_INDEX.findall(detail_text)}
+    return sorted(indexes)
+
+def crawl_facility(facility_number, visits, index, limiter, detail_url=DETAIL_URL,
+                   report_url=REPORT_URL, pages_dir=PAGES_DIR):
+    """
+    Fetch one facility's report pages (and its detail page, if configured).
+
+    Args:
+        facility_number: Facility number
+        visits: Visit count from the CSV (see visit_count)
+        index: URL index
+        limiter: HostRateLimiter shared by all workers
+        detail_url: Detail page URL template, or None
+        report_url: Report page URL template
+        pages_dir: Content-addressed page store
+
+    Returns:
+        (pages, index updates, changed page count) tuple; pages has 'detail'
+        (None when no detail page was fetched), 'reports' (URLs) and
+        'report_indexes' (their indexes)
+    """
+    updates = {}
+    changed = 0
+    pages = {'detail': None, 'reports': [], 'report_indexes': []}
+
+    indexes = []
+    if detail_url:
+        url = detail_url.format(facility=facility_number)
+        html, entry, was_changed = fetch_page(url, index, limiter, pages_dir)
+        updates[url] = entry
+        changed += was_changed
+        pages['detail'] = url
+        indexes = report_indexes(facility_number, html or '')
+    if not indexes:
+        # No list of reports: probe the indexes the visit count implies
+        indexes = range(visits + REPORT_INDEX_SLACK) if visits else []
+
+    for inx in indexes:
+        url = report_url.format(facility=facility_number, index=inx)
+        try:
+            _, entry, was_changed = fetch_page(url, index, limiter, pages_dir)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                continue  # No report at this index
+            raise
+        updates[url] = entry
+        changed += was_changed
+        pages['reports'].append(url)
+        pages['report_indexes'].append(inx)
+    return pages, updates, changed
+
+def main():
+    """Crawl pages for facilities whose citations or visits changed."""
+    parser = argparse.ArgumentParser(description='Crawl CCLD facility detail and report pages')
+    parser.add_argument('--csv', default=str(CSV_FILE), help='Facility data CSV')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Concurrent requests')
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND,
+                        help='Maximum requests per second per host')
+    parser.add_argument('--detail-url', default=DETAIL_URL,
+                        help='Detail page URL template ({facility}) whose response lists the '
+                             'reports; env CCLD_DETAIL_URL (default: derive from visit counts)')
+    parser.add_argument('--report-url', default=REPORT_URL,
+                        help='Report page URL template ({facility}, {index}); env CCLD_REPORT_URL')
+    parser.add_argument('--limit', type=int, help='Crawl at most this many facilities')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-crawl every facility, not just changed ones')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RCFE Facility Page Crawler")
+    print("=" * 60)
+
+    PAGES_DIR.mkdir(parents=True, exist_ok=True)
+    state = jsonl_journal.load(STATE_FILE)
+    index = jsonl_journal.load(INDEX_FILE)
+
+    # Only facilities whose citations or visit dates changed
+    todo = {}
+    total = 0
+    with open(args.csv, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            total += 1
+            fac_num = str(row['Facility Number'])
+            signature = facility_signature(row)
+            previous = state.get(fac_num)
+            if args.force or not previous or previous.get('signature') != signature:
+                todo[fac_num] = (signature, visit_count(row))
+
+    print(f"Facilities in data: {total:,}")
+    print(f"Unchanged since last crawl: {total - len(todo):,}")
+    if args.limit:
+        todo = dict(list(todo.items())[:args.limit])
+    print(f"To crawl: {len(todo):,} ({args.workers} workers, {args.rate} req/s per host)")
+
+    limiter = HostRateLimiter(args.rate)
+    start = time.monotonic()
+    crawled = failed = pages_fetched = pages_changed = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(crawl_facility, fac_num, todo[fac_num][1], index, limiter,
+                        args.detail_url, args.report_url): fac_num
+            for fac_num in todo
+        }
+        for future in as_completed(futures):
+            fac_num = futures[future]
+            try:
+                pages, updates, changed = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  ✗ {fac_num}: {e}")
+                continue
+
+            # Journal the pages first, then mark the facility done
+            jsonl_journal.append_entries(updates, INDEX_FILE)
+            index.update(updates)
+            jsonl_journal.append_entries({fac_num: {
+                'signature': todo[fac_num][0],
+                'crawled': datetime.now().isoformat(timespec='seconds'),
+                **pages
+            }}, STATE_FILE)
+
+            crawled += 1
+            pages_fetched += len(updates)
+            pages_changed += changed
+            if crawled % 50 == 0:
+                print(f"  Progress: {crawled}/{len(todo)} facilities, {pages_fetched} pages")
+
+    jsonl_journal.compact_if_needed(STATE_FILE)
+    jsonl_journal.compact_if_needed(INDEX_FILE)
+
+    print()
+    print("=" * 60)
+    print(f"Crawled {crawled:,} facilities ({failed:,} failed) in {time.monotonic() - start:.1f}s")
+    print(f"Pages fetched: {pages_fetched:,} ({pages_changed:,} new or changed)")
+    if failed:
+        print("Rerun to retry the failed facilities")
+    print("=" * 60)
+
+if __name__ == '__main__':
+    main()
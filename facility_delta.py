@@ -0,0 +1,166 @@
+"""
+RCFE Data Deltas
+Changelogs of per-facility upserts and deletes between two downloads, so a
+running app can patch its data in place instead of reloading everything.
+
+A changelog is one JSON file:
+    dataset   dataset name (see datasets.py)
+    base      SHA-256 of the CSV it applies to
+    version   SHA-256 of the CSV it turns that into
+    upserts   full CSV rows of new and changed facilities
+    deletes   numbers of facilities no longer in the data
+    geocodes  facility number -> geocode cache entry (null: no coordinates any
+              more), for the upserts and every facility re-geocoded or
+              dropped from the cache since the previous changelog
+
+Next to the changelogs, geocodes_base.json keeps the geocode cache as of the
+latest one, which the next changelog's geocodes are diffed against.
+
+The update pipeline writes one per run to <data dir>/deltas/. The app takes
+it from POST /admin/delta or, with DELTA_POLL_SECONDS set, by watching that
+directory. The base/version hashes make applying a changelog twice, or to
+the wrong data, a no-op or an error rather than silent corruption.
+
+Usage:
+    from facility_delta import build_delta, write_delta, read_deltas
+    delta = build_delta('rcfe', previous_rows, current_rows, geocode_cache,
+                        base=file_sha256(previous_csv), version=file_sha256(current_csv))
+    path = write_delta(delta, delta_dir(dataset))
+"""
+
+import json
+import os
+from datetime import datetime
+
+from rcfe_scraper import file_sha256
+
+# Configuration
+DELTA_DIR_NAME = 'deltas'
+KEEP_DELTAS = 30   # Changelogs kept per dataset (older ones are pruned)
+GEOCODE_BASE_NAME = 'geocodes_base.json'  # Geocode cache as of the latest changelog
+
+def delta_dir(dataset):
+    """Changelog directory of a dataset (a Dataset from datasets.py)."""
+    return dataset.data_dir / DELTA_DIR_NAME
+
+def build_delta(dataset_name, previous, current, geocode_cache, base, version,
+                previous_geocodes=None):
+    """
+    Diff two downloads field by field.
+
+    Args:
+        dataset_name: Dataset the data belongs to
+        previous: dict of facility number -> CSV row, as the app has it
+        current: dict of facility number -> CSV row, as downloaded
+        geocode_cache: Geocode cache after this run's geocoding
+        base: SHA-256 of the previous CSV
+        version: SHA-256 of the current CSV
+        previous_geocodes: Geocode cache as the app has it (see
+                           load_geocode_base), or None if unknown
+
+    Returns:
+        Changelog dict. 'geocodes' maps facility number to coordinates, or
+        to None when the facility has none any more; it covers every upsert
+        plus every cache entry that changed since previous_geocodes.
+    """
+    upserts = [row for number, row in current.items() if previous.get(number) != row]
+    geocodes = {}
+    if previous_geocodes is not None:
+        # Re-geocoded (or dropped) without a change to the CSV row
+        for number in set(previous_geocodes) | set(geocode_cache):
+            if previous_geocodes.get(number) != geocode_cache.get(number):
+                geocodes[number] = geocode_cache.get(number)
+    for row in upserts:
+        number = row['Facility Number']
+        geocodes[number] = geocode_cache.get(number)
+
+    return {
+        'dataset': dataset_name,
+        'base': base,
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'upserts': upserts,
+        'deletes': sorted(set(previous) - set(current)),
+        'geocodes': geocodes,
+    }
+
+def write_delta(delta, directory, keep=KEEP_DELTAS):
+    """
+    Atomically save a changelog and prune old ones.
+
+    Files are named by creation time, so sorting by name replays them in order.
+
+    Returns:
+        Path of the saved changelog
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"delta_{datetime.now():%Y%m%d_%H%M%S}.json"
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(delta, f)
+    os.replace(tmp_path, path)
+
+    for old in sorted(directory.glob('delta_*.json'))[:-keep]:
+        old.unlink()
+    return path
+
+def save_geocode_base(geocode_cache, version, directory):
+    """
+    Save the geocode cache a changelog brings the app to, for the next
+    changelog to diff against.
+
+    Args:
+        geocode_cache: Geocode cache after this run
+        version: SHA-256 of the CSV the changelog brings the app to
+        directory: Changelog directory
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / GEOCODE_BASE_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'geocodes': geocode_cache}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_geocode_base(directory, version):
+    """
+    The geocode cache the app has at a given data version.
+
+    Args:
+        directory: Changelog directory
+        version: SHA-256 of the CSV the app has loaded (the next changelog's base)
+
+    Returns:
+        Geocode cache dict, or None if no saved cache matches that version
+    """
+    try:
+        with open(directory / GEOCODE_BASE_NAME, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return saved['geocodes'] if saved.get('version') == version else None
+
+def read_deltas(directory, seen):
+    """
+    Changelogs in a directory that haven't been read yet, oldest first.
+
+    Args:
+        directory: Changelog directory
+        seen: Set of file names already read; updated in place
+
+    Returns:
+        List of (path, changelog dict) tuples
+    """
+    if not directory.exists():
+        return []
+
+    deltas = []
+    for path in sorted(directory.glob('delta_*.json')):
+        if path.name in seen:
+            continue
+        seen.add(path.name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                deltas.append((path, json.load(f)))
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read changelog {path}: {e}")
+    return deltas
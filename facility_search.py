@@ -0,0 +1,389 @@
+"""
+RCFE Proximity Search Engine
+Nearest-facility search for one or many origins at once.
+
+The searchable facilities are laid out once (when the app loads its data) as
+parallel coordinate arrays plus the prebuilt result dicts. A search computes
+the distances from a block of origins to every facility in one pass - a
+vectorized distance matrix when numpy is installed, a plain loop otherwise -
+and keeps the nearest `limit` per origin. A coarse grid of the facilities
+limits each pass to the cells the search radius can reach, so a search costs
+what is nearby rather than the size of the table.
+
+patch_table() applies a few changed facilities to a copy of a table without
+rebuilding it; removed facilities are left as None (and out of the grid)
+until the next full build.
+
+Usage:
+    from facility_search import build_table, nearest
+    table = build_table(facility_dicts)     # each with 'lat', 'lon'
+    nearest(table, [(34.05, -118.24), (37.77, -122.42)], radius_miles=25)
+    nearest_across([rcfe_table, arf_table], origins, radius_miles=25)
+"""
+
+import heapq
+from bisect import insort
+from itertools import chain
+from math import radians, degrees, floor, sin, cos, asin, sqrt
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python path gives the same results
+    np = None
+
+# Configuration
+EARTH_RADIUS_MILES = 3959
+BLOCK_SIZE = 64        # Origins per distance-matrix block (bounds memory use)
+DEFAULT_LIMIT = 50
+GRID_DEGREES = 0.25    # Grid cell size (about 17 miles north-south)
+
+def build_table(facilities):
+    """
+    Prepare facilities for searching.
+
+    Args:
+        facilities: List of result dicts, each with 'facility_number', 'lat'
+                    and 'lon'
+
+    Returns:
+        Table dict for nearest()
+    """
+    table = {
+        'facilities': facilities,
+        'positions': {f['facility_number']: i for i, f in enumerate(facilities)},
+        'lat': [radians(f['lat']) for f in facilities],
+        'lon': [radians(f['lon']) for f in facilities],
+    }
+    table['cos_lat'] = [cos(lat) for lat in table['lat']]
+
+    # Facility indexes (ascending) per grid cell
+    grid = {}
+    for i, facility in enumerate(facilities):
+        grid.setdefault(_grid_cell(facility['lat'], facility['lon']), []).append(i)
+    table['grid'] = grid
+    _add_arrays(table)
+    return table
+
+def _add_arrays(table):
+    """Add the numpy copies of the coordinate lists (when numpy is installed)."""
+    if np is not None:
+        table['np_lat'] = np.array(table['lat'])
+        table['np_lon'] = np.array(table['lon'])
+        table['np_cos_lat'] = np.array(table['cos_lat'])
+
+def patch_table(table, upserts=(), deletes=()):
+    """
+    A copy of a table with some facilities replaced, added or removed.
+
+    The table passed in is left untouched, so searches running on it finish
+    unaffected; only the grid cells that change are copied.
+
+    Args:
+        table: Table from build_table() (or patch_table())
+        upserts: Result dicts to add, or to replace the facility with the
+                 same 'facility_number'
+        deletes: Facility numbers to remove
+
+    Returns:
+        New table dict
+    """
+    facilities = list(table['facilities'])
+    positions = dict(table['positions'])
+    lats, lons, cos_lats = list(table['lat']), list(table['lon']), list(table['cos_lat'])
+    grid = dict(table['grid'])
+    copied = set()
+
+    def cell_indexes(cell):
+        if cell not in copied:
+            grid[cell] = list(grid.get(cell, ()))
+            copied.add(cell)
+        return grid[cell]
+
+    for number in deletes:
+        i = positions.pop(number, None)
+        if i is not None:
+            old = facilities[i]
+            cell_indexes(_grid_cell(old['lat'], old['lon'])).remove(i)
+            facilities[i] = None
+
+    for facility in upserts:
+        i = positions.get(facility['facility_number'])
+        cell = _grid_cell(facility['lat'], facility['lon'])
+        lat = radians(facility['lat'])
+        if i is None:
+            # New facilities go last, so every grid cell stays sorted
+            i = len(facilities)
+            positions[facility['facility_number']] = i
+            facilities.append(facility)
+            lats.append(lat)
+            lons.append(radians(facility['lon']))
+            cos_lats.append(cos(lat))
+            cell_indexes(cell).append(i)
+            continue
+
+        old = facilities[i]
+        old_cell = _grid_cell(old['lat'], old['lon'])
+        if old_cell != cell:
+            cell_indexes(old_cell).remove(i)
+            insort(cell_indexes(cell), i)
+        facilities[i] = facility
+        lats[i] = lat
+        lons[i] = radians(facility['lon'])
+        cos_lats[i] = cos(lat)
+
+    patched = {
+        'facilities': facilities,
+        'positions': positions,
+        'lat': lats,
+        'lon': lons,
+        'cos_lat': cos_lats,
+        'grid': grid,
+    }
+    _add_arrays(patched)
+    return patched
+
+def _grid_cell(lat, lon):
+    """Grid cell of a point in degrees."""
+    return floor(lat / GRID_DEGREES), floor(lon / GRID_DEGREES)
+
+def grid_candidates(table, origin, radius_miles):
+    """
+    Facilities in the grid cells a search circle can reach.
+
+    Uses the exact latitude/longitude bounding box of the circle, so every
+    facility within radius_miles is included.
+
+    Args:
+        table: Table from build_table()
+        origin: (lat, lon) in degrees
+        radius_miles: Search radius
+
+    Returns:
+        Sorted list of facility indexes, or None when the box covers a pole
+        or the antimeridian (search everything)
+    """
+    lat, lon = origin
+    angle = radius_miles / EARTH_RADIUS_MILES
+    lat_delta = degrees(angle) + 1e-9
+    if abs(lat) + lat_delta >= 90:
+        return None
+    ratio = sin(min(angle, 1.5)) / cos(radians(lat))
+    if ratio >= 1:
+        return None
+    lon_delta = degrees(asin(ratio)) + 1e-9
+    if abs(lon) + lon_delta >= 180:
+        return None
+
+    low = _grid_cell(lat - lat_delta, lon - lon_delta)
+    high = _grid_cell(lat + lat_delta, lon + lon_delta)
+    candidates = []
+    for (row, col), indexes in table['grid'].items():
+        if low[0] <= row <= high[0] and low[1] <= col <= high[1]:
+            candidates.extend(indexes)
+    candidates.sort()
+    return candidates
+
+def facility_filter(filters=None):
+    """
+    Build a predicate for the search filters.
+
+    Args:
+        filters: Optional dict with 'statuses' and 'counties' (lists),
+                 'min_capacity', 'max_capacity', 'max_citations' and 'name'
+                 (substring)
+
+    Returns:
+        Function taking a facility dict, or None when nothing is filtered
+    """
+    if not filters:
+        return None
+
+    statuses = set(filters['statuses']) if filters.get('statuses') else None
+    counties = {c.upper() for c in filters['counties']} if filters.get('counties') else None
+    min_capacity = filters.get('min_capacity')
+    max_capacity = filters.get('max_capacity')
+    max_citations = filters.get('max_citations')
+    name = (filters.get('name') or '').lower()
+
+    def matches(facility):
+        return (
+            (statuses is None or facility['status'] in statuses) and
+            (counties is None or facility['county'].upper() in counties) and
+            (min_capacity is None or facility['capacity'] >= min_capacity) and
+            (max_capacity is None or facility['capacity'] <= max_capacity) and
+            (max_citations is None or facility['total_citations'] <= max_citations) and
+            (not name or name in facility['name'].lower())
+        )
+    return matches
+
+def _nearest_python(table, origins, radius_miles, limit, matches):
+    """
+    Per-origin (distance, index) lists using the plain haversine loop.
+
+    Distances are ranked after rounding to 0.01 mile, ties in facility order
+    (the order the original single-origin search returned).
+    """
+    facilities = table['facilities']
+    lats, lons, cos_lats = table['lat'], table['lon'], table['cos_lat']
+    results = []
+    for origin_lat, origin_lon in origins:
+        lat1, lon1 = radians(origin_lat), radians(origin_lon)
+        cos_lat1 = cos(lat1)
+        candidates = grid_candidates(table, (origin_lat, origin_lon), radius_miles)
+        if candidates is None:
+            candidates = [i for i, facility in enumerate(facilities) if facility is not None]
+        hits = []
+        for i in candidates:
+            if matches is not None and not matches(facilities[i]):
+                continue
+            a = sin((lats[i] - lat1) / 2) ** 2 + cos_lat1 * cos_lats[i] * sin((lons[i] - lon1) / 2) ** 2
+            distance = EARTH_RADIUS_MILES * 2 * asin(sqrt(a))
+            if distance <= radius_miles:
+                hits.append((round(distance, 2), i))
+        results.append(heapq.nsmallest(limit, hits))
+    return results
+
+def _nearest_numpy(table, origins, radius_miles, limit, matches):
+    """
+    Per-origin (distance, index) lists from blocked distance matrices.
+
+    Each block's matrix covers only the grid cells its origins can reach.
+    """
+    facilities = table['facilities']
+    results = []
+    for start in range(0, len(origins), BLOCK_SIZE):
+        block_origins = origins[start:start + BLOCK_SIZE]
+
+        # Columns: the union of the block's grid candidates
+        columns = []
+        for origin in block_origins:
+            candidates = grid_candidates(table, origin, radius_miles)
+            if candidates is None:
+                columns = None
+                break
+            columns.extend(candidates)
+        if columns is None:
+            columns = np.array([i for i, facility in enumerate(facilities) if facility is not None],
+                               dtype=np.int64)
+        else:
+            columns = np.unique(np.array(columns, dtype=np.int64))
+        if matches is not None:
+            columns = columns[np.array([matches(facilities[i]) for i in columns], dtype=bool)]
+        if len(columns) == 0:
+            results.extend([] for _ in block_origins)
+            continue
+
+        lats = table['np_lat'][columns]
+        lons = table['np_lon'][columns]
+        cos_lats = table['np_cos_lat'][columns]
+        block = np.radians(np.array(block_origins, dtype=float))
+        lat1 = block[:, 0:1]
+        lon1 = block[:, 1:2]
+        a = (np.sin((lats - lat1) / 2) ** 2 +
+             np.cos(lat1) * cos_lats * np.sin((lons - lon1) / 2) ** 2)
+        distances = EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(a))
+        distances[distances > radius_miles] = np.inf
+        distances = np.round(distances, 2)
+
+        k = min(limit, distances.shape[1])
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        for row, indexes in zip(distances, top):
+            # Same order as the Python path: by distance, then facility order
+            # (columns are ascending, so column order is facility order)
+            indexes = indexes[np.lexsort((indexes, row[indexes]))]
+            results.append([(float(row[i]), int(columns[i])) for i in indexes if row[i] != np.inf])
+    return results
+
+def nearest(table, origins, radius_miles, limit=DEFAULT_LIMIT, filters=None):
+    """
+    Nearest facilities for each origin.
+
+    Args:
+        table: Table from build_table()
+        origins: List of (lat, lon) tuples
+        radius_miles: Search radius shared by all origins
+        limit: Results per origin
+        filters: Optional filters (see facility_filter)
+
+    Returns:
+        List (one per origin) of facility dicts with 'distance', nearest first
+    """
+    if not origins or not table['facilities']:
+        return [[] for _ in origins]
+
+    matches = facility_filter(filters)
+    if np is not None:
+        hits = _nearest_numpy(table, origins, radius_miles, limit, matches)
+    else:
+        hits = _nearest_python(table, origins, radius_miles, limit, matches)
+
+    facilities = table['facilities']
+    return [
+        [dict(facilities[i], distance=distance) for distance, i in origin_hits]
+        for origin_hits in hits
+    ]
+
+def nearest_across(tables, origins, radius_miles, limit=DEFAULT_LIMIT, filters=None):
+    """
+    Nearest facilities for each origin over several tables (one per dataset).
+
+    Each table is searched on its own and the results merged by distance,
+    ties in table order.
+
+    Args:
+        tables: List of tables from build_table()
+        origins, radius_miles, limit, filters: As for nearest()
+
+    Returns:
+        List (one per origin) of facility dicts with 'distance', nearest first
+    """
+    if len(tables) == 1:
+        return nearest(tables[0], origins, radius_miles, limit, filters)
+
+    per_table = [nearest(table, origins, radius_miles, limit, filters) for table in tables]
+    return [
+        heapq.nsmallest(limit, chain(*results), key=lambda facility: facility['distance'])
+        for results in zip(*per_table)
+    ]
+
+def iter_matches(table, filters=None, origin=None, radius_miles=None):
+    """
+    Every facility passing the filters, one at a time, in table order.
+
+    Nothing is collected or sorted, so memory use doesn't grow with the
+    number of matches (for exports of a county or the whole state).
+
+    Args:
+        table: Table from build_table()
+        filters: Optional filters (see facility_filter)
+        origin: Optional (lat, lon); limits to radius_miles and adds 'distance'
+        radius_miles: Search radius around origin
+
+    Yields:
+        Facility dicts (with 'distance' when an origin is given)
+    """
+    matches = facility_filter(filters)
+    facilities = table['facilities']
+    indexes = range(len(facilities))
+    if origin is not None:
+        lats, lons, cos_lats = table['lat'], table['lon'], table['cos_lat']
+        lat1, lon1 = radians(origin[0]), radians(origin[1])
+        cos_lat1 = cos(lat1)
+        if radius_miles is not None:
+            candidates = grid_candidates(table, origin, radius_miles)
+            if candidates is not None:
+                indexes = candidates
+
+    for i in indexes:
+        facility = facilities[i]
+        if facility is None:
+            continue
+        if matches is not None and not matches(facility):
+            continue
+        if origin is None:
+            yield facility
+            continue
+        a = sin((lats[i] - lat1) / 2) ** 2 + cos_lat1 * cos_lats[i] * sin((lons[i] - lon1) / 2) ** 2
+        distance = EARTH_RADIUS_MILES * 2 * asin(sqrt(a))
+        if radius_miles is None or distance <= radius_miles:
+            yield dict(facility, distance=round(distance, 2))
@@ -0,0 +1,325 @@
+"""
+RCFE Statistics Engine
+Computes dataset statistics in a single streaming pass over the facilities:
+counts and geocoding coverage by status, county, regional office and
+facility type, plus capacity and citation distributions.
+
+Also builds the rollup cube: counts, beds, citations and substantiated
+allegations for every combination of county, regional office, facility
+type and status, with "*" standing for all values of a dimension, so any
+slice is a handful of dictionary lookups.
+
+Usage:
+    from facility_stats import compute_stats, save_stats
+    stats = compute_stats(rows, geocode_cache)
+    save_stats(stats)    # data/stats/stats_<run>.json and data/stats/latest.json
+
+    cube = compute_cube(rows)
+    cube_slice(cube, ['county'], {'status': 'ON PROBATION'})
+"""
+
+import json
+import os
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+
+# Configuration
+STATS_DIR = Path('data/stats')
+LATEST_STATS_FILE = STATS_DIR / 'latest.json'
+ACTIVE_STATUSES = ('LICENSED', 'PENDING', 'ON PROBATION')
+
+# (label, upper bound inclusive); the last bucket is open-ended
+CAPACITY_BUCKETS = [('1-6', 6), ('7-15', 15), ('16-49', 49), ('50-99', 99), ('100+', None)]
+CITATION_BUCKETS = [('0', 0), ('1-5', 5), ('6-15', 15), ('16+', None)]
+
+# Rollup cube dimensions (name -> CSV column) and measures
+CUBE_DIMENSIONS = {
+    'county': 'County Name',
+    'regional_office': 'Regional Office',
+    'facility_type': 'Facility Type',
+    'status': 'Facility Status',
+}
+CUBE_MEASURES = ('facilities', 'capacity', 'citations', 'substantiated_allegations')
+ALL = '*'
+
+def _bucket(value, buckets):
+    """Return the label of the bucket a value falls into."""
+    for label, upper in buckets:
+        if upper is None or value <= upper:
+            return label
+    return buckets[-1][0]
+
+def _count_citations(citations_str):
+    """Count the comma-separated entries in a Citation Numbers field."""
+    return len([c for c in (citations_str or '').split(',') if c.strip()])
+
+def _new_group():
+    """Empty counters for one slice of the data."""
+    return {'total': 0, 'active': 0, 'geocoded': 0, 'by_status': {}}
+
+def _add_to_group(group, status, is_active, is_geocoded):
+    """Count one facility into a slice."""
+    group['total'] += 1
+    group['by_status'][status] = group['by_status'].get(status, 0) + 1
+    if is_active:
+        group['active'] += 1
+        if is_geocoded:
+            group['geocoded'] += 1
+
+def _finish_group(group):
+    """Add the geocoding coverage ratio for active facilities."""
+    group['coverage'] = round(group['geocoded'] / group['active'], 4) if group['active'] else None
+    return group
+
+def compute_stats(rows, cache):
+    """
+    Compute all statistics in one pass.
+
+    Args:
+        rows: Iterable of facility dicts (can be a streaming csv.DictReader)
+        cache: Geocode cache (facility number -> coordinates)
+
+    Returns:
+        dict with the flat README totals ('total', 'licensed', ...,
+        'total_geocoded', 'date') plus 'by_status', 'by_county',
+        'by_regional_office', 'by_facility_type', 'capacity' and 'citations'
+    """
+    overall = _new_group()
+    dimensions = {
+        'by_county': ('County Name', {}),
+        'by_regional_office': ('Regional Office', {}),
+        'by_facility_type': ('Facility Type', {}),
+    }
+    geocoded_by_status = {}
+    capacity_hist = {label: 0 for label, _ in CAPACITY_BUCKETS}
+    citation_hist = {label: 0 for label, _ in CITATION_BUCKETS}
+    capacity_total = 0
+    active_capacity = 0
+    citation_total = 0
+
+    for row in rows:
+        status = row.get('Facility Status', '') or 'UNKNOWN'
+        is_active = status in ACTIVE_STATUSES
+        is_geocoded = str(row.get('Facility Number', '')) in cache
+
+        _add_to_group(overall, status, is_active, is_geocoded)
+        if is_active and is_geocoded:
+            geocoded_by_status[status] = geocoded_by_status.get(status, 0) + 1
+        for field, groups in dimensions.values():
+            key = (row.get(field) or 'UNKNOWN').strip()
+            if key not in groups:
+                groups[key] = _new_group()
+            _add_to_group(groups[key], status, is_active, is_geocoded)
+
+        if not is_active:
+            continue
+
+        try:
+            capacity = int(row.get('Facility Capacity', '0'))
+        except (ValueError, TypeError):
+            capacity = 0
+        capacity_hist[_bucket(capacity, CAPACITY_BUCKETS)] += 1
+        capacity_total += capacity
+        active_capacity += 1
+
+        citations = _count_citations(row.get('Citation Numbers', ''))
+        citation_hist[_bucket(citations, CITATION_BUCKETS)] += 1
+        citation_total += citations
+
+    by_status = overall['by_status']
+    stats = {
+        'total': overall['total'],
+        'licensed': by_status.get('LICENSED', 0),
+        'pending': by_status.get('PENDING', 0),
+        'probation': by_status.get('ON PROBATION', 0),
+        'closed': by_status.get('CLOSED', 0),
+        'active_total': overall['active'],
+        'licensed_geocoded': geocoded_by_status.get('LICENSED', 0),
+        'pending_geocoded': geocoded_by_status.get('PENDING', 0),
+        'probation_geocoded': geocoded_by_status.get('ON PROBATION', 0),
+        'total_geocoded': overall['geocoded'],
+        'coverage': _finish_group(overall)['coverage'],
+        'date': datetime.now().strftime('%B %d, %Y'),
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'by_status': {
+            status: {'total': count, 'geocoded': geocoded_by_status.get(status, 0)}
+            for status, count in sorted(by_status.items())
+        },
+        'capacity': {
+            'histogram': capacity_hist,
+            'total_beds': capacity_total,
+            'mean': round(capacity_total / active_capacity, 2) if active_capacity else None
+        },
+        'citations': {
+            'histogram': citation_hist,
+            'total': citation_total,
+            'mean': round(citation_total / active_capacity, 2) if active_capacity else None
+        },
+    }
+    for name, (_, groups) in dimensions.items():
+        stats[name] = {key: _finish_group(group) for key, group in sorted(groups.items())}
+    return stats
+
+def save_stats(stats, stats_dir=STATS_DIR):
+    """
+    Persist a run's statistics.
+
+    Writes stats_<timestamp>.json and atomically replaces latest.json.
+
+    Returns:
+        Path of the per-run file
+    """
+    stats_dir = Path(stats_dir)
+    stats_dir.mkdir(parents=True, exist_ok=True)
+    run_file = stats_dir / f"stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(run_file, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+    latest = stats_dir / LATEST_STATS_FILE.name
+    tmp_path = latest.with_name(latest.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, latest)
+    return run_file
+
+def _to_int(value):
+    """Parse a count column, treating blanks and junk as 0."""
+    try:
+        return int(value or 0)
+    except (ValueError, TypeError):
+        return 0
+
+_ROLLUPS = list(product((False, True), repeat=len(CUBE_DIMENSIONS)))
+
+def _cube_entry(row):
+    """A facility's dimension values and measures."""
+    key = tuple((row.get(field) or 'UNKNOWN').strip().upper()
+                for field in CUBE_DIMENSIONS.values())
+    measures = (
+        1,
+        _to_int(row.get('Facility Capacity')),
+        _count_citations(row.get('Citation Numbers', '')),
+        _to_int(row.get('Substantiated Allegations')),
+    )
+    return key, measures
+
+def compute_cube(rows):
+    """
+    Precompute the rollup cube in one pass.
+
+    Every facility is added to the cell for its own county, office, type and
+    status and to each rollup of those (16 cells), so slicing never scans.
+
+    Args:
+        rows: Iterable of facility dicts
+
+    Returns:
+        dict with 'cells' ((county, office, type, status) -> measure list in
+        CUBE_MEASURES order) and 'values' (dimension -> sorted values)
+    """
+    cells = {}
+    values = {name: set() for name in CUBE_DIMENSIONS}
+
+    for row in rows:
+        key, measures = _cube_entry(row)
+        for name, value in zip(CUBE_DIMENSIONS, key):
+            values[name].add(value)
+
+        for rolled in _ROLLUPS:
+            cell_key = tuple(ALL if r else v for r, v in zip(rolled, key))
+            cell = cells.get(cell_key)
+            if cell is None:
+                cells[cell_key] = list(measures)
+            else:
+                for i, measure in enumerate(measures):
+                    cell[i] += measure
+
+    return {'cells': cells, 'values': {name: sorted(v) for name, v in values.items()}}
+
+def patch_cube(cube, removed_rows, added_rows):
+    """
+    A copy of the cube with some facilities' contributions swapped.
+
+    The cube passed in is left untouched; only the touched cells are copied.
+
+    Args:
+        cube: Cube from compute_cube() (or patch_cube())
+        removed_rows: Old versions of changed facilities, and deleted ones
+        added_rows: New versions of changed facilities, and new ones
+
+    Returns:
+        New cube dict
+    """
+    cells = dict(cube['cells'])
+    copied = set()
+    for rows, sign in ((removed_rows, -1), (added_rows, 1)):
+        for row in rows:
+            key, measures = _cube_entry(row)
+            for rolled in _ROLLUPS:
+                cell_key = tuple(ALL if r else v for r, v in zip(rolled, key))
+                if cell_key not in copied:
+                    cells[cell_key] = list(cells.get(cell_key, (0,) * len(measures)))
+                    copied.add(cell_key)
+                cell = cells[cell_key]
+                for i, measure in enumerate(measures):
+                    cell[i] += sign * measure
+
+    # Drop cells (and dimension values) no facility is in any more
+    for cell_key in copied:
+        if cells[cell_key][0] == 0:
+            del cells[cell_key]
+    values = {name: set() for name in CUBE_DIMENSIONS}
+    for cell_key in cells:
+        for name, value in zip(CUBE_DIMENSIONS, cell_key):
+            if value != ALL:
+                values[name].add(value)
+    return {'cells': cells, 'values': {name: sorted(v) for name, v in values.items()}}
+
+def _cell_measures(cell):
+    """Measures of a cube cell plus the derived ratios."""
+    measures = dict(zip(CUBE_MEASURES, cell))
+    facilities, capacity, citations = cell[0], cell[1], cell[2]
+    measures['citations_per_bed'] = round(citations / capacity, 4) if capacity else None
+    measures['citations_per_facility'] = round(citations / facilities, 4) if facilities else None
+    measures['mean_capacity'] = round(capacity / facilities, 2) if facilities else None
+    return measures
+
+def cube_slice(cube, by, fixed=None):
+    """
+    One slice of the cube, grouped by up to two dimensions.
+
+    Args:
+        cube: Cube from compute_cube()
+        by: List of dimension names to group by (e.g. ['county'], or
+            ['county', 'status'] for a heatmap)
+        fixed: Optional dict of dimension name -> value for the others
+
+    Returns:
+        dict with 'rows' (one per non-empty group: the group values plus
+        measures) and 'range' (measure -> [min, max] over the rows, for
+        scaling map colors)
+
+    Raises:
+        ValueError: Unknown dimension name
+    """
+    fixed = {name: str(value).strip().upper() for name, value in (fixed or {}).items()}
+    unknown = [name for name in list(by) + list(fixed) if name not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension: {', '.join(unknown)}")
+
+    cells = cube['cells']
+    rows = []
+    for group in product(*(cube['values'][name] for name in by)):
+        chosen = dict(zip(by, group))
+        key = tuple(chosen.get(name, fixed.get(name, ALL)) for name in CUBE_DIMENSIONS)
+        cell = cells.get(key)
+        if cell is not None:
+            rows.append({**chosen, **_cell_measures(cell)})
+
+    ranges = {}
+    for measure in list(CUBE_MEASURES) + ['citations_per_bed', 'citations_per_facility',
+                                          'mean_capacity']:
+        present = [row[measure] for row in rows if row[measure] is not None]
+        ranges[measure] = [min(present), max(present)] if present else None
+    return {'rows': rows, 'range': ranges}
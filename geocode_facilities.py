@@ -3,81 +3,198 @@ RCFE Facility Geocoding Script
 Geocodes all RCFE facilities from the CSV file and saves to cache.
 Run this once before using the main app.
 
-Usage: python geocode_facilities.py
-Time: ~3-4 hours (run overnight)
+Usage: python geocode_facilities.py [--worklist FILE|-] [--backend census]
+                                    [--dataset adult_residential]
+Time: ~3-4 hours for a full run against public Nominatim (run overnight),
+minutes with the census or nominatim-local backends; incremental runs only
+touch facilities that are new, listed in the work-list, due for a retry
+after an earlier failure, or whose address no longer matches the
+fingerprint stored in the cache. Facilities at the
+same normalized address share a single request.
 """
 
+import argparse
 import csv
-import requests
-import json
-import time
-from datetime import datetime
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta
+
+import datasets
+import geocode_store
+import geocoders
+import jsonl_journal
+from address_normalize import normalize_address
 
 # Configuration
 CSV_FILE = 'data/rcfe_data_latest.csv'
-CACHE_FILE = 'geocode_cache.json'
-RATE_LIMIT_DELAY = 1.0  # Nominatim requires 1 request per second
+CACHE_FILE = geocode_store.JOURNAL_FILE
+LEGACY_CACHE_FILE = geocode_store.LEGACY_CACHE_FILE
+FAILURES_FILE = geocode_store.FAILURES_FILE
+REPORT_FILE = 'static/not_geocoded.txt'
+DEFAULT_BACKEND = os.environ.get('GEOCODER_BACKEND', 'nominatim')
+RETRY_BASE_DAYS = 1   # First retry a day after a failure...
+RETRY_MAX_DAYS = 90   # ...doubling each attempt, up to about three months
+ACTIVE_STATUSES = ['LICENSED', 'PENDING', 'ON PROBATION']
 
-def geocode_address(address, city, state, zip_code):
+def address_fingerprint(address, city, state, zip_code):
     """
-    Geocode a single address using Nominatim (OpenStreetMap).
+    Fingerprint the address a cached coordinate was geocoded from.
 
     Args:
-        address: Street address
-        city: City name
-        state: State code
-        zip_code: ZIP code
+        address, city, state, zip_code: Address components from the CSV
 
     Returns:
-        dict with 'lat' and 'lon' keys, or None if geocoding fails
+        Short hex digest that changes whenever the address changes
     """
-    # Construct full address
-    full_address = f"{address}, {city}, {state} {zip_code}, USA"
-
-    # Nominatim API endpoint
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': full_address,
-        'format': 'json',
-        'limit': 1,
-        'countrycodes': 'us'
-    }
-    headers = {
-        'User-Agent': 'RCFE-Finder/1.0'  # Required by Nominatim
-    }
+    parts = [' '.join(str(p or '').upper().split()) for p in (address, city, state, zip_code)]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
 
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+def load_worklist(path):
+    """
+    Load an explicit list of facility numbers to (re)geocode.
 
-        if response.ok and response.json():
-            data = response.json()[0]
-            return {
-                'lat': float(data['lat']),
-                'lon': float(data['lon'])
-            }
-        else:
-            return None
+    Args:
+        path: File path, or '-' to read from stdin. Either one facility
+              number per line, or a CSV with a 'Facility Number' column
+              (such as data/temp_to_geocode.csv from update_data.py).
 
-    except Exception as e:
-        print(f"  Error geocoding: {e}")
-        return None
+    Returns:
+        Set of facility number strings
+    """
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        lines = f.read().splitlines()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    if lines and 'Facility Number' in lines[0]:
+        return {row['Facility Number'].strip() for row in csv.DictReader(lines)}
+    return {line.strip() for line in lines if line.strip() and not line.startswith('#')}
 
 def load_existing_cache():
-    """Load existing geocode cache if it exists."""
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    """Load existing geocode cache if it exists (migrating a legacy JSON cache)."""
+    return geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
+
+def save_cache(updates):
+    """Append changed cache entries to the journal (None deletes an entry)."""
+    geocode_store.append_entries(updates, CACHE_FILE)
+    updates.clear()
 
-def save_cache(cache):
-    """Save geocode cache to file."""
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f, indent=2)
-    print(f"Cache saved to {CACHE_FILE}")
+def record_failure(failures, facility_num, fingerprint, reason):
+    """
+    Record a failed geocoding attempt with exponential backoff.
+
+    Args:
+        failures: Failure table (facility number -> entry), updated in place
+        facility_num: Facility Number
+        fingerprint: Address fingerprint the attempt was made for
+        reason: Short reason code ('no_match', 'missing_address')
+
+    Returns:
+        The new failure entry
+    """
+    previous = failures.get(facility_num)
+    attempts = 1
+    if previous and previous.get('fp') == fingerprint:
+        attempts = previous.get('attempts', 0) + 1
+
+    now = datetime.now()
+    delay = min(RETRY_BASE_DAYS * 2 ** (attempts - 1), RETRY_MAX_DAYS)
+    entry = {
+        'reason': reason,
+        'attempts': attempts,
+        'fp': fingerprint,
+        'last_attempt': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'next_retry': (now + timedelta(days=delay)).strftime('%Y-%m-%d %H:%M:%S')
+    }
+    failures[facility_num] = entry
+    return entry
+
+def should_retry(failure, fingerprint, now=None):
+    """True if a failed facility's address changed or its backoff expired."""
+    if failure.get('fp') != fingerprint:
+        return True
+    now = now or datetime.now()
+    return now.strftime('%Y-%m-%d %H:%M:%S') >= failure.get('next_retry', '')
+
+def write_not_geocoded_report(facilities, cache, failures, path=REPORT_FILE):
+    """
+    Write the list of active facilities that are missing from the map.
+
+    Args:
+        facilities: Facility rows from the CSV
+        cache: Geocode cache
+        failures: Failure table from the negative cache
+        path: Report file
+
+    Returns:
+        Number of facilities listed
+    """
+    missing = {status: [] for status in ACTIVE_STATUSES}
+    for row in facilities:
+        status = row.get('Facility Status', '')
+        if status in missing and str(row.get('Facility Number', '')) not in cache:
+            missing[status].append(row)
+
+    lines = ['Facilities Not Included (Could Not Be Geocoded)', '=' * 80, '']
+    for status in ACTIVE_STATUSES:
+        rows = sorted(missing[status], key=lambda r: r.get('Facility Name', ''))
+        lines.append(f'{status} Facilities Not Geocoded: {len(rows)}')
+        lines.append('-' * 80)
+        for row in rows:
+            facility_num = str(row.get('Facility Number', ''))
+            lines.append(f"{facility_num} | {row.get('Facility Name', '')}")
+            address = row.get('Facility Address', '').strip()
+            if address:
+                lines.append(f"  Address: {address}, {row.get('Facility City', '').strip()}, "
+                             f"{row.get('Facility State', '').strip()} {row.get('Facility Zip', '').strip()}")
+            lines.append(f"  Capacity: {row.get('Facility Capacity', '')}")
+            failure = failures.get(facility_num)
+            if failure:
+                lines.append(f"  Reason: {failure['reason']} ({failure['attempts']} attempt(s), "
+                             f"next retry {failure['next_retry'][:10]})")
+            else:
+                lines.append('  Reason: not attempted yet')
+            lines.append('')
+        lines.extend(['', ''])
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines).rstrip('\n') + '\n')
+    return sum(len(rows) for rows in missing.values())
+
+def use_dataset(dataset):
+    """Point the script's files at a dataset's partition (see datasets.py)."""
+    global CSV_FILE, CACHE_FILE, LEGACY_CACHE_FILE, FAILURES_FILE, REPORT_FILE
+    CSV_FILE = str(dataset.csv_file)
+    CACHE_FILE = dataset.geocode_journal
+    LEGACY_CACHE_FILE = dataset.legacy_cache
+    FAILURES_FILE = dataset.failures_file
+    REPORT_FILE = str(dataset.report_file)
 
 def main():
     """Main geocoding process."""
+    parser = argparse.ArgumentParser(description='Geocode RCFE facilities into the cache')
+    parser.add_argument('--dataset', choices=sorted(datasets.DATASETS),
+                        help='CCLD facility category to geocode (default: rcfe)')
+    parser.add_argument('--csv', help=f'Facility CSV to read (default: {CSV_FILE})')
+    parser.add_argument('--worklist', help="Facility numbers to (re)geocode: a file, or '-' for stdin")
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=sorted(geocoders.BACKENDS),
+                        help='Geocoding provider (default: $GEOCODER_BACKEND or nominatim)')
+    parser.add_argument('--base-url', default=os.environ.get('GEOCODER_BASE_URL'),
+                        help="Override the provider's base URL (e.g. a local stand-in)")
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Concurrent requests for nominatim-local')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Retry previously failed addresses even if their backoff has not expired')
+    parser.add_argument('--report-only', action='store_true',
+                        help=f'Only regenerate {REPORT_FILE} from the cache and failure log')
+    args = parser.parse_args()
+    if args.dataset:
+        use_dataset(datasets.get(args.dataset))
+    args.csv = args.csv or CSV_FILE
+
     print("=" * 70)
     print("RCFE Facility Geocoding Script")
     print("=" * 70)
@@ -85,9 +202,9 @@ def main():
     print()
 
     # Load CSV data
-    print(f"Loading data from {CSV_FILE}...")
+    print(f"Loading data from {args.csv}...")
     facilities = []
-    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+    with open(args.csv, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         facilities = list(reader)
 
@@ -99,6 +216,20 @@ def main():
     cache = load_existing_cache()
     already_cached = len(cache)
     print(f"Found {already_cached} facilities already geocoded in cache")
+
+    # Load the negative cache of addresses that failed before
+    failures = jsonl_journal.load(FAILURES_FILE)
+    print(f"Found {len(failures)} facilities in the failure log")
+
+    if args.report_only:
+        count = write_not_geocoded_report(facilities, cache, failures, REPORT_FILE)
+        print(f"Wrote {count} facilities to {REPORT_FILE}")
+        return
+
+    worklist = None
+    if args.worklist:
+        worklist = load_worklist(args.worklist)
+        print(f"Work-list: {len(worklist)} facilities to (re)geocode")
     print()
 
     # Statistics
@@ -108,55 +239,149 @@ def main():
 
     # Process each facility
     print("Starting geocoding process...")
-    print("Progress will be saved every 100 facilities")
+    print("Progress is saved after every batch")
     print("-" * 70)
 
+    stale_count = 0
+    outside_worklist = 0
+    backoff_count = 0
+    unavailable_count = 0
+    pending = {}          # Cache changes not yet written to the journal
+    pending_failures = {}  # Failure log changes not yet written
+    now = datetime.now()
+
+    # Pass 1: decide what needs geocoding, grouped by normalized address.
+    # Fresh cache entries seed the address table so new facilities at an
+    # already-geocoded address cost no request at all.
+    known_addresses = {}  # normalized address -> {'lat', 'lon'}
+    to_geocode = {}       # normalized address -> [(facility_num, fingerprint, row)]
     for row in facilities:
         facility_num = str(row.get('Facility Number', ''))
 
-        # Skip if already in cache
-        if facility_num in cache:
-            skipped_count += 1
-            continue
-
         # Get address components
         address = row.get('Facility Address', '').strip()
         city = row.get('Facility City', '').strip()
         state = row.get('Facility State', '').strip()
         zip_code = row.get('Facility Zip', '').strip()
+        fingerprint = address_fingerprint(address, city, state, zip_code)
+        address_key = normalize_address(address, city, state, zip_code)
+
+        cached = cache.get(facility_num)
+        if cached is not None:
+            if 'fp' not in cached and (worklist is None or facility_num not in worklist):
+                # Entry predates fingerprints: adopt the current address
+                cached['fp'] = fingerprint
+                pending[facility_num] = cached
+            if cached.get('fp') == fingerprint:
+                known_addresses.setdefault(address_key, {'lat': cached['lat'], 'lon': cached['lon']})
+                skipped_count += 1
+                continue
+            # Address changed since this entry was geocoded
+            stale_count += 1
+            del cache[facility_num]
+            pending[facility_num] = None
+            geocoded_count -= 1
+            print(f"Address changed for {facility_num}, re-geocoding")
+        elif worklist is not None and facility_num not in worklist:
+            # Incremental runs only geocode what the work-list asks for,
+            # plus earlier failures whose backoff has run out
+            failure = failures.get(facility_num)
+            if not failure or not should_retry(failure, fingerprint, now):
+                outside_worklist += 1
+                continue
+
+        # Skip addresses that failed recently and haven't changed since
+        failure = failures.get(facility_num)
+        if failure and not args.retry_failed and not should_retry(failure, fingerprint, now):
+            backoff_count += 1
+            continue
 
         # Skip if missing critical address components
         if not address or not city or not state:
             print(f"Skipping {facility_num}: Missing address components")
             failed_count += 1
+            pending_failures[facility_num] = record_failure(
+                failures, facility_num, fingerprint, 'missing_address')
             continue
 
-        # Geocode the facility
-        result = geocode_address(address, city, state, zip_code)
+        to_geocode.setdefault(address_key, []).append((facility_num, fingerprint, row))
 
-        if result:
-            cache[facility_num] = result
-            geocoded_count += 1
+    pending_facilities = sum(len(group) for group in to_geocode.values())
+    print(f"{pending_facilities} facilities to geocode at {len(to_geocode)} unique addresses")
 
-            # Progress indicator
-            if geocoded_count % 10 == 0:
-                progress = (geocoded_count / total_facilities) * 100
-                print(f"Progress: {geocoded_count}/{total_facilities} ({progress:.1f}%) - "
-                      f"Last: {city}, CA")
-        else:
-            failed_count += 1
-            print(f"Failed to geocode {facility_num}: {address}, {city}, {state}")
+    # Pass 2: one lookup per unique address, shared by every facility there
+    geocode_batch, default_url, batch_size = geocoders.BACKENDS[args.backend]
+    base_url = args.base_url or default_url
+    print(f"Geocoding backend: {args.backend} ({base_url})")
 
-        # Save checkpoint every 100 facilities
-        if (geocoded_count + failed_count) % 100 == 0:
-            save_cache(cache)
-            print(f"Checkpoint: Cache saved ({geocoded_count} geocoded, {failed_count} failed)")
+    # Addresses already geocoded for another facility need no lookup
+    shared = [key for key in to_geocode if key in known_addresses]
+    shared_count = sum(len(to_geocode[key]) for key in shared)
+    lookups = [key for key in to_geocode if key not in known_addresses]
+    batches = [shared] + [lookups[i:i + batch_size] for i in range(0, len(lookups), batch_size)]
 
-        # Rate limiting (Nominatim requires 1 request/second)
-        time.sleep(RATE_LIMIT_DELAY)
+    for batch in batches:
+        addresses = {}
+        for address_key in batch:
+            if address_key not in known_addresses:
+                row = to_geocode[address_key][0][2]
+                addresses[address_key] = tuple(
+                    row.get(field, '').strip()
+                    for field in ('Facility Address', 'Facility City', 'Facility State', 'Facility Zip')
+                )
+        unavailable = set()
+        if addresses:
+            for address_key, coords in geocode_batch(addresses, base_url, args.workers).items():
+                if coords == geocoders.UNAVAILABLE:
+                    unavailable.add(address_key)
+                else:
+                    known_addresses[address_key] = coords
+
+        for address_key in batch:
+            if address_key in unavailable:
+                # The provider was down, not the address: retry next run
+                # without recording a failed attempt
+                unavailable_count += len(to_geocode[address_key])
+                continue
+            coords = known_addresses.get(address_key)
+            for facility_num, fingerprint, row in to_geocode[address_key]:
+                if not coords:
+                    failed_count += 1
+                    entry = record_failure(failures, facility_num, fingerprint, 'no_match')
+                    pending_failures[facility_num] = entry
+                    print(f"Failed to geocode {facility_num}: {row.get('Facility Address', '').strip()}, "
+                          f"{row.get('Facility City', '').strip()}, {row.get('Facility State', '').strip()} "
+                          f"(attempt {entry['attempts']})")
+                    continue
+
+                if failures.pop(facility_num, None):
+                    pending_failures[facility_num] = None
+
+                result = {'lat': coords['lat'], 'lon': coords['lon'], 'fp': fingerprint}
+                cache[facility_num] = result
+                pending[facility_num] = result
+                geocoded_count += 1
+
+                # Progress indicator
+                if geocoded_count % 10 == 0:
+                    progress = (geocoded_count / total_facilities) * 100
+                    print(f"Progress: {geocoded_count}/{total_facilities} ({progress:.1f}%) - "
+                          f"Last: {row.get('Facility City', '').strip()}, CA")
+
+        # Every batch is journaled immediately, so an interrupted run loses nothing
+        save_cache(pending)
+        jsonl_journal.append_entries(pending_failures, FAILURES_FILE)
+        pending_failures.clear()
 
     # Final save
-    save_cache(cache)
+    save_cache(pending)
+    jsonl_journal.append_entries(pending_failures, FAILURES_FILE)
+    if geocode_store.compact_if_needed(CACHE_FILE):
+        print(f"Compacted {CACHE_FILE}")
+    jsonl_journal.compact_if_needed(FAILURES_FILE)
+
+    # Regenerate the list of facilities missing from the map
+    report_count = write_not_geocoded_report(facilities, cache, failures, REPORT_FILE)
 
     # Print summary
     print()
@@ -167,9 +392,17 @@ def main():
     print(f"Successfully geocoded: {geocoded_count}")
     print(f"Failed: {failed_count}")
     print(f"Skipped (already cached): {skipped_count}")
+    print(f"Stale addresses refreshed: {stale_count}")
+    print(f"Shared an existing address result: {shared_count}")
+    print(f"Waiting to retry (backoff): {backoff_count}")
+    if unavailable_count:
+        print(f"Geocoder unavailable (retried next run): {unavailable_count}")
+    if worklist is not None:
+        print(f"Not in work-list (left for a full run): {outside_worklist}")
     print(f"Success rate: {(geocoded_count / total_facilities) * 100:.1f}%")
     print()
     print(f"Cache saved to: {CACHE_FILE}")
+    print(f"Not geocoded report: {REPORT_FILE} ({report_count} active facilities)")
     print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
 
@@ -0,0 +1,117 @@
+"""
+RCFE Geocode Cache Store
+Append-only journal for the geocode cache (facility number -> coordinates).
+
+Every update is one JSON line appended to geocode_cache.jsonl (see
+jsonl_journal.py), so saving a result costs O(1) no matter how large the
+cache is. This module adds the cache's file locations and the one-time
+migration from the old pretty-printed geocode_cache.json.
+
+Usage:
+    python geocode_store.py migrate [geocode_cache.json] [--force]   # one-time import
+    python geocode_store.py compact
+    python geocode_store.py export geocode_cache.json      # back to plain JSON
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import jsonl_journal
+
+# Configuration
+JOURNAL_FILE = Path('geocode_cache.jsonl')
+LEGACY_CACHE_FILE = Path('geocode_cache.json')
+FAILURES_FILE = Path('geocode_failures.jsonl')  # Negative cache of failed addresses
+
+def load_cache(path=JOURNAL_FILE, legacy_path=LEGACY_CACHE_FILE, migrate=True):
+    """
+    Load the geocode cache.
+
+    Args:
+        path: Journal file
+        legacy_path: Old pretty-printed JSON cache, used when no journal exists (or None)
+        migrate: Write a journal from the legacy cache if there isn't one yet
+
+    Returns:
+        dict mapping facility number to {'lat', 'lon', ...}
+    """
+    path = Path(path)
+    if path.exists():
+        return jsonl_journal.load(path)
+
+    if legacy_path is None or not Path(legacy_path).exists():
+        return {}
+
+    with open(legacy_path, 'r') as f:
+        cache = json.load(f)
+    if migrate:
+        jsonl_journal.compact(path, cache)
+        print(f"Migrated {len(cache)} entries from {legacy_path} to {path}")
+    return cache
+
+def append_entries(updates, path=JOURNAL_FILE):
+    """
+    Append cache updates to the journal and flush them to disk.
+
+    Args:
+        updates: dict of facility number -> entry (None deletes the entry)
+        path: Journal file
+    """
+    jsonl_journal.append_entries(updates, path)
+
+def compact(path=JOURNAL_FILE, cache=None):
+    """
+    Atomically rewrite the journal as a single snapshot record.
+
+    Args:
+        path: Journal file
+        cache: Current cache contents (read from the journal if omitted)
+    """
+    jsonl_journal.compact(path, cache)
+
+def compact_if_needed(path=JOURNAL_FILE):
+    """
+    Compact the journal once superseded records dominate it.
+
+    Returns:
+        True if the journal was compacted
+    """
+    return jsonl_journal.compact_if_needed(path)
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Geocode cache journal maintenance')
+    parser.add_argument('--journal', default=str(JOURNAL_FILE), help='Journal file')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_migrate = sub.add_parser('migrate', help='Import a legacy geocode_cache.json')
+    p_migrate.add_argument('json_file', nargs='?', default=str(LEGACY_CACHE_FILE))
+    p_migrate.add_argument('--force', action='store_true',
+                           help='Replace an existing journal (its entries are lost)')
+
+    sub.add_parser('compact', help='Rewrite the journal as a single snapshot')
+
+    p_export = sub.add_parser('export', help='Write the cache as plain JSON')
+    p_export.add_argument('json_file')
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        if Path(args.journal).exists() and not args.force:
+            parser.error(f'{args.journal} already exists; use --force to replace it with {args.json_file}')
+        with open(args.json_file, 'r') as f:
+            cache = json.load(f)
+        compact(args.journal, cache)
+        print(f"Migrated {len(cache)} entries from {args.json_file} to {args.journal}")
+    elif args.command == 'compact':
+        compact(args.journal)
+        print(f"Compacted {args.journal}")
+    elif args.command == 'export':
+        cache = load_cache(args.journal, migrate=False)
+        with open(args.json_file, 'w') as f:
+            json.dump(cache, f, indent=2)
+        print(f"Exported {len(cache)} entries to {args.json_file}")
+
+if __name__ == '__main__':
+    main()
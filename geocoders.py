@@ -0,0 +1,176 @@
+"""
+RCFE Geocoding Backends
+Interchangeable providers for geocode_facilities.py.
+
+Every backend has the same signature:
+
+    geocode_batch(addresses, base_url, workers) -> {key: {'lat': ..., 'lon': ...}}
+
+where `addresses` maps a caller-chosen key to an (address, city, state, zip)
+tuple. Keys the provider found no match for are simply missing from the
+result. Keys whose lookup failed for a transient reason (timeout, connection
+error, HTTP 429 or 5xx) map to UNAVAILABLE instead: they are worth retrying on
+the next run and must not count as a failed attempt.
+
+Backends:
+    nominatim        Public Nominatim, one request per second (the original behaviour)
+    nominatim-local  Self-hosted Nominatim, no rate limit, concurrent requests
+    census           US Census Bureau batch geocoder, up to 10,000 addresses per request
+
+Base URLs can be overridden (--base-url or GEOCODER_BASE_URL) so any backend
+can be pointed at a local stand-in.
+"""
+
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Configuration
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+NOMINATIM_LOCAL_URL = 'http://localhost:8080'
+CENSUS_URL = 'https://geocoding.geo.census.gov'
+CENSUS_BENCHMARK = 'Public_AR_Current'
+CENSUS_BATCH_SIZE = 10000  # Census API limit per request
+USER_AGENT = 'RCFE-Finder/1.0'  # Required by Nominatim
+RATE_LIMIT_DELAY = 1.0  # Public Nominatim requires 1 request per second
+UNAVAILABLE = 'unavailable'  # Result for a lookup that failed transiently
+
+def is_transient(response):
+    """True if an HTTP response means "try again later" rather than "no match"."""
+    return response.status_code == 429 or response.status_code >= 500
+
+def geocode_address(address, city, state, zip_code, base_url=NOMINATIM_URL):
+    """
+    Geocode a single address using Nominatim (OpenStreetMap).
+
+    Args:
+        address: Street address
+        city: City name
+        state: State code
+        zip_code: ZIP code
+        base_url: Nominatim server (public or self-hosted)
+
+    Returns:
+        dict with 'lat' and 'lon' keys, None if there is no match, or
+        UNAVAILABLE if the server could not be reached or had an error
+    """
+    # Construct full address
+    full_address = f"{address}, {city}, {state} {zip_code}, USA"
+
+    # Nominatim API endpoint
+    url = f"{base_url.rstrip('/')}/search"
+    params = {
+        'q': full_address,
+        'format': 'json',
+        'limit': 1,
+        'countrycodes': 'us'
+    }
+    headers = {
+        'User-Agent': USER_AGENT
+    }
+
+    try:
+        response = requests.get(url, params=params, headers=headers, timeout=10)
+    except requests.RequestException as e:
+        print(f"  Error geocoding: {e}")
+        return UNAVAILABLE
+    if is_transient(response):
+        print(f"  Geocoder unavailable: HTTP {response.status_code}")
+        return UNAVAILABLE
+
+    try:
+        if response.ok and response.json():
+            data = response.json()[0]
+            return {
+                'lat': float(data['lat']),
+                'lon': float(data['lon'])
+            }
+        else:
+            return None
+
+    except Exception as e:
+        print(f"  Error geocoding: {e}")
+        return None
+
+def nominatim_batch(addresses, base_url=NOMINATIM_URL, workers=1):
+    """Geocode sequentially against public Nominatim, honouring its rate limit."""
+    results = {}
+    for key, (address, city, state, zip_code) in addresses.items():
+        result = geocode_address(address, city, state, zip_code, base_url)
+        if result:
+            results[key] = result
+        time.sleep(RATE_LIMIT_DELAY)
+    return results
+
+def nominatim_local_batch(addresses, base_url=NOMINATIM_LOCAL_URL, workers=8):
+    """Geocode concurrently against a self-hosted Nominatim (no rate limit)."""
+    def geocode_one(item):
+        key, (address, city, state, zip_code) = item
+        return key, geocode_address(address, city, state, zip_code, base_url)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return {key: result for key, result in pool.map(geocode_one, addresses.items()) if result}
+
+def census_batch(addresses, base_url=CENSUS_URL, workers=1):
+    """
+    Geocode with the Census Bureau batch API (one request per 10,000 addresses).
+
+    The request is a multipart upload of a headerless CSV
+    ("id,street,city,state,zip"); the response CSV carries the match status
+    and "lon,lat" coordinates for each id.
+    """
+    url = f"{base_url.rstrip('/')}/geocoder/locations/addressbatch"
+    items = list(addresses.items())
+    results = {}
+
+    for start in range(0, len(items), CENSUS_BATCH_SIZE):
+        chunk = items[start:start + CENSUS_BATCH_SIZE]
+        ids = {}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for i, (key, (address, city, state, zip_code)) in enumerate(chunk):
+            ids[str(i)] = key
+            writer.writerow([i, address, city, state, zip_code])
+
+        try:
+            response = requests.post(
+                url,
+                data={'benchmark': CENSUS_BENCHMARK},
+                files={'addressFile': ('addresses.csv', buffer.getvalue(), 'text/csv')},
+                timeout=600
+            )
+        except requests.RequestException as e:
+            print(f"  Error submitting Census batch: {e}")
+            results.update((key, UNAVAILABLE) for key in ids.values())
+            continue
+        if is_transient(response):
+            print(f"  Census batch unavailable: HTTP {response.status_code}")
+            results.update((key, UNAVAILABLE) for key in ids.values())
+            continue
+        if not response.ok:
+            # A rejected request says nothing about the addresses themselves,
+            # so don't let it record every one of them as "no match"
+            print(f"  Census batch rejected: HTTP {response.status_code} {response.text[:200]!r}")
+            results.update((key, UNAVAILABLE) for key in ids.values())
+            continue
+
+        for row in csv.reader(io.StringIO(response.text)):
+            if len(row) < 6 or row[2] != 'Match' or row[0] not in ids:
+                continue
+            try:
+                lon, lat = (float(v) for v in row[5].split(','))
+            except ValueError:
+                continue
+            results[ids[row[0]]] = {'lat': lat, 'lon': lon}
+    return results
+
+# name -> (geocode_batch function, default base URL, addresses per call)
+# The batch size is how often the caller journals progress.
+BACKENDS = {
+    'nominatim': (nominatim_batch, NOMINATIM_URL, 1),
+    'nominatim-local': (nominatim_local_batch, NOMINATIM_LOCAL_URL, 200),
+    'census': (census_batch, CENSUS_URL, CENSUS_BATCH_SIZE),
+}
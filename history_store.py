@@ -0,0 +1,390 @@
+"""
+RCFE Snapshot History Store
+Keeps every downloaded RCFE dataset as one base snapshot plus per-run,
+field-level deltas in a single SQLite file.
+
+Usage:
+    python history_store.py import data/rcfe_data_latest.csv [--date 2026-01-02]
+    python history_store.py import data/rcfe_data_2*.csv
+    python history_store.py runs
+    python history_store.py history 216801686
+    python history_store.py snapshot 2026-01-02 out.csv
+"""
+
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from rcfe_scraper import file_sha256
+
+# Configuration
+HISTORY_DB = Path('data/history.sqlite3')
+KEY_FIELD = 'Facility Number'
+PRESENT_FIELD = '__present__'  # '1' while listed in the dataset, '0' once removed
+DOWNLOAD_TIMESTAMP = re.compile(r'_(\d{8})_(\d{6})\.csv$')  # rcfe_data_20260102_030405.csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    run_date TEXT NOT NULL UNIQUE,
+    source_file TEXT,
+    content_hash TEXT,
+    row_count INTEGER NOT NULL,
+    columns TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    facility_number TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    fields BLOB NOT NULL,
+    PRIMARY KEY (facility_number, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_deltas_run ON deltas (run_id);
+"""
+
+def connect(db_path=HISTORY_DB):
+    """Open the history database, creating the schema if needed."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(runs)')]
+    if 'content_hash' not in columns:
+        # Databases from before content hashes: older runs keep a NULL hash
+        conn.execute('ALTER TABLE runs ADD COLUMN content_hash TEXT')
+        conn.commit()
+    return conn
+
+def _zdict(conn):
+    """
+    Preset compression dictionary shared by every delta.
+
+    Each delta is compressed on its own so it can be read by facility number;
+    priming zlib with the base run's column names stops every row paying for
+    its own copy of the (long) field names.
+    """
+    row = conn.execute('SELECT columns FROM runs ORDER BY run_id LIMIT 1').fetchone()
+    if row is None:
+        return b''
+    return json.dumps({field: '' for field in json.loads(row[0])}, separators=(',', ':')).encode('utf-8')
+
+def _encode(fields, zdict):
+    """Compress a dict of changed field values for storage."""
+    compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+    data = json.dumps(fields, separators=(',', ':')).encode('utf-8')
+    return compressor.compress(data) + compressor.flush()
+
+def _decode(blob, zdict):
+    """Reverse of _encode."""
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return json.loads(decompressor.decompress(blob).decode('utf-8'))
+
+def _resolve_run(conn, run_date=None):
+    """
+    Find the run in effect on a given date.
+
+    Runs are ordered by run_id, the order _load_state replays them in;
+    record_snapshot keeps run dates in the same order.
+
+    Args:
+        conn: Open history database
+        run_date: 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' (None = latest run)
+
+    Returns:
+        (run_id, run_date, columns) tuple, or None if no run matches
+    """
+    if run_date is None:
+        row = conn.execute(
+            'SELECT run_id, run_date, columns FROM runs ORDER BY run_id DESC LIMIT 1'
+        ).fetchone()
+    else:
+        # A bare date matches any run recorded on that day
+        if len(run_date) == 10:
+            run_date = run_date + ' 23:59:59'
+        row = conn.execute(
+            'SELECT run_id, run_date, columns FROM runs WHERE run_date <= ? '
+            'ORDER BY run_id DESC LIMIT 1',
+            (run_date,)
+        ).fetchone()
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(row[2])
+
+def _load_state(conn, run_id):
+    """
+    Rebuild every facility's field values as of a run by replaying deltas.
+
+    Returns:
+        dict mapping facility number to a dict of field values
+        (removed facilities are included with PRESENT_FIELD == '0')
+    """
+    state = {}
+    zdict = _zdict(conn)
+    cursor = conn.execute(
+        'SELECT facility_number, fields FROM deltas WHERE run_id <= ? '
+        'ORDER BY facility_number, run_id',
+        (run_id,)
+    )
+    for fac_num, blob in cursor:
+        state.setdefault(fac_num, {}).update(_decode(blob, zdict))
+    return state
+
+def record_snapshot(csv_path, run_date=None, db_path=HISTORY_DB):
+    """
+    Record a downloaded dataset as a new run, storing only what changed.
+
+    Args:
+        csv_path: Path to the RCFE CSV file
+        run_date: Timestamp for the run (defaults to now)
+        db_path: History database path
+
+    Returns:
+        dict summarising the run, or None if this run date was already recorded
+
+    Raises:
+        ValueError: run_date is earlier than the latest recorded run (each
+                    run is stored as changes against the one before it)
+    """
+    if run_date is None:
+        run_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    elif len(run_date) == 10:
+        run_date = run_date + ' 00:00:00'
+    content_hash = file_sha256(csv_path)
+
+    conn = connect(db_path)
+    try:
+        if conn.execute('SELECT 1 FROM runs WHERE run_date = ?', (run_date,)).fetchone():
+            return None
+
+        latest = _resolve_run(conn)
+        if latest and run_date < latest[1]:
+            raise ValueError(f'run date {run_date} is before the latest recorded run ({latest[1]})')
+        previous = _load_state(conn, latest[0]) if latest else {}
+
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            columns = reader.fieldnames
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO runs (run_date, source_file, content_hash, row_count, columns) '
+                    'VALUES (?, ?, ?, 0, ?)',
+                    (run_date, str(csv_path), content_hash, json.dumps(columns))
+                )
+                run_id = cursor.lastrowid
+                zdict = _zdict(conn)
+
+                seen = set()
+                deltas = []
+                new_count = changed_count = field_changes = 0
+                for row in reader:
+                    fac_num = row[KEY_FIELD]
+                    seen.add(fac_num)
+                    prev = previous.get(fac_num, {})
+                    changed = {
+                        field: row[field] for field in columns
+                        if prev.get(field) != row[field]
+                    }
+                    field_changes += len(changed)
+                    if prev.get(PRESENT_FIELD) != '1':
+                        new_count += 1
+                        changed[PRESENT_FIELD] = '1'
+                    elif changed:
+                        changed_count += 1
+                    if changed:
+                        deltas.append((fac_num, run_id, _encode(changed, zdict)))
+
+                removed = [
+                    fac_num for fac_num, fields in previous.items()
+                    if fields.get(PRESENT_FIELD) == '1' and fac_num not in seen
+                ]
+                removal = _encode({PRESENT_FIELD: '0'}, zdict)
+                deltas.extend((fac_num, run_id, removal) for fac_num in removed)
+
+                conn.executemany(
+                    'INSERT INTO deltas (facility_number, run_id, fields) VALUES (?, ?, ?)',
+                    deltas
+                )
+                conn.execute('UPDATE runs SET row_count = ? WHERE run_id = ?', (len(seen), run_id))
+    finally:
+        conn.close()
+
+    return {
+        'run_id': run_id,
+        'run_date': run_date,
+        'rows': len(seen),
+        'new': new_count,
+        'changed': changed_count,
+        'removed': len(removed),
+        'field_changes': field_changes
+    }
+
+def recorded_hashes(db_path=HISTORY_DB):
+    """Return the SHA-256 digests of every CSV file recorded as a run."""
+    conn = connect(db_path)
+    try:
+        return {row[0] for row in conn.execute('SELECT content_hash FROM runs WHERE content_hash IS NOT NULL')}
+    finally:
+        conn.close()
+
+def download_date(csv_path):
+    """
+    Run date for a downloaded CSV file.
+
+    Args:
+        csv_path: Path to the CSV file
+
+    Returns:
+        'YYYY-MM-DD HH:MM:SS' from the timestamp in a scraper download's name
+        (rcfe_data_20260102_030405.csv), else from the file's modification time
+    """
+    match = DOWNLOAD_TIMESTAMP.search(str(csv_path))
+    if match:
+        return datetime.strptime(match.group(1) + match.group(2), '%Y%m%d%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    return datetime.fromtimestamp(Path(csv_path).stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+
+def list_runs(db_path=HISTORY_DB):
+    """Return all recorded runs, oldest first."""
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(
+            'SELECT r.run_id, r.run_date, r.source_file, r.row_count, '
+            '(SELECT COUNT(*) FROM deltas d WHERE d.run_id = r.run_id) '
+            'FROM runs r ORDER BY r.run_id'
+        )
+        return [
+            {
+                'run_id': run_id,
+                'run_date': run_date,
+                'source_file': source_file,
+                'rows': row_count,
+                'facilities_changed': facilities_changed
+            }
+            for run_id, run_date, source_file, row_count, facilities_changed in cursor
+        ]
+    finally:
+        conn.close()
+
+def reconstruct_snapshot(run_date=None, db_path=HISTORY_DB):
+    """
+    Rebuild the dataset exactly as it was downloaded on a given run.
+
+    Args:
+        run_date: Run date/timestamp (None = latest run)
+        db_path: History database path
+
+    Returns:
+        (columns, rows) where rows is a list of dicts, or (None, []) if no run matches
+    """
+    conn = connect(db_path)
+    try:
+        run = _resolve_run(conn, run_date)
+        if run is None:
+            return None, []
+        run_id, _, columns = run
+        state = _load_state(conn, run_id)
+    finally:
+        conn.close()
+
+    rows = [
+        {field: fields.get(field, '') for field in columns}
+        for fields in state.values()
+        if fields.get(PRESENT_FIELD) == '1'
+    ]
+    return columns, rows
+
+def write_snapshot_csv(out_path, run_date=None, db_path=HISTORY_DB):
+    """Write a reconstructed snapshot to a CSV file. Returns the row count."""
+    columns, rows = reconstruct_snapshot(run_date, db_path)
+    if columns is None:
+        return 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+def facility_history(facility_number, db_path=HISTORY_DB):
+    """
+    List every recorded change for one facility.
+
+    Args:
+        facility_number: Facility Number to look up
+        db_path: History database path
+
+    Returns:
+        List of dicts with 'run_date', 'field' and 'value', oldest first
+    """
+    conn = connect(db_path)
+    try:
+        zdict = _zdict(conn)
+        cursor = conn.execute(
+            'SELECT r.run_date, d.fields FROM deltas d '
+            'JOIN runs r ON r.run_id = d.run_id '
+            'WHERE d.facility_number = ? ORDER BY d.run_id',
+            (str(facility_number),)
+        )
+        return [
+            {'run_date': run_date, 'field': field, 'value': value}
+            for run_date, blob in cursor
+            for field, value in sorted(_decode(blob, zdict).items())
+        ]
+    finally:
+        conn.close()
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='RCFE snapshot history store')
+    parser.add_argument('--db', default=str(HISTORY_DB), help='History database path')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help='Record a CSV download as a new run')
+    p_import.add_argument('csv_files', nargs='+')
+    p_import.add_argument('--date', help="Run date (only valid with a single file; default: the "
+                                         "timestamp in the file name, else its modification time)")
+
+    sub.add_parser('runs', help='List recorded runs')
+
+    p_history = sub.add_parser('history', help='Show all changes for one facility')
+    p_history.add_argument('facility_number')
+
+    p_snapshot = sub.add_parser('snapshot', help='Reconstruct a past dataset as CSV')
+    p_snapshot.add_argument('run_date', help="Run date, or 'latest'")
+    p_snapshot.add_argument('out_csv')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        if args.date and len(args.csv_files) > 1:
+            parser.error('--date only works with a single file')
+        # Oldest first: each run is stored as changes against the one before
+        dated = sorted((args.date or download_date(csv_file), csv_file) for csv_file in args.csv_files)
+        for run_date, csv_file in dated:
+            try:
+                summary = record_snapshot(csv_file, run_date, args.db)
+            except ValueError as e:
+                print(f'Skipped {csv_file}: {e}')
+                continue
+            if summary is None:
+                print(f'Skipped {csv_file}: run date already recorded')
+                continue
+            print(f"Recorded {csv_file} as run {summary['run_id']} ({summary['run_date']}): "
+                  f"{summary['new']} new, {summary['changed']} changed, "
+                  f"{summary['removed']} removed, {summary['field_changes']} field changes")
+    elif args.command == 'runs':
+        for run in list_runs(args.db):
+            print(f"{run['run_id']:>4}  {run['run_date']}  {run['rows']:>6} rows  "
+                  f"{run['facilities_changed']:>6} facilities changed  {run['source_file']}")
+    elif args.command == 'history':
+        for change in facility_history(args.facility_number, args.db):
+            print(f"{change['run_date']}  {change['field']}: {change['value']}")
+    elif args.command == 'snapshot':
+        run_date = None if args.run_date == 'latest' else args.run_date
+        count = write_snapshot_csv(args.out_csv, run_date, args.db)
+        print(f'Wrote {count} facilities to {args.out_csv}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+RCFE JSONL Journal
+Append-only key/value store kept as one JSON line per update.
+
+Saving an update costs O(1) no matter how large the store is, and a crash
+can at worst lose a half-written last line. Compaction rewrites the journal
+atomically as a single snapshot line (which also makes loading as fast as
+one json.load). Used for the geocode cache (geocode_store.py), the crawler's
+state and page index (facility_crawler.py) and anything else that needs a
+dict persisted incrementally.
+
+Usage:
+    import jsonl_journal
+    data = jsonl_journal.load('some_store.jsonl')
+    jsonl_journal.append_entries({'key': value, 'gone': None}, 'some_store.jsonl')
+    jsonl_journal.compact_if_needed('some_store.jsonl')
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# Configuration
+COMPACT_MIN_RECORDS = 1000  # Never compact journals smaller than this
+COMPACT_RATIO = 0.5         # Compact once over half the records are superseded
+
+def read_journal(path):
+    """
+    Replay a journal file.
+
+    Returns:
+        (data, record_count) tuple; a truncated final line is ignored
+    """
+    data = {}
+    records = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+
+    for line_no, line in enumerate(lines, 1):
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if line_no < len(lines):
+                print(f"Warning: skipping corrupt line {line_no} in {path}")
+            continue
+
+        if 'snapshot' in record:
+            data = record['snapshot']
+            records += len(data)
+        elif record.get('v') is None:
+            data.pop(record['k'], None)
+            records += 1
+        else:
+            data[record['k']] = record['v']
+            records += 1
+    return data, records
+
+def load(path):
+    """
+    Load a journal.
+
+    Returns:
+        dict of its current contents (empty if the file doesn't exist)
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return read_journal(path)[0]
+
+def append_entries(updates, path):
+    """
+    Append updates to a journal and flush them to disk.
+
+    Args:
+        updates: dict of key -> value (None deletes the key)
+        path: Journal file
+    """
+    if not updates:
+        return
+    path = Path(path)
+    with open(path, 'a+b') as f:
+        # Start on a fresh line if a previous writer died mid-line
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        lines = [
+            json.dumps({'k': key, 'v': value}, separators=(',', ':'))
+            for key, value in updates.items()
+        ]
+        f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+def compact(path, data=None):
+    """
+    Atomically rewrite a journal as a single snapshot record.
+
+    Each call writes its own temporary file, so concurrent compactions (or
+    first-run migrations from parallel pipeline stages) can't trip over
+    each other; the last one to finish wins.
+
+    Args:
+        path: Journal file
+        data: Current contents (read from the journal if omitted)
+    """
+    path = Path(path)
+    if data is None:
+        data = read_journal(path)[0] if path.exists() else {}
+
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'snapshot': data}, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; keep the journal readable as before
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def compact_if_needed(path):
+    """
+    Compact a journal once superseded records dominate it.
+
+    Returns:
+        True if the journal was compacted
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    data, records = read_journal(path)
+    if records < COMPACT_MIN_RECORDS or len(data) >= records * (1 - COMPACT_RATIO):
+        return False
+    compact(path, data)
+    return True
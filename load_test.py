@@ -0,0 +1,320 @@
+"""
+RCFE Load Test Harness
+Replays a realistic request mix against a locally started app to find its
+throughput ceiling.
+
+The mix is address lookups (/api/geocode), searches around where people
+live (/api/search) and map pans (searches a few miles from a previous
+origin, as the map's moveend handler sends them), drawn from California
+cities weighted by population. Geocoding goes to nominatim_stub.py, never
+the public Nominatim.
+
+Each concurrency level runs for a fixed time; p50/p95/p99 latency,
+throughput and error rate are reported per endpoint and saved to
+data/loadtest/ so runs of different versions can be compared.
+
+Usage:
+    python load_test.py                                   # start stub + app, levels 1,4,16
+    python load_test.py --concurrency 8,32 --duration 30 --label after-cache
+    python load_test.py --stub-latency-ms 800 --stub-error-rate 0.1
+    python load_test.py --url http://localhost:5001       # an app that's already running
+    python load_test.py --compare data/loadtest/loadtest_20250601_120000.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+# Configuration
+RESULTS_DIR = Path('data/loadtest')
+APP_PORT = 5099
+STUB_PORT = 8088
+CONCURRENCY_LEVELS = '1,4,16'
+DURATION = 20          # Seconds per concurrency level
+STARTUP_TIMEOUT = 120  # Seconds to wait for the app to become ready
+REQUEST_TIMEOUT = 30
+
+# Share of each kind of request
+REQUEST_MIX = {'geocode': 0.15, 'search': 0.35, 'pan': 0.50}
+
+# (city, lat, lon, population in thousands)
+ORIGINS = [
+    ('Los Angeles', 34.0522, -118.2437, 3820),
+    ('San Diego', 32.7157, -117.1611, 1380),
+    ('San Jose', 37.3382, -121.8863, 970),
+    ('San Francisco', 37.7749, -122.4194, 810),
+    ('Fresno', 36.7378, -119.7871, 545),
+    ('Sacramento', 38.5816, -121.4944, 525),
+    ('Long Beach', 33.7701, -118.1937, 450),
+    ('Oakland', 37.8044, -122.2712, 430),
+    ('Bakersfield', 35.3733, -119.0187, 410),
+    ('Anaheim', 33.8366, -117.9143, 345),
+    ('Riverside', 33.9806, -117.3755, 318),
+    ('Stockton', 37.9577, -121.2908, 320),
+    ('Irvine', 33.6846, -117.8265, 310),
+    ('Santa Ana', 33.7455, -117.8677, 310),
+    ('Modesto', 37.6391, -120.9969, 218),
+    ('San Bernardino', 34.1083, -117.2898, 222),
+    ('Santa Rosa', 38.4404, -122.7141, 178),
+    ('Redding', 40.5865, -122.3917, 93),
+]
+STREETS = ['Main St', 'Oak Ave', 'Elm St', 'Park Blvd', 'Maple Dr', 'Pine St',
+           'Cedar Ln', 'Washington Ave', 'Lincoln Way', 'Mission Rd']
+SEARCH_RADII = [10, 25, 50, 50, 50]  # The UI always sends 50
+PAN_DEGREES = 0.15                   # How far a map pan moves the center (~10 miles)
+
+def make_request(rng):
+    """
+    Draw one request from the mix.
+
+    Returns:
+        (endpoint label, path, JSON body) tuple
+    """
+    kind = rng.choices(list(REQUEST_MIX), weights=list(REQUEST_MIX.values()))[0]
+    city, lat, lon, _ = rng.choices(ORIGINS, weights=[o[3] for o in ORIGINS])[0]
+
+    if kind == 'geocode':
+        # A limited set of street numbers, so popular addresses repeat as in real traffic
+        address = f"{rng.randint(1, 300) * 10} {rng.choice(STREETS)}, {city}, CA"
+        return kind, '/api/geocode', {'address': address}
+
+    # People search from a home address somewhere around the city
+    lat += rng.uniform(-0.1, 0.1)
+    lon += rng.uniform(-0.1, 0.1)
+    if kind == 'pan':
+        lat += rng.uniform(-PAN_DEGREES, PAN_DEGREES)
+        lon += rng.uniform(-PAN_DEGREES, PAN_DEGREES)
+        radius_miles = 50
+    else:
+        radius_miles = rng.choice(SEARCH_RADII)
+    return kind, '/api/search', {'lat': round(lat, 6), 'lon': round(lon, 6),
+                                 'radius_miles': radius_miles}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_level(base_url, concurrency, duration, seed):
+    """
+    Send requests from `concurrency` workers for `duration` seconds.
+
+    Returns:
+        (samples, elapsed seconds); samples are (endpoint, latency ms,
+        status code or None on a connection error) tuples
+    """
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        session = requests.Session()
+        local = []
+        while time.monotonic() < deadline:
+            kind, path, body = make_request(rng)
+            start = time.perf_counter()
+            try:
+                status = session.post(base_url + path, json=body, timeout=REQUEST_TIMEOUT).status_code
+            except requests.RequestException:
+                status = None
+            local.append((kind, (time.perf_counter() - start) * 1000, status))
+        with lock:
+            samples.extend(local)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - start
+
+def summarize(samples, elapsed):
+    """
+    Latency percentiles, throughput and error rate per endpoint.
+
+    Returns:
+        dict of endpoint (plus 'all') -> summary dict
+    """
+    by_endpoint = {'all': samples}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+
+    summary = {}
+    for endpoint, endpoint_samples in by_endpoint.items():
+        latencies = sorted(latency for _, latency, _ in endpoint_samples)
+        errors = sum(1 for _, _, status in endpoint_samples
+                     if status is None or status >= 400)
+        statuses = {}
+        for _, _, status in endpoint_samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        summary[endpoint] = {
+            'requests': len(endpoint_samples),
+            'throughput': round(len(endpoint_samples) / elapsed, 1) if elapsed else None,
+            'error_rate': round(errors / len(endpoint_samples), 4) if endpoint_samples else None,
+            'p50_ms': round(percentile(latencies, 50), 1) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 1) if latencies else None,
+            'statuses': statuses,
+        }
+    return summary
+
+def start_process(cmd, env, ready_url, log_path):
+    """
+    Start a server process and wait until ready_url answers 200.
+
+    Returns:
+        Popen object
+
+    Raises:
+        RuntimeError: The process exited or didn't become ready in time
+    """
+    log = open(log_path, 'w')
+    process = subprocess.Popen(cmd, env={**os.environ, **env}, stdout=log,
+                               stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{cmd[1]} exited with code {process.returncode} (see {log_path})")
+        try:
+            if requests.get(ready_url, timeout=2).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"{cmd[1]} not ready after {STARTUP_TIMEOUT}s (see {log_path})")
+
+def git_revision():
+    """Short commit hash of the code under test (None outside a git checkout)."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_level(concurrency, summary):
+    """Print one concurrency level's results as a table."""
+    print(f"\nConcurrency {concurrency}:")
+    print(f"  {'endpoint':<10}{'requests':>9}{'req/s':>9}{'errors':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, s in summary.items():
+        print(f"  {endpoint:<10}{s['requests']:>9}{s['throughput']:>9}"
+              f"{s['error_rate']:>8.1%}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+
+def print_comparison(previous, current):
+    """Print throughput and p95 changes against an earlier run."""
+    print(f"\nCompared with {previous.get('label') or previous.get('revision')} "
+          f"({previous.get('started')}):")
+    for level, summary in current['levels'].items():
+        before = previous.get('levels', {}).get(level)
+        if not before:
+            continue
+        for endpoint, s in summary.items():
+            old = before.get(endpoint)
+            if not old or not old['throughput'] or not old['p95_ms']:
+                continue
+            print(f"  c={level:<4}{endpoint:<10}"
+                  f"req/s {old['throughput']} -> {s['throughput']} "
+                  f"({(s['throughput'] / old['throughput'] - 1):+.0%}), "
+                  f"p95 {old['p95_ms']} -> {s['p95_ms']} ms "
+                  f"({(s['p95_ms'] / old['p95_ms'] - 1):+.0%})")
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Load test the RCFE Finder app')
+    parser.add_argument('--url', help='Test an already running app instead of starting one')
+    parser.add_argument('--concurrency', default=CONCURRENCY_LEVELS,
+                        help='Comma-separated concurrent client counts')
+    parser.add_argument('--duration', type=float, default=DURATION,
+                        help='Seconds per concurrency level')
+    parser.add_argument('--port', type=int, default=APP_PORT, help='Port for the started app')
+    parser.add_argument('--stub-port', type=int, default=STUB_PORT)
+    parser.add_argument('--stub-latency-ms', type=float, default=150)
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    parser.add_argument('--stub-empty-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1, help='Request mix random seed')
+    parser.add_argument('--label', help='Name for this run (e.g. a branch or change)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    print("=" * 60)
+    print("RCFE Load Test")
+    print("=" * 60)
+
+    processes = []
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            stub_url = f'http://127.0.0.1:{args.stub_port}'
+            base_url = f'http://127.0.0.1:{args.port}'
+            print(f"Starting Nominatim stub on {stub_url}...")
+            processes.append(start_process(
+                [sys.executable, 'nominatim_stub.py', '--port', str(args.stub_port),
+                 '--latency-ms', str(args.stub_latency_ms),
+                 '--error-rate', str(args.stub_error_rate),
+                 '--empty-rate', str(args.stub_empty_rate)],
+                {}, f'{stub_url}/search?q=ready', RESULTS_DIR / 'stub.log'))
+            print(f"Starting app on {base_url}...")
+            processes.append(start_process(
+                [sys.executable, 'app.py'],
+                {'PORT': str(args.port), 'NOMINATIM_URL': stub_url, 'FLASK_ENV': 'production'},
+                f'{base_url}/readyz', RESULTS_DIR / 'app.log'))
+
+        results = {
+            'label': args.label,
+            'revision': git_revision(),
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'url': base_url,
+            'settings': {
+                'duration': args.duration,
+                'mix': REQUEST_MIX,
+                'seed': args.seed,
+                'stub': None if args.url else {
+                    'latency_ms': args.stub_latency_ms,
+                    'error_rate': args.stub_error_rate,
+                    'empty_rate': args.stub_empty_rate,
+                },
+            },
+            'levels': {},
+        }
+
+        for concurrency in levels:
+            print(f"\nRunning {concurrency} clients for {args.duration:g}s...")
+            samples, elapsed = run_level(base_url, concurrency, args.duration, args.seed)
+            summary = summarize(samples, elapsed)
+            results['levels'][str(concurrency)] = summary
+            print_level(concurrency, summary)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    out_file = RESULTS_DIR / f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {out_file}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print_comparison(json.load(f), results)
+
+if __name__ == '__main__':
+    main()
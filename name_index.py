@@ -0,0 +1,324 @@
+"""
+RCFE Facility Name Index
+In-memory typeahead index over facility and licensee names, built once when
+the app loads its data.
+
+Two structures:
+    prefix array  every word of every name, sorted, so the facilities whose
+                  words start with the typed text are one bisect away
+    trigrams      trigram -> facility ids, for typo-tolerant matches when
+                  the prefixes don't find enough
+
+patch_index() re-indexes a few changed facilities in a copy of the index;
+their old entries stay behind, hidden from suggestions, until the next build.
+
+Usage:
+    from name_index import build_index, suggest
+    index = build_index(facilities_data, geocode_cache)
+    suggest(index, 'sunrse villa', limit=10, lat=34.05, lon=-118.24)
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# Configuration
+ACTIVE_STATUSES = ('LICENSED', 'PENDING', 'ON PROBATION')
+MIN_QUERY_LENGTH = 2
+FUZZY_MIN_SIMILARITY = 0.6   # Share of the query's trigrams a fuzzy match must contain
+PROXIMITY_WEIGHT = 0.5       # Score bonus for a facility right at the supplied location
+PROXIMITY_SCALE_MILES = 15.0 # Distance at which the proximity bonus is halved
+
+# Text match scores; fuzzy matches score below 1.5 even with the proximity bonus
+EXACT_SCORE = 4.0
+NAME_PREFIX_SCORE = 3.0
+WORD_PREFIX_SCORE = 2.0
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+def normalize_name(text):
+    """Upper-case, punctuation to spaces ('St. Mary's' -> 'ST MARY S')."""
+    return _NON_ALNUM.sub(' ', str(text or '').upper()).strip()
+
+def trigrams(text):
+    """Set of trigrams of a normalized string, padded so word starts count."""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _index_row(row, cache):
+    """
+    Index entries for one facility.
+
+    Returns:
+        (doc dict, set of words, set of trigrams), or None when the facility
+        isn't indexed (inactive, or no name or licensee)
+    """
+    if row.get('Facility Status', '') not in ACTIVE_STATUSES:
+        return None
+    facility_number = str(row.get('Facility Number', ''))
+    name = normalize_name(row.get('Facility Name'))
+    licensee = normalize_name(row.get('Licensee'))
+    if not name and not licensee:
+        return None
+
+    coords = cache.get(facility_number) or {}
+    doc = {
+        'facility_number': facility_number,
+        'name': row.get('Facility Name', ''),
+        'licensee': row.get('Licensee', ''),
+        'city': row.get('Facility City', ''),
+        'status': row.get('Facility Status', ''),
+        'lat': coords.get('lat'),
+        'lon': coords.get('lon'),
+        'key': name,
+    }
+    return doc, set(name.split()) | set(licensee.split()), trigrams(name) | trigrams(licensee)
+
+def build_index(facilities, cache):
+    """
+    Build the name index over active facilities.
+
+    Args:
+        facilities: List of facility dicts (CSV rows)
+        cache: Geocode cache (facility number -> coordinates)
+
+    Returns:
+        Index dict for suggest()
+    """
+    docs = []
+    words = []
+    postings = {}
+    gram_counts = []
+
+    for row in facilities:
+        entry = _index_row(row, cache)
+        if entry is None:
+            continue
+        doc, doc_words, grams = entry
+
+        doc_id = len(docs)
+        docs.append(doc)
+        for word in doc_words:
+            words.append((word, doc_id))
+
+        gram_counts.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(doc_id)
+
+    words.sort()
+    return {
+        'docs': docs,
+        'doc_ids': {doc['facility_number']: doc_id for doc_id, doc in enumerate(docs)},
+        'removed': frozenset(),
+        'words': [word for word, _ in words],
+        'word_docs': [doc_id for _, doc_id in words],
+        'trigrams': postings,
+        'gram_counts': gram_counts,
+    }
+
+def patch_index(index, facility_numbers, rows, cache):
+    """
+    A copy of the index with some facilities re-indexed.
+
+    The index passed in is left untouched; only the posting lists that
+    change are copied.
+
+    Args:
+        index: Index from build_index() (or patch_index())
+        facility_numbers: Facilities whose old entries are dropped (changed
+                          or deleted ones)
+        rows: Current CSV rows of the changed and new facilities
+        cache: Geocode cache (facility number -> coordinates)
+
+    Returns:
+        New index dict
+    """
+    docs = list(index['docs'])
+    doc_ids = dict(index['doc_ids'])
+    removed = set(index['removed'])
+    words = list(index['words'])
+    word_docs = list(index['word_docs'])
+    postings = dict(index['trigrams'])
+    gram_counts = list(index['gram_counts'])
+
+    for number in facility_numbers:
+        doc_id = doc_ids.pop(str(number), None)
+        if doc_id is not None:
+            removed.add(doc_id)
+
+    copied = set()
+    for row in rows:
+        entry = _index_row(row, cache)
+        if entry is None:
+            continue
+        doc, doc_words, grams = entry
+
+        doc_id = len(docs)
+        docs.append(doc)
+        doc_ids[doc['facility_number']] = doc_id
+        for word in doc_words:
+            # After the word's existing entries, keeping (word, doc id) order
+            position = bisect_right(words, word)
+            words.insert(position, word)
+            word_docs.insert(position, doc_id)
+
+        gram_counts.append(len(grams))
+        for gram in grams:
+            if gram not in copied:
+                postings[gram] = list(postings.get(gram, ()))
+                copied.add(gram)
+            postings[gram].append(doc_id)
+
+    return {
+        'docs': docs,
+        'doc_ids': doc_ids,
+        'removed': frozenset(removed),
+        'words': words,
+        'word_docs': word_docs,
+        'trigrams': postings,
+        'gram_counts': gram_counts,
+    }
+
+def _prefix_range(index, token):
+    """Slice of the prefix array holding the words that start with `token`."""
+    words = index['words']
+    lo = bisect_left(words, token)
+    return lo, bisect_left(words, token + '\x7f', lo)
+
+def _prefix_matches(index, tokens):
+    """Ids of facilities where every token prefixes one of their words."""
+    # Start from the rarest token so the intersections stay small
+    ranges = sorted((_prefix_range(index, token) for token in tokens),
+                    key=lambda r: r[1] - r[0])
+    word_docs = index['word_docs']
+    lo, hi = ranges[0]
+    matched = set(word_docs[lo:hi])
+    for lo, hi in ranges[1:]:
+        if not matched:
+            break
+        matched = matched.intersection(word_docs[lo:hi])
+    return matched
+
+def _distance_miles(lat1, lon1, lat2, lon2):
+    """Equirectangular distance; accurate enough for ranking within California."""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 3959 * math.hypot(x, y)
+
+def _scored(docs, candidates, lat, lon):
+    """
+    Score suggestion candidates, adding the proximity bonus.
+
+    Args:
+        docs: The index's documents
+        candidates: Iterable of (doc_id, text match score)
+        lat, lon: Optional location; nearer facilities score higher
+
+    Returns:
+        List of (-score, key, doc_id, distance) tuples, best first
+        (distance is None without a location)
+    """
+    results = []
+    for doc_id, score in candidates:
+        doc = docs[doc_id]
+        distance = None
+        if lat is not None and lon is not None and doc['lat'] is not None:
+            distance = _distance_miles(lat, lon, doc['lat'], doc['lon'])
+            score += PROXIMITY_WEIGHT / (1 + distance / PROXIMITY_SCALE_MILES)
+        results.append((-score, doc['key'], doc_id, distance))
+    results.sort()
+    return results
+
+def _tier_best(docs, doc_ids, count, lat, lon):
+    """
+    The `count` best facilities of one text match tier, where only the
+    proximity bonus (or, without a location, the name) tells them apart.
+    A bounded heap on the squared distance in degrees (the same ranking as
+    _distance_miles) picks them, so only the winners are fully scored.
+    """
+    if lat is None or lon is None:
+        return heapq.nsmallest(count, doc_ids, key=lambda doc_id: (docs[doc_id]['key'], doc_id))
+
+    def nearness(doc_id):
+        doc = docs[doc_id]
+        if doc['lat'] is None:
+            return (1, 0.0, doc['key'], doc_id)  # No proximity bonus: after the rest
+        dy = doc['lat'] - lat
+        dx = (doc['lon'] - lon) * math.cos(math.radians((lat + doc['lat']) / 2))
+        return (0, dx * dx + dy * dy, doc['key'], doc_id)
+    return heapq.nsmallest(count, doc_ids, key=nearness)
+
+def suggest(index, query, limit=10, lat=None, lon=None):
+    """
+    Rank facilities whose name or licensee matches what has been typed.
+
+    Every typed word must prefix a word of the name or licensee (names that
+    start with the whole query rank first); if that finds fewer than `limit`
+    facilities, trigram matches fill in so small typos still match.
+
+    Args:
+        index: Index from build_index()
+        query: Text typed so far
+        limit: Maximum number of suggestions
+        lat, lon: Optional location; nearer facilities rank higher
+
+    Returns:
+        List of suggestion dicts, best first
+    """
+    text = normalize_name(query)
+    if len(text) < MIN_QUERY_LENGTH:
+        return []
+
+    docs = index['docs']
+
+    matched = _prefix_matches(index, text.split()) - index['removed']
+
+    # Exact name, then name starting with the query, then word prefixes. The
+    # proximity bonus never crosses tiers, so lower tiers are only scored
+    # while the better ones can't fill the list.
+    tiers = {EXACT_SCORE: [], NAME_PREFIX_SCORE: [], WORD_PREFIX_SCORE: []}
+    for doc_id in matched:
+        key = docs[doc_id]['key']
+        if key == text:
+            tiers[EXACT_SCORE].append(doc_id)
+        elif key.startswith(text):
+            tiers[NAME_PREFIX_SCORE].append(doc_id)
+        else:
+            tiers[WORD_PREFIX_SCORE].append(doc_id)
+
+    # Each tier keeps only as many candidates as the list still needs, so a
+    # short, common prefix doesn't score and sort every match
+    results = []
+    for tier_score, doc_ids in tiers.items():
+        needed = limit - len(results)
+        if needed <= 0:
+            break
+        best = _tier_best(docs, doc_ids, needed, lat, lon)
+        results.extend(_scored(docs, ((doc_id, tier_score) for doc_id in best), lat, lon))
+
+    # Typo tolerance: facilities sharing most of the query's trigrams
+    if len(results) < limit and len(text) >= 3:
+        grams = trigrams(text)
+        counts = Counter()
+        for gram in grams:
+            counts.update(index['trigrams'].get(gram, ()))
+        min_shared = FUZZY_MIN_SIMILARITY * len(grams)
+        found = {doc_id for _, _, doc_id, _ in results}
+        fuzzy = (
+            # Containment of the query, lightly penalizing long names
+            (doc_id, shared / len(grams) - 0.001 * index['gram_counts'][doc_id])
+            for doc_id, shared in counts.items()
+            if shared >= min_shared and doc_id not in found and doc_id not in index['removed']
+        )
+        results.extend(_scored(docs, fuzzy, lat, lon)[:limit - len(results)])
+
+    suggestions = []
+    for _, _, doc_id, distance in results:
+        doc = docs[doc_id]
+        suggestion = {k: v for k, v in doc.items() if k != 'key'}
+        if distance is not None:
+            suggestion['distance'] = round(distance, 2)
+        suggestions.append(suggestion)
+    return suggestions
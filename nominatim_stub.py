@@ -0,0 +1,113 @@
+"""
+Nominatim Stand-in Server
+Answers Nominatim /search requests locally so load tests never touch the
+public service.
+
+Every query resolves to a stable point inside California (the same address
+always gets the same coordinates). Latency, errors and empty results can be
+injected to see how the app behaves when geocoding is slow or failing.
+
+Usage:
+    python nominatim_stub.py [--port 8088] [--latency-ms 150] [--jitter-ms 50]
+                             [--error-rate 0.02] [--empty-rate 0.05]
+    NOMINATIM_URL=http://localhost:8088 python app.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Configuration
+PORT = 8088
+LATENCY_MS = 150   # Typical public Nominatim response time
+JITTER_MS = 50
+ERROR_RATE = 0.0   # Share of requests answered with 503
+EMPTY_RATE = 0.0   # Share of requests answered with no match
+
+# Where stand-in coordinates are placed (roughly the populated part of California)
+LAT_RANGE = (32.6, 38.9)
+LON_RANGE = (-122.6, -116.9)
+
+def stub_coordinates(query):
+    """Stable (lat, lon) for a query string."""
+    digest = hashlib.sha1(query.lower().encode('utf-8')).digest()
+    lat_frac = int.from_bytes(digest[:4], 'big') / 2 ** 32
+    lon_frac = int.from_bytes(digest[4:8], 'big') / 2 ** 32
+    lat = LAT_RANGE[0] + lat_frac * (LAT_RANGE[1] - LAT_RANGE[0])
+    lon = LON_RANGE[0] + lon_frac * (LON_RANGE[1] - LON_RANGE[0])
+    return round(lat, 7), round(lon, 7)
+
+def make_handler(latency_ms, jitter_ms, error_rate, empty_rate):
+    """Request handler class with the given fault injection settings."""
+
+    class NominatimStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/search':
+                self._reply(404, {'error': 'not found'})
+                return
+
+            delay = max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000
+            time.sleep(delay)
+
+            roll = random.random()
+            if roll < error_rate:
+                self._reply(503, {'error': 'stub: injected failure'})
+                return
+            query = parse_qs(url.query).get('q', [''])[0]
+            if not query or roll < error_rate + empty_rate:
+                self._reply(200, [])
+                return
+
+            lat, lon = stub_coordinates(query)
+            self._reply(200, [{
+                'lat': str(lat),
+                'lon': str(lon),
+                'display_name': f'{query} (stub)',
+            }])
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # One line per request would swamp a load test's output
+
+    return NominatimStubHandler
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Local Nominatim stand-in for load tests')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--latency-ms', type=float, default=LATENCY_MS,
+                        help='Mean response delay')
+    parser.add_argument('--jitter-ms', type=float, default=JITTER_MS,
+                        help='Standard deviation of the delay')
+    parser.add_argument('--error-rate', type=float, default=ERROR_RATE,
+                        help='Share of requests failing with 503')
+    parser.add_argument('--empty-rate', type=float, default=EMPTY_RATE,
+                        help='Share of requests returning no match')
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency_ms, args.jitter_ms, args.error_rate, args.empty_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"Nominatim stub on http://127.0.0.1:{args.port} "
+          f"(latency {args.latency_ms:g}±{args.jitter_ms:g}ms, "
+          f"errors {args.error_rate:.0%}, empty {args.empty_rate:.0%})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
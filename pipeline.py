@@ -0,0 +1,228 @@
+"""
+RCFE Update Pipeline Runner
+Runs the update steps as a dependency graph: independent stages run
+concurrently, each finished stage is checkpointed so a failed run resumes
+where it stopped, and every run writes a JSON timing report to logs/.
+
+Usage:
+    from pipeline import Stage, run_pipeline
+    stages = [
+        Stage('scrape', run_scrape),
+        Stage('compare', run_compare, deps=['scrape'], checkpoint=False),
+        ...
+    ]
+    success, results = run_pipeline(stages)
+
+Each stage function receives a dict of the results of the stages it depends
+on and returns (result, metrics). `metrics` (row counts etc.) goes into the
+report; `result` is kept for dependent stages and, for checkpointed stages,
+saved to the state file (so it must be JSON-serializable). Stages with
+checkpoint=False hold results too large to persist and are simply re-run
+when a resumed stage needs them. A stage fails by raising an exception, and
+can end the run early (successfully) by raising StopPipeline.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+
+# Configuration
+STATE_FILE = Path('logs/update_state.json')
+REPORT_DIR = Path('logs')
+MAX_WORKERS = 4
+
+Stage = namedtuple('Stage', ['name', 'func', 'deps', 'checkpoint'])
+Stage.__new__.__defaults__ = ((), True)
+
+class StopPipeline(Exception):
+    """
+    Raised by a stage to end the run early without failing it (e.g. there
+    is nothing new to process). The stage counts as done with `result`;
+    stages that haven't started are skipped.
+    """
+    def __init__(self, reason, result=None):
+        super().__init__(reason)
+        self.result = result
+
+def _write_json(path, data):
+    """Atomically write a JSON file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+def _load_state(state_file, fresh):
+    """Return the state of an unfinished run to resume, or a new state."""
+    if not fresh and Path(state_file).exists():
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+        if state.get('outcome') not in ('success', 'stopped'):
+            return state, True
+
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return {'run_id': run_id, 'started': datetime.now().isoformat(), 'stages': {}}, False
+
+def _stages_to_run(stages, state):
+    """
+    Work out which stages still have to run.
+
+    Completed stages are skipped, except non-checkpointed ones whose result
+    is needed by a stage that still has to run.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    done = {
+        name for name, info in state['stages'].items()
+        if info.get('status') == 'done' and name in by_name
+    }
+    to_run = {stage.name for stage in stages if stage.name not in done}
+
+    changed = True
+    while changed:
+        changed = False
+        for name in list(to_run):
+            for dep in by_name[name].deps:
+                if dep not in to_run and not by_name[dep].checkpoint:
+                    to_run.add(dep)
+                    changed = True
+    return to_run
+
+def run_pipeline(stages, state_file=STATE_FILE, report_dir=REPORT_DIR, fresh=False,
+                 max_workers=MAX_WORKERS):
+    """
+    Run a list of stages as a dependency graph.
+
+    Args:
+        stages: List of Stage tuples (dependencies must be listed earlier)
+        state_file: Checkpoint file used to resume a failed run
+        report_dir: Directory for the per-run JSON report
+        fresh: Ignore any unfinished run and start over
+        max_workers: Maximum number of stages running at once
+
+    Returns:
+        (success, results) where results maps stage name to its result
+    """
+    state, resumed = _load_state(state_file, fresh)
+    state['attempt'] = state.get('attempt', 0) + 1
+    to_run = _stages_to_run(stages, state)
+    by_name = {stage.name: stage for stage in stages}
+
+    if resumed:
+        skipped = [stage.name for stage in stages if stage.name not in to_run]
+        print(f"Resuming run {state['run_id']} (already done: {', '.join(skipped) or 'nothing'})")
+
+    results = {
+        name: info.get('result')
+        for name, info in state['stages'].items()
+        if name not in to_run
+    }
+    lock = threading.Lock()
+    run_start = time.monotonic()
+    ran = set()
+
+    def execute(stage):
+        inputs = {dep: results[dep] for dep in stage.deps}
+        started = datetime.now()
+        t0 = time.monotonic()
+        stopped = None
+        try:
+            result, metrics = stage.func(inputs)
+            status, error = 'done', None
+        except StopPipeline as e:
+            result, metrics = e.result, {}
+            status, error, stopped = 'done', None, str(e)
+        except Exception as e:
+            result, metrics = None, {}
+            status, error = 'failed', f'{type(e).__name__}: {e}'
+        info = {
+            'status': status,
+            'started': started.isoformat(),
+            'duration_seconds': round(time.monotonic() - t0, 3),
+            'metrics': metrics or {},
+        }
+        if error:
+            info['error'] = error
+        if stopped:
+            info['stopped'] = stopped
+        if status == 'done' and stage.checkpoint:
+            info['result'] = result
+        with lock:
+            ran.add(stage.name)
+            results[stage.name] = result
+            state['stages'][stage.name] = info
+            _write_json(state_file, state)
+        return info
+
+    failed = []
+    stopped = []
+    running = {}
+    waiting = [stage for stage in stages if stage.name in to_run]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            # Start every stage whose dependencies have all finished
+            if not failed and not stopped:
+                for stage in list(waiting):
+                    if all(dep not in to_run for dep in stage.deps):
+                        waiting.remove(stage)
+                        running[pool.submit(execute, stage)] = stage
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                info = future.result()
+                if info['status'] == 'done':
+                    to_run.discard(stage.name)
+                    if 'stopped' in info:
+                        stopped.append(stage.name)
+                else:
+                    failed.append(stage.name)
+
+    success = not failed and (not waiting or bool(stopped))
+    state['finished'] = datetime.now().isoformat()
+    if not success:
+        state['outcome'] = 'failed'
+    elif waiting:
+        state['outcome'] = 'stopped'
+    else:
+        state['outcome'] = 'success'
+    _write_json(state_file, state)
+
+    report = {
+        'run_id': state['run_id'],
+        'started': state['started'],
+        'finished': state['finished'],
+        'attempt': state['attempt'],
+        'outcome': state['outcome'],
+        'wall_seconds': round(time.monotonic() - run_start, 3),
+        'stages': [
+            dict(name=stage.name, deps=list(stage.deps), from_checkpoint=stage.name in state['stages'] and stage.name not in ran,
+                 **{k: v for k, v in state['stages'].get(
+                    stage.name, {'status': 'skipped' if stopped else 'not run'}).items()
+                    if k != 'result'})
+            for stage in stages
+        ],
+    }
+    suffix = f"_attempt{state['attempt']}" if state['attempt'] > 1 else ''
+    report_file = Path(report_dir) / f"update_report_{state['run_id']}{suffix}.json"
+    _write_json(report_file, report)
+
+    print()
+    print(f"{'Stage':<16}{'Status':<10}{'Seconds':>10}")
+    for entry in report['stages']:
+        print(f"{entry['name']:<16}{entry['status']:<10}{entry.get('duration_seconds', 0):>10.1f}")
+    print(f"Report: {report_file}")
+    if stopped:
+        print(f"Stopped early by {', '.join(stopped)}: "
+              f"{state['stages'][stopped[0]]['stopped']}")
+    if failed:
+        print(f"Failed: {', '.join(failed)} - rerun to resume from here")
+
+    return success, {name: results.get(name) for name in by_name}
@@ -0,0 +1,212 @@
+"""
+RCFE ZIP and City Lookup Tables
+Precomputed answers to "facilities near ZIP 95814" and "near Sacramento",
+so the app serves them without geocoding or searching.
+
+For every ZIP code and city in the data, the table holds an origin point
+(the median position of the active, geocoded facilities there, taken at
+the precision of the compact dataset so offline.js finds the same point) and the ranked nearest active
+facilities within the largest standard radius. Smaller radii are prefixes
+of the same ranking. Tables are tied to the CSV they were built from (by
+SHA-256), so the app ignores a table built from other data.
+
+Usage:
+    python place_tables.py [--dataset adult_residential]   # Build the table
+    python place_tables.py lookup 95814                      # Check an entry
+
+    from place_tables import load_places, lookup
+    entry = lookup(places, 'Sacramento, CA')   # {'kind', 'key', 'lat', 'lon', 'hits'}
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from pathlib import Path
+from statistics import median_low
+
+import compact_dataset
+import datasets
+import facility_search
+import geocode_store
+from rcfe_scraper import file_sha256
+
+# Configuration
+PLACES_FILE_NAME = 'places.json'
+RADIUS_MILES = 50       # Largest standard search radius (the app's default)
+LIMIT = facility_search.DEFAULT_LIMIT
+ACTIVE_STATUSES = ('LICENSED', 'PENDING', 'ON PROBATION')
+
+_ZIP = re.compile(r'^(?:CA\s+)?(\d{5})(?:-\d{4})?$')
+_STATE_SUFFIX = re.compile(r',?\s+(?:CA|CALIFORNIA)$')
+
+def places_file(dataset):
+    """Lookup table path of a dataset (a Dataset from datasets.py)."""
+    return dataset.data_dir / PLACES_FILE_NAME
+
+def place_key(text):
+    """
+    Normalize a search to a table key.
+
+    Args:
+        text: What was typed, e.g. '95814', 'CA 95814-1234', 'Sacramento, CA'
+
+    Returns:
+        ('zip', '95814') or ('city', 'SACRAMENTO'), or None for anything
+        else (street addresses, other states)
+    """
+    text = ' '.join(str(text or '').upper().split())
+    match = _ZIP.match(text)
+    if match:
+        return 'zip', match.group(1)
+    text = _STATE_SUFFIX.sub('', text)
+    if text and not any(c.isdigit() for c in text) and ',' not in text:
+        return 'city', text
+    return None
+
+def build_places(rows, geocode_cache, version):
+    """
+    Build the lookup table.
+
+    Args:
+        rows: CSV rows
+        geocode_cache: Geocode cache (facility number -> coordinates)
+        version: SHA-256 of the CSV the rows came from
+
+    Returns:
+        Table dict: 'version', 'radius_miles', 'limit' and 'zip'/'city'
+        (key -> {'lat', 'lon', 'hits': [[facility number, distance], ...]})
+    """
+    # The facilities the app searches, in the same order, so rankings match
+    searchable = []
+    points = {'zip': {}, 'city': {}}
+    for row in rows:
+        number = str(row.get('Facility Number', ''))
+        coords = geocode_cache.get(number)
+        if not coords or row.get('Facility Status', '') not in ACTIVE_STATUSES:
+            continue
+        searchable.append({'facility_number': number, 'lat': coords['lat'], 'lon': coords['lon']})
+
+        # Origins come from the searchable facilities only, the ones the
+        # offline copy holds too
+        zip_code = str(row.get('Facility Zip') or '')[:5]
+        for kind, value in (('zip', zip_code), ('city', row.get('Facility City'))):
+            key = place_key(value)
+            if key is not None and key[0] == kind:
+                points[kind].setdefault(key[1], []).append(
+                    (round(coords['lat'] * compact_dataset.COORD_SCALE),
+                     round(coords['lon'] * compact_dataset.COORD_SCALE)))
+
+    table = facility_search.build_table(searchable)
+    places = {'version': version, 'radius_miles': RADIUS_MILES, 'limit': LIMIT}
+    for kind, by_key in points.items():
+        keys = sorted(by_key)
+        # Median, not mean: one mis-geocoded facility can't drag the origin
+        # away. The lower median is always one of the coordinates, so the
+        # browser gets exactly the same point without any rounding rules.
+        origins = [
+            (median_low(lat for lat, _ in coords) / compact_dataset.COORD_SCALE,
+             median_low(lon for _, lon in coords) / compact_dataset.COORD_SCALE)
+            for coords in (by_key[key] for key in keys)
+        ]
+        found = facility_search.nearest(table, origins, RADIUS_MILES, LIMIT)
+        places[kind] = {
+            key: {
+                'lat': lat,
+                'lon': lon,
+                'hits': [[f['facility_number'], f['distance']] for f in facilities],
+            }
+            for key, (lat, lon), facilities in zip(keys, origins, found)
+        }
+    return places
+
+def save_places(places, path):
+    """Atomically write the lookup table (compact JSON)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(places, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_places(path, version=None):
+    """
+    Load a lookup table.
+
+    Args:
+        path: Table file
+        version: SHA-256 of the loaded CSV; a table built from other data
+                 is ignored
+
+    Returns:
+        Table dict, or None if missing or stale
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            places = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if version is not None and places.get('version') != version:
+        return None
+    return places
+
+def lookup(places, text):
+    """
+    Find a ZIP code or city in the table.
+
+    Args:
+        places: Table from build_places() / load_places()
+        text: What was typed
+
+    Returns:
+        Entry dict with 'kind', 'key', 'lat', 'lon' and 'hits', or None
+    """
+    key = place_key(text)
+    if places is None or key is None:
+        return None
+    entry = places[key[0]].get(key[1])
+    if entry is None:
+        return None
+    return dict(entry, kind=key[0], key=key[1])
+
+def build_for_dataset(dataset):
+    """
+    Build and save a dataset's lookup table from its current files.
+
+    Returns:
+        (path, table dict) tuple
+    """
+    with open(dataset.csv_file, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    cache = geocode_store.load_cache(dataset.geocode_journal, dataset.legacy_cache, migrate=False)
+    places = build_places(rows, cache, file_sha256(dataset.csv_file))
+    path = places_file(dataset)
+    save_places(places, path)
+    return path, places
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Build the ZIP code and city lookup tables')
+    parser.add_argument('command', nargs='?', default='build', choices=['build', 'lookup'])
+    parser.add_argument('query', nargs='?', help='ZIP code or city (lookup)')
+    parser.add_argument('--dataset', default=datasets.DEFAULT, choices=sorted(datasets.DATASETS),
+                        help='CCLD facility category (default: rcfe)')
+    args = parser.parse_args()
+    dataset = datasets.get(args.dataset)
+
+    if args.command == 'lookup':
+        entry = lookup(load_places(places_file(dataset)), args.query)
+        if entry is None:
+            print(f'{args.query!r} is not in the table')
+            return
+        print(f"{entry['kind']} {entry['key']}: origin {entry['lat']}, {entry['lon']}")
+        for number, distance in entry['hits'][:10]:
+            print(f'   {number}  {distance:6.2f} mi')
+        return
+
+    path, places = build_for_dataset(dataset)
+    print(f"Saved {len(places['zip']):,} ZIP codes and {len(places['city']):,} cities "
+          f"to {path} ({Path(path).stat().st_size / 1024:,.0f} KB)")
+
+if __name__ == '__main__':
+    main()
@@ -1,270 +1,441 @@
 """
 RCFE Data Scraper
 Downloads RCFE (Residential Care Facilities for the Elderly) data from CCLD website
+
+Two modes:
+    http     Fetch the export URL directly, streaming to disk. Sends
+             If-None-Match/If-Modified-Since from the last download, so an
+             unchanged file costs one 304 response.
+    browser  Click through the CCLD site with headless Playwright, blocking
+             images/fonts/analytics and waiting on elements, not timers.
+
+The default ("auto") uses http when the export URL is known - from --url,
+RCFE_EXPORT_URL, or the URL the last browser download came from - and falls
+back to the browser if that fails.
+
+Other CCLD categories are downloaded the same way with --dataset (see
+datasets.py); each has its own export URL variable and data directory.
+
+Usage:
+    python rcfe_scraper.py [--mode auto|http|browser] [--url URL] [--force]
+                           [--headed] [--debug] [--dataset rcfe]
+
+Exit codes: 0 new data downloaded, 3 data unchanged since last download, 1 failed.
 """
 
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+import requests
+
+import datasets
+
+# Configuration
+EXPORT_URL = os.environ.get('RCFE_EXPORT_URL')  # Direct link to the RCFE CSV export
+LATEST_FILENAME = "rcfe_data_latest.csv"
+STATE_FILENAME = "download_state.json"  # ETag, Last-Modified and hash of the last download
+EXPECTED_COLUMN = "Facility Number"     # Sanity check that we got the CSV, not an error page
+CHUNK_SIZE = 1024 * 1024
+USER_AGENT = "RCFE-Finder/1.0"
+
+# Browser mode
+SEARCH_URL = "https://www.ccld.dss.ca.gov/carefacilitysearch/"
+PAGE_TIMEOUT = 60000      # ms, initial page load
+STEP_TIMEOUT = 30000      # ms, waiting for a link or button to appear
+DOWNLOAD_TIMEOUT = 120000 # ms, the export is generated on demand
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net",
+                 "clarity.ms", "hotjar.com")
+
+# Exit codes
+EXIT_UPDATED = 0
+EXIT_FAILED = 1
+EXIT_UNCHANGED = 3
+
+# Download results
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_download_state(download_dir):
+    """Return what we know about the last download (empty dict if nothing)."""
+    path = os.path.join(download_dir, STATE_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_download_state(download_dir, state):
+    """Atomically save the download state."""
+    path = os.path.join(download_dir, STATE_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def install_download(tmp_path, download_dir, state, sha256=None,
+                     latest_filename=LATEST_FILENAME, **metadata):
+    """
+    Move a finished download into place as the latest data file.
 
-def download_rcfe_data(download_dir="./data"):
+    Args:
+        tmp_path: Downloaded file
+        download_dir: Data directory
+        state: Current download state (updated and saved)
+        sha256: Content hash if already computed while streaming
+        latest_filename: Name of the latest data file in download_dir
+        **metadata: Extra state to record (url, etag, last_modified)
+
+    Returns:
+        UPDATED, UNCHANGED (same content as the last download), or None if
+        the file is not a CCLD export
     """
-    Scrapes and downloads RCFE data from the CCLD download page
+    with open(tmp_path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline()
+    if EXPECTED_COLUMN not in header:
+        print(f"ERROR: Downloaded file is not a CCLD export (header: {header[:100]!r})")
+        os.remove(tmp_path)
+        return None
+
+    sha256 = sha256 or file_sha256(tmp_path)
+    latest_filepath = os.path.join(download_dir, latest_filename)
+    unchanged = sha256 == state.get("sha256") and os.path.exists(latest_filepath)
+
+    if unchanged:
+        os.remove(tmp_path)
+        print("✓ Downloaded file is identical to the last download")
+    else:
+        os.replace(tmp_path, latest_filepath)
+        print(f"✓ Download successful!")
+        print(f"✓ File saved to: {latest_filepath}")
+
+    state.update(metadata)
+    state["sha256"] = sha256
+    state["checked"] = datetime.now().isoformat(timespec="seconds")
+    if not unchanged:
+        state["downloaded"] = state["checked"]
+    save_download_state(download_dir, state)
+    return UNCHANGED if unchanged else UPDATED
+
+
+def download_via_http(url, download_dir="./data", force=False, latest_filename=LATEST_FILENAME):
+    """
+    Download the RCFE export directly over HTTP.
 
     Args:
+        url: Export URL
         download_dir: Directory where the downloaded file will be saved
-    """
-    # Create download directory if it doesn't exist
-    if not os.path.exists(download_dir):
-        os.makedirs(download_dir)
-        print(f"Created download directory: {download_dir}")
+        force: Skip the conditional request and always download
+        latest_filename: Name of the latest data file in download_dir
 
-    # Make download directory absolute path
-    download_dir = os.path.abspath(download_dir)
+    Returns:
+        UPDATED, UNCHANGED, or None on failure
+    """
+    os.makedirs(download_dir, exist_ok=True)
+    state = load_download_state(download_dir)
+    latest_filepath = os.path.join(download_dir, latest_filename)
+
+    headers = {"User-Agent": USER_AGENT}
+    if not force and state.get("url") == url and os.path.exists(latest_filepath):
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    print(f"Fetching: {url}")
+    tmp_path = latest_filepath + ".part"
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=(15, 300)) as response:
+            if response.status_code == 304:
+                print("✓ Not modified since last download")
+                state["checked"] = datetime.now().isoformat(timespec="seconds")
+                save_download_state(download_dir, state)
+                return UNCHANGED
+            if not response.ok:
+                print(f"ERROR: HTTP {response.status_code} from {url}")
+                return None
+
+            digest = hashlib.sha256()
+            size = 0
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            print(f"Downloaded {size:,} bytes")
+
+            return install_download(
+                tmp_path, download_dir, state, sha256=digest.hexdigest(),
+                latest_filename=latest_filename,
+                url=url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+    except requests.RequestException as e:
+        print(f"ERROR: HTTP download failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def _block_unneeded_requests(route):
+    """Abort images, fonts, media and analytics; let everything else through."""
+    request = route.request
+    if (request.resource_type in BLOCKED_RESOURCE_TYPES or
+            any(host in request.url for host in BLOCKED_HOSTS)):
+        route.abort()
+    else:
+        route.continue_()
 
-    print("Starting RCFE data scraper...")
-    print(f"Download directory: {download_dir}")
 
-    with sync_playwright() as p:
-        # Launch browser (use headless=False to see what's happening)
-        print("Launching browser...")
-        browser = p.chromium.launch(headless=False)  # Set to True for background execution
+@contextmanager
+def timed_step(name, timings):
+    """Time a scraping step and record its duration in `timings`."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[name] = time.monotonic() - start
+        print(f"  [{timings[name]:6.2f}s] {name}")
 
-        # Create a new page with download settings
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
 
+def _find_rcfe_link(page, link_texts=None):
+    """Return a locator for the dataset's download button, or None if not found."""
+    # Wait for any of them to appear, then use the most specific match
+    if link_texts:
+        strategies = [page.get_by_text(text, exact=False) for text in link_texts]
+    else:
+        strategies = [
+            page.get_by_text("Elderly Assisted Living", exact=False),
+            page.get_by_text("Residential Care Facilities for the Elderly", exact=False),
+            page.get_by_text("RCFE", exact=False),
+            page.locator("button").filter(has_text="Elderly"),
+        ]
+    any_link = strategies[0]
+    for locator in strategies[1:]:
+        any_link = any_link.or_(locator)
+    any_link.first.wait_for(state="visible", timeout=STEP_TIMEOUT)
+
+    for locator in strategies:
+        if locator.count() > 0:
+            return locator.first
+    return None
+
+
+def _print_clickable_elements(page):
+    """Print the first few clickable elements to help debug a changed page."""
+    all_clickable = page.locator("a, button, [role='button']").all()
+    print(f"Found {len(all_clickable)} clickable elements")
+    for i, elem in enumerate(all_clickable[:10]):  # Print first 10
         try:
-            # Navigate to the main search page first
-            url = "https://www.ccld.dss.ca.gov/carefacilitysearch/"
-            print(f"Navigating to: {url}")
-            page.goto(url, wait_until="networkidle", timeout=60000)
+            text = elem.inner_text()
+            if text.strip():
+                print(f"  {i}: {text[:50]}")
+        except Exception:
+            pass
 
-            # Wait for the page to fully load
-            print("Waiting for main page to load...")
-            try:
-                page.wait_for_selector("body", timeout=30000)
-                page.wait_for_timeout(3000)
-                print("Main page loaded")
-            except:
-                print("Warning: Timeout waiting for page elements, continuing anyway...")
-
-            # Find and click the "Download Data" link at the top
-            print("Looking for 'Download Data' link...")
-            try:
-                download_data_link = page.get_by_text("Download Data", exact=False)
-                if download_data_link.count() > 0:
-                    print("Found 'Download Data' link, clicking it...")
-                    download_data_link.first.click()
-
-                    # Wait for the download page to load
-                    print("Waiting for download page to load...")
-                    page.wait_for_timeout(5000)
-                    print("Download page loaded")
-                else:
-                    print("ERROR: Could not find 'Download Data' link")
-                    browser.close()
-                    return False
-            except Exception as e:
-                print(f"ERROR: Failed to click 'Download Data' link: {e}")
-                browser.close()
-                return False
 
-            # Take a screenshot for debugging
-            print("Taking screenshot for debugging...")
-            page.screenshot(path="./data/page_screenshot.png")
-            print("Screenshot saved to ./data/page_screenshot.png")
+def download_rcfe_data(download_dir="./data", headless=True, debug=False, dataset=None):
+    """
+    Scrapes and downloads RCFE data from the CCLD download page
 
-            # Look for the RCFE link
-            # We'll try multiple strategies to find it
-            print("Looking for RCFE download link...")
-            print(f"Page title: {page.title()}")
+    Runs headless with images, fonts and analytics blocked, waiting for the
+    elements and the download event it needs rather than fixed delays.
 
-            # Strategy 1: Look for "Elderly Assisted Living" (the exact button text)
-            rcfe_link = None
-            try:
-                rcfe_link = page.get_by_text("Elderly Assisted Living", exact=False)
-                if rcfe_link.count() > 0:
-                    print("Strategy 1 success: Found RCFE link by 'Elderly Assisted Living' text")
-            except Exception as e:
-                print(f"Strategy 1 failed: {e}")
-
-            # Strategy 2: Look for text containing "Residential Care Facilities for the Elderly"
-            if not rcfe_link or rcfe_link.count() == 0:
-                try:
-                    rcfe_link = page.get_by_text("Residential Care Facilities for the Elderly", exact=False)
-                    if rcfe_link.count() > 0:
-                        print("Strategy 2 success: Found RCFE link by full text")
-                except Exception as e:
-                    print(f"Strategy 2 failed: {e}")
-
-            # Strategy 3: Look for "RCFE" text
-            if not rcfe_link or rcfe_link.count() == 0:
-                try:
-                    rcfe_link = page.get_by_text("RCFE", exact=False)
-                    if rcfe_link.count() > 0:
-                        print("Strategy 3 success: Found RCFE link by abbreviation")
-                except Exception as e:
-                    print(f"Strategy 3 failed: {e}")
-
-            # Strategy 4: Look for buttons containing "Elderly"
-            if not rcfe_link or rcfe_link.count() == 0:
-                try:
-                    rcfe_link = page.locator("button").filter(has_text="Elderly")
-                    if rcfe_link.count() > 0:
-                        print(f"Strategy 4 success: Found {rcfe_link.count()} button(s) containing 'Elderly'")
-                except Exception as e:
-                    print(f"Strategy 4 failed: {e}")
-
-            if not rcfe_link or rcfe_link.count() == 0:
-                print("ERROR: Could not find RCFE download link on the page")
-                print("Page content preview:")
-                print(page.content()[:1000])
-                print("\n--- Trying to find all clickable elements ---")
-                all_clickable = page.locator("a, button, [role='button']").all()
-                print(f"Found {len(all_clickable)} clickable elements")
-                for i, elem in enumerate(all_clickable[:10]):  # Print first 10
-                    try:
-                        text = elem.inner_text()
-                        if text.strip():
-                            print(f"  {i}: {text[:50]}")
-                    except:
-                        pass
-                browser.close()
-                return False
-
-            # Click the RCFE link first
-            print("Clicking RCFE download link...")
-            rcfe_link.first.click()
+    Args:
+        download_dir: Directory where the downloaded file will be saved
+        headless: Run without a visible browser window
+        debug: Save screenshots and print page details
+        dataset: Dataset to download (default: RCFE)
 
-            # Handle the confirmation dialog that appears
-            print("Waiting for confirmation dialog...")
-            page.wait_for_timeout(4000)  # Wait 4 seconds for dialog to appear
+    Returns:
+        UPDATED, UNCHANGED, or None on failure
+    """
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-            # Check if the popup with the specific message appeared
-            try:
-                popup_text = page.locator("text=/Large datasets can take/i")
-                if popup_text.count() > 0:
-                    print("✓ Confirmation popup detected (found 'Large datasets can take' text)")
-                else:
-                    print("Warning: Expected popup text not found")
-            except Exception as e:
-                print(f"Note: Could not verify popup text: {e}")
-
-            # Look for and click the confirmation button
-            try:
-                # Debug: Print all buttons on the page
-                all_buttons = page.locator("button").all()
-                print(f"Found {len(all_buttons)} total buttons on page")
-                for i, btn in enumerate(all_buttons[:5]):  # Show first 5 buttons
-                    try:
-                        btn_text = btn.inner_text()
-                        print(f"  Button {i}: '{btn_text}'")
-                    except:
-                        pass
-
-                # Try multiple strategies to find the Confirm button
-                confirm_button = None
-
-                # Strategy 1: Case-insensitive text match for "Confirm"
-                try:
-                    confirm_button = page.locator("button", has_text="Confirm")
-                    if confirm_button.count() > 0:
-                        print(f"Strategy 1 success: Found {confirm_button.count()} button(s) with 'Confirm' text")
-                except Exception as e:
-                    print(f"Strategy 1 failed: {e}")
-
-                # Strategy 2: Exact case-sensitive match
-                if not confirm_button or confirm_button.count() == 0:
-                    try:
-                        confirm_button = page.get_by_role("button", name="Confirm")
-                        if confirm_button.count() > 0:
-                            print(f"Strategy 2 success: Found button by role")
-                    except Exception as e:
-                        print(f"Strategy 2 failed: {e}")
-
-                # Strategy 3: Look for any button containing "confirm" (case-insensitive)
-                if not confirm_button or confirm_button.count() == 0:
-                    try:
-                        all_btns = page.locator("button").all()
-                        for btn in all_btns:
-                            text = btn.inner_text().lower()
-                            if "confirm" in text:
-                                confirm_button = btn
-                                print(f"Strategy 3 success: Found button with text '{btn.inner_text()}'")
-                                break
-                    except Exception as e:
-                        print(f"Strategy 3 failed: {e}")
-
-                if confirm_button and (isinstance(confirm_button, object)):
-                    print("Clicking Confirm button...")
-
-                    # Set up download handler BEFORE clicking the confirmation button
-                    with page.expect_download(timeout=60000) as download_info:
-                        if hasattr(confirm_button, 'click'):
-                            confirm_button.click()
-                        else:
-                            confirm_button.first.click()
-                        print("Waiting for download to start...")
-
-                    # Wait for download to complete
-                    print("Download started, waiting for completion...")
-                    download = download_info.value
-                else:
-                    print("ERROR: Could not find Confirm button")
-                    browser.close()
-                    return False
-
-            except Exception as e:
-                print(f"Error handling confirmation dialog: {e}")
-                browser.close()
-                return False
+    # Create download directory if it doesn't exist
+    if not os.path.exists(download_dir):
+        os.makedirs(download_dir)
+        print(f"Created download directory: {download_dir}")
 
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"rcfe_data_{timestamp}.csv"
-            filepath = os.path.join(download_dir, filename)
+    # Make download directory absolute path
+    download_dir = os.path.abspath(download_dir)
+    screenshot_path = os.path.join(download_dir, "page_screenshot.png")
 
-            # Save the download
-            download.save_as(filepath)
-            print(f"✓ Download successful!")
-            print(f"✓ File saved to: {filepath}")
+    link_texts = dataset.link_texts if dataset and dataset.name != datasets.DEFAULT else None
+    latest_filename = dataset.csv_file.name if dataset else LATEST_FILENAME
+    print(f"Starting {dataset.label if dataset else 'RCFE'} data scraper...")
+    print(f"Download directory: {download_dir}")
 
-            # Also save a copy as "latest" for easy access
-            latest_filepath = os.path.join(download_dir, "rcfe_data_latest.csv")
-            download.save_as(latest_filepath)
-            print(f"✓ Latest copy saved to: {latest_filepath}")
+    timings = {}
+    total_start = time.monotonic()
+    with sync_playwright() as p:
+        with timed_step("launch browser", timings):
+            browser = p.chromium.launch(headless=headless)
+            context = browser.new_context(accept_downloads=True)
+            if not debug:
+                context.route("**/*", _block_unneeded_requests)
+            page = context.new_page()
+            page.set_default_timeout(STEP_TIMEOUT)
 
+        try:
+            with timed_step("open search page", timings):
+                page.goto(SEARCH_URL, wait_until="domcontentloaded", timeout=PAGE_TIMEOUT)
+                download_data_link = page.get_by_text("Download Data", exact=False).first
+                download_data_link.wait_for(state="visible")
+
+            with timed_step("open download page", timings):
+                download_data_link.click()
+                rcfe_link = _find_rcfe_link(page, link_texts)
+
+            if debug:
+                page.screenshot(path=screenshot_path)
+                print(f"Screenshot saved to {screenshot_path}")
+                print(f"Page title: {page.title()}")
+
+            if rcfe_link is None:
+                print("ERROR: Could not find the dataset's download link on the page")
+                _print_clickable_elements(page)
+                browser.close()
+                return None
+
+            with timed_step("confirm download", timings):
+                rcfe_link.click()
+                # The "Large datasets can take..." popup
+                confirm_button = page.get_by_role("button", name=re.compile("confirm", re.I)).first
+                confirm_button.wait_for(state="visible")
+
+            with timed_step("download file", timings):
+                with page.expect_download(timeout=DOWNLOAD_TIMEOUT) as download_info:
+                    confirm_button.click()
+                download = download_info.value
+
+                # Save the download once, then move it into place. Remember
+                # where it came from so later runs can fetch it directly.
+                tmp_path = os.path.join(download_dir, latest_filename + ".part")
+                download.save_as(tmp_path)
+
+            metadata = {"etag": None, "last_modified": None}
+            if download.url.startswith("http"):
+                metadata["url"] = download.url
             browser.close()
-            return True
+            print(f"Browser download took {time.monotonic() - total_start:.1f}s")
+
+            return install_download(tmp_path, download_dir, load_download_state(download_dir),
+                                    latest_filename=latest_filename, **metadata)
 
         except PlaywrightTimeoutError as e:
             print(f"ERROR: Timeout while loading page or waiting for elements")
             print(f"Details: {e}")
+            try:
+                if debug:
+                    page.screenshot(path=screenshot_path)
+                _print_clickable_elements(page)
+            except Exception:
+                pass
             browser.close()
-            return False
+            return None
 
         except Exception as e:
             print(f"ERROR: An error occurred during scraping")
             print(f"Details: {e}")
             browser.close()
-            return False
+            return None
 
 
-if __name__ == "__main__":
+def fetch_rcfe_data(download_dir="./data", mode="auto", url=None, force=False,
+                    headless=True, debug=False, dataset=None):
+    """
+    Download the RCFE data using the best available method.
+
+    Args:
+        download_dir: Directory where the downloaded file will be saved
+        mode: "http", "browser", or "auto" (http if the URL is known, else browser)
+        url: Export URL (defaults to the dataset's export URL variable, then
+             the last known URL)
+        force: Always download, even if the server says nothing changed
+        headless: Run the browser without a window
+        debug: Browser screenshots, page details and no request blocking
+        dataset: Dataset to download (default: RCFE)
+
+    Returns:
+        UPDATED, UNCHANGED, or None on failure
+    """
+    url = url or (dataset.export_url if dataset else EXPORT_URL)
+    latest_filename = dataset.csv_file.name if dataset else LATEST_FILENAME
+    if not url and os.path.isdir(download_dir):
+        url = load_download_state(download_dir).get("url")
+
+    if mode in ("auto", "http") and url:
+        result = download_via_http(url, download_dir, force=force, latest_filename=latest_filename)
+        if result or mode == "http":
+            return result
+        print("Direct download failed, falling back to the browser...")
+    elif mode == "http":
+        env_var = f"{(dataset.name if dataset else 'rcfe').upper()}_EXPORT_URL"
+        print(f"ERROR: No export URL known - pass --url or set {env_var}")
+        return None
+
+    return download_rcfe_data(download_dir, headless=headless, debug=debug, dataset=dataset)
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Download RCFE data from CCLD")
+    parser.add_argument("--mode", choices=["auto", "http", "browser"], default="auto",
+                        help="Download method (default: auto)")
+    parser.add_argument("--dataset", default=datasets.DEFAULT, choices=sorted(datasets.DATASETS),
+                        help="CCLD facility category (default: rcfe)")
+    parser.add_argument("--url", help="Export URL (default: <DATASET>_EXPORT_URL or last known)")
+    parser.add_argument("--download-dir", help="Where to save the data (default: the dataset's data directory)")
+    parser.add_argument("--force", action="store_true",
+                        help="Download even if the data has not changed")
+    parser.add_argument("--headed", action="store_true",
+                        help="Show the browser window (browser mode)")
+    parser.add_argument("--debug", action="store_true",
+                        help="Save screenshots and don't block page resources (browser mode)")
+    args = parser.parse_args()
+    dataset = datasets.get(args.dataset)
+    label = "RCFE" if dataset.name == datasets.DEFAULT else dataset.label
+
     print("=" * 60)
-    print("RCFE Data Scraper")
+    print(f"{label} Data Scraper")
     print("=" * 60)
 
-    success = download_rcfe_data()
+    result = fetch_rcfe_data(args.download_dir or str(dataset.data_dir), mode=args.mode,
+                             url=args.url, force=args.force, headless=not args.headed,
+                             debug=args.debug, dataset=dataset)
 
-    if success:
-        print("\n" + "=" * 60)
-        print("SUCCESS: RCFE data downloaded successfully!")
-        print("=" * 60)
+    print("\n" + "=" * 60)
+    if result == UPDATED:
+        print(f"SUCCESS: {label} data downloaded successfully!")
+    elif result == UNCHANGED:
+        print(f"UNCHANGED: {label} data has not changed since the last download")
     else:
-        print("\n" + "=" * 60)
-        print("FAILED: Could not download RCFE data")
+        print(f"FAILED: Could not download {label} data")
         print("Please check the error messages above")
-        print("=" * 60)
+    print("=" * 60)
+
+    sys.exit({UPDATED: EXIT_UPDATED, UNCHANGED: EXIT_UNCHANGED}.get(result, EXIT_FAILED))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,749 @@
+// Global variables
+let map = null;
+let markerRenderer = null; // One canvas draws every facility marker
+let markerLayer = null;
+let markerById = new Map(); // facility_number -> marker, for the current results
+let markerSource = null; // The result list markerById was built for
+let allFacilities = [];
+let filteredFacilities = [];
+let currentView = 'map';
+let expandedFacilityId = null;
+let isInitialSearch = false; // Track if this is initial address search vs. map movement
+let searchOrigin = null; // Last search location, used to rank name suggestions
+let nameSuggestions = [];
+let suggestTimer = null;
+let filterTimer = null;
+let sidebarList = null;
+let listViewList = null;
+
+const FILTER_DEBOUNCE_MS = 200; // Re-filter once typing pauses, not on every keystroke
+const ROW_OVERSCAN_PX = 600; // Rows rendered beyond the visible part of a list
+
+// Marker colors by citation shade (match the legend)
+const SHADE_COLORS = {
+    light: { fill: '#9ca3af', stroke: '#4b5563' },
+    medium: { fill: '#3b82f6', stroke: '#1e40af' },
+    dark: { fill: '#1f2937', stroke: '#000000' }
+};
+
+// Initialize map
+function initMap() {
+    if (!map) {
+        map = L.map('map').setView([36.7783, -119.4179], 6);
+        L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+            attribution: '© OpenStreetMap contributors',
+            maxZoom: 19
+        }).addTo(map);
+        markerRenderer = L.canvas({ padding: 0.5 });
+        markerLayer = L.layerGroup().addTo(map);
+    }
+}
+
+initMap();
+
+// Helper function to format facility status
+function getStatusBadge(status) {
+    if (status === 'PENDING') {
+        return '<span class="status-badge pending">PENDING</span>';
+    } else if (status === 'ON PROBATION') {
+        return '<span class="status-badge probation">ON PROBATION</span>';
+    }
+    return ''; // LICENSED facilities don't get a badge
+}
+
+// Search for facilities
+async function searchAddress() {
+    const addressInput = document.getElementById('address-search');
+    const address = addressInput.value.trim();
+
+    if (!address) {
+        alert('Please enter an address');
+        return;
+    }
+
+    // Show loading
+    document.getElementById('loading').classList.remove('hidden');
+    document.getElementById('search-btn').disabled = true;
+
+    try {
+        // ZIP codes and city names are answered from precomputed tables, or
+        // from the downloaded data when searching on this device
+        if (offlineFacilities) {
+            const place = localPlace(address);
+            if (place) {
+                showSearchResults(place.lat, place.lon, localSearch(place.lat, place.lon, 50));
+                return;
+            }
+        } else {
+            const placeResponse = await fetch(`/api/place?${new URLSearchParams({ q: address, radius_miles: 50 })}`);
+            if (placeResponse.ok) {
+                const placeData = await placeResponse.json();
+                showSearchResults(placeData.lat, placeData.lon, placeData.facilities);
+                return;
+            }
+        }
+
+        // Geocode address
+        const geocodeResponse = await fetch('/api/geocode', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ address })
+        });
+
+        const geocodeData = await geocodeResponse.json();
+
+        if (!geocodeData.success) {
+            alert('Could not find address. Please try again.');
+            return;
+        }
+
+        await searchNear(geocodeData.lat, geocodeData.lon);
+
+    } catch (error) {
+        console.error('Search error:', error);
+        alert('An error occurred. Please try again.');
+    } finally {
+        document.getElementById('loading').classList.add('hidden');
+        document.getElementById('search-btn').disabled = false;
+    }
+}
+
+// Search facilities around a point
+async function searchNear(lat, lon) {
+    if (offlineFacilities) {
+        showSearchResults(lat, lon, localSearch(lat, lon, 50));
+        return;
+    }
+
+    const searchResponse = await fetch('/api/search', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            lat: lat,
+            lon: lon,
+            radius_miles: 50
+        })
+    });
+
+    const searchData = await searchResponse.json();
+
+    if (searchData.success) {
+        showSearchResults(lat, lon, searchData.facilities);
+    }
+}
+
+// Show a new search's results, zooming the map to them
+function showSearchResults(lat, lon, facilities) {
+    searchOrigin = { lat, lon };
+    allFacilities = facilities;
+    filteredFacilities = [...allFacilities];
+    isInitialSearch = true; // Mark as initial search to auto-zoom
+    applyFilters();
+}
+
+// Filter facilities by name, and suggest matching facilities statewide
+function filterByName() {
+    const nameQuery = document.getElementById('name-filter').value;
+
+    // Picking a suggestion that isn't in the current results searches around it
+    const picked = nameSuggestions.find(s => s.name === nameQuery);
+    if (picked && picked.lat != null &&
+        !allFacilities.some(f => f.facility_number === picked.facility_number)) {
+        searchNear(picked.lat, picked.lon);
+        return;
+    }
+
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(applyFilters, FILTER_DEBOUNCE_MS);
+
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(() => fetchSuggestions(nameQuery), 150);
+}
+
+// Fill the name field's suggestion list from /api/suggest (or the offline data)
+async function fetchSuggestions(query) {
+    if (query.trim().length < 2) {
+        return;
+    }
+    if (offlineFacilities) {
+        showSuggestions(localSuggest(query, searchOrigin));
+        return;
+    }
+    const params = new URLSearchParams({ q: query });
+    if (searchOrigin) {
+        params.set('lat', searchOrigin.lat);
+        params.set('lon', searchOrigin.lon);
+    }
+    try {
+        const response = await fetch(`/api/suggest?${params}`);
+        const data = await response.json();
+        if (!data.success || document.getElementById('name-filter').value !== query) {
+            return; // A newer keystroke has taken over
+        }
+        showSuggestions(data.suggestions);
+    } catch (error) {
+        console.error('Suggest error:', error);
+    }
+}
+
+function showSuggestions(suggestions) {
+    nameSuggestions = suggestions;
+    const datalist = document.getElementById('name-suggestions');
+    datalist.innerHTML = '';
+    nameSuggestions.forEach(s => {
+        const option = document.createElement('option');
+        option.value = s.name;
+        option.label = `${s.city}${s.distance != null ? ` (${s.distance} mi)` : ''}`;
+        datalist.appendChild(option);
+    });
+}
+
+// Apply all filters
+function applyFilters() {
+    clearTimeout(filterTimer);
+    const nameQuery = document.getElementById('name-filter').value.toLowerCase();
+    const sizeFilter = document.getElementById('size-filter').value;
+
+    filteredFacilities = allFacilities.filter(facility => {
+        // Name filter
+        if (nameQuery && !facility.name.toLowerCase().includes(nameQuery)) {
+            return false;
+        }
+
+        // Size filter
+        if (sizeFilter !== 'all') {
+            if (sizeFilter === 'small' && facility.capacity > 6) return false;
+            if (sizeFilter === 'medium' && (facility.capacity < 7 || facility.capacity >= 50)) return false;
+            if (sizeFilter === 'large' && facility.capacity < 50) return false;
+        }
+
+        return true;
+    });
+
+    displayResults();
+}
+
+// Display results
+function displayResults() {
+    // Show download button
+    document.getElementById('download-csv-btn').classList.remove('hidden');
+
+    // Update map and sidebar
+    updateMap();
+    updateSidebar();
+    updateListView();
+
+    // Show legend
+    document.getElementById('map-legend').classList.remove('hidden');
+
+    // Announce results to screen readers
+    const announcement = document.createElement('div');
+    announcement.setAttribute('role', 'status');
+    announcement.setAttribute('aria-live', 'polite');
+    announcement.className = 'sr-only';
+    announcement.textContent = `Search complete. Found ${filteredFacilities.length} facilities.`;
+    document.body.appendChild(announcement);
+    setTimeout(() => announcement.remove(), 1000);
+}
+
+// Popup for a facility marker (built when the popup opens)
+function facilityPopup(facility) {
+    const dssUrl = `https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/${facility.facility_number}`;
+    return `
+        <b>${facility.name}</b> ${getStatusBadge(facility.status)}<br>
+        ${facility.distance} miles away<br>
+        ${facility.address}, ${facility.city}<br>
+        <b>Total Citations:</b> ${facility.total_citations}<br>
+        <a href="${dssUrl}" target="_blank" rel="noopener noreferrer">View Details on DSS Website</a>
+    `;
+}
+
+// Canvas marker for a facility, created once per search result
+function facilityMarker(facility) {
+    let marker = markerById.get(facility.facility_number);
+    if (marker) {
+        return marker;
+    }
+
+    const colors = SHADE_COLORS[facility.shade] || SHADE_COLORS.dark;
+    marker = L.circleMarker([facility.lat, facility.lon], {
+        renderer: markerRenderer,
+        radius: 7,
+        color: colors.stroke,
+        weight: 2,
+        fillColor: colors.fill,
+        fillOpacity: 0.9
+    }).bindPopup(() => facilityPopup(facility));
+
+    // Highlight facility in sidebar on marker hover
+    marker.on('mouseover', () => {
+        highlightFacilityInSidebar(facility.facility_number);
+    });
+
+    marker.on('mouseout', () => {
+        unhighlightFacilityInSidebar(facility.facility_number);
+    });
+
+    // Click to expand in sidebar
+    marker.on('click', () => {
+        expandFacilityInSidebar(facility.facility_number);
+        scrollToFacility(facility.facility_number);
+    });
+
+    markerById.set(facility.facility_number, marker);
+    return marker;
+}
+
+// Update map with markers
+function updateMap() {
+    // Markers are reused while filtering the same results
+    if (markerSource !== allFacilities) {
+        markerById = new Map();
+        markerSource = allFacilities;
+    }
+    markerLayer.clearLayers();
+
+    if (filteredFacilities.length === 0) {
+        return;
+    }
+
+    const bounds = [];
+
+    filteredFacilities.forEach(facility => {
+        markerLayer.addLayer(facilityMarker(facility));
+        bounds.push([facility.lat, facility.lon]);
+    });
+
+    // Fit map to show all markers (only on initial search, not manual map movements)
+    if (bounds.length > 0 && isInitialSearch) {
+        map.fitBounds(bounds, { padding: [50, 50] });
+        isInitialSearch = false; // Reset flag
+    }
+
+    // Add map movement listener for dynamic search
+    map.off('moveend', searchMapCenter); // Remove old listener if exists
+    map.on('moveend', searchMapCenter);
+}
+
+// Search for facilities at current map center when map is moved
+let searchTimeout;
+async function searchMapCenter() {
+    // Debounce to avoid too many searches
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(async () => {
+        if (!map) return;
+
+        const center = map.getCenter();
+        searchOrigin = { lat: center.lat, lon: center.lng };
+
+        if (offlineFacilities) {
+            allFacilities = localSearch(center.lat, center.lng, 50);
+            filteredFacilities = [...allFacilities];
+            applyFilters();
+            return;
+        }
+
+        try {
+            const searchResponse = await fetch('/api/search', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    lat: center.lat,
+                    lon: center.lng,
+                    radius_miles: 50
+                })
+            });
+
+            const searchData = await searchResponse.json();
+
+            if (searchData.success) {
+                allFacilities = searchData.facilities;
+                filteredFacilities = [...allFacilities];
+                applyFilters();
+            }
+        } catch (error) {
+            console.error('Error searching map area:', error);
+        }
+    }, 1000); // Wait 1 second after user stops moving map
+}
+
+// Virtualized lists: only the rows in or near view are in the DOM, between
+// two spacers standing in for the rest. Rows are measured once rendered;
+// rows not yet seen count as the estimated height.
+function createVirtualList(container, scroller, estimatedHeight, renderRow) {
+    const list = {
+        container, scroller, estimatedHeight, renderRow,
+        items: [], heights: [], rendered: new Map(), range: null, margin: null, frame: null,
+        topSpacer: document.createElement('div'),
+        bottomSpacer: document.createElement('div')
+    };
+    const schedule = () => {
+        if (list.frame === null) {
+            list.frame = requestAnimationFrame(() => {
+                list.frame = null;
+                renderVirtualList(list);
+            });
+        }
+    };
+    list.schedule = schedule;
+    scroller.addEventListener('scroll', schedule, { passive: true });
+    window.addEventListener('resize', schedule);
+    return list;
+}
+
+function setVirtualListItems(list, items) {
+    list.items = items;
+    list.heights = items.map(() => list.estimatedHeight);
+    refreshVirtualList(list);
+}
+
+// Re-render the rows in view (after their content changed)
+function refreshVirtualList(list) {
+    list.rendered.clear();
+    list.range = null;
+    renderVirtualList(list);
+}
+
+// Visible part of the list, in pixels from the top of the list
+function virtualListView(list) {
+    const listTop = list.container.getBoundingClientRect().top;
+    if (list.scroller === window) {
+        return { top: -listTop, bottom: window.innerHeight - listTop };
+    }
+    const rect = list.scroller.getBoundingClientRect();
+    return { top: rect.top - listTop, bottom: rect.bottom - listTop };
+}
+
+function renderVirtualList(list) {
+    const { items, heights } = list;
+    const view = virtualListView(list);
+
+    let start = 0;
+    let offset = 0;
+    while (start < items.length && offset + heights[start] < view.top - ROW_OVERSCAN_PX) {
+        offset += heights[start++];
+    }
+    let end = start;
+    while (end < items.length && offset < view.bottom + ROW_OVERSCAN_PX) {
+        offset += heights[end++];
+    }
+
+    if (!list.range || list.range[0] !== start || list.range[1] !== end) {
+        const rows = [];
+        const rendered = new Map();
+        for (let i = start; i < end; i++) {
+            const row = list.rendered.get(i) || list.renderRow(items[i], i);
+            rendered.set(i, row);
+            rows.push(row);
+        }
+        list.rendered = rendered;
+        list.range = [start, end];
+        list.container.replaceChildren(list.topSpacer, ...rows, list.bottomSpacer);
+
+        // Measure what was rendered (row margins don't collapse between siblings)
+        let remeasured = false;
+        rendered.forEach((row, i) => {
+            if (list.margin === null) {
+                list.margin = parseFloat(getComputedStyle(row).marginBottom) || 0;
+            }
+            if (row.offsetHeight > 0 && heights[i] !== row.offsetHeight + list.margin) {
+                heights[i] = row.offsetHeight + list.margin;
+                remeasured = true;
+            }
+        });
+        if (remeasured) {
+            list.schedule(); // The rows in view may have shifted
+        }
+    }
+
+    let above = 0;
+    for (let i = 0; i < start; i++) above += heights[i];
+    let below = 0;
+    for (let i = end; i < items.length; i++) below += heights[i];
+    list.topSpacer.style.height = `${above}px`;
+    list.bottomSpacer.style.height = `${below}px`;
+}
+
+// Scroll a row to the middle of the list's view and return its element
+function scrollVirtualListTo(list, index) {
+    let offset = 0;
+    for (let i = 0; i < index; i++) offset += list.heights[i];
+    const view = virtualListView(list);
+    const delta = offset - (view.top + view.bottom - list.heights[index]) / 2;
+    if (list.scroller === window) {
+        window.scrollBy(0, delta);
+    } else {
+        list.scroller.scrollTop += delta;
+    }
+    renderVirtualList(list);
+    return list.rendered.get(index);
+}
+
+// Sidebar card for one facility
+function renderSidebarItem(facility) {
+    const item = document.createElement('div');
+    item.className = 'facility-item';
+    item.setAttribute('role', 'listitem');
+    item.setAttribute('tabindex', '0');
+    item.setAttribute('data-facility-id', facility.facility_number);
+    item.setAttribute('aria-label', `${facility.name}, ${facility.distance} miles away`);
+
+    const isExpanded = expandedFacilityId === facility.facility_number;
+
+    const dssUrl = `https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/${facility.facility_number}`;
+
+    item.innerHTML = `
+        <div class="facility-header-row">
+            <div class="facility-name">${facility.name} ${getStatusBadge(facility.status)}</div>
+            <div class="distance-badge">${facility.distance} mi</div>
+        </div>
+        <div class="facility-summary">
+            ${facility.address}, ${facility.city}, CA ${facility.zip}
+        </div>
+        <div class="violations-summary">
+            <span class="violation-badge ${facility.shade}">
+                ${facility.total_citations} citation${facility.total_citations !== 1 ? 's' : ''}
+            </span>
+            ${facility.ownership_change ? '<span class="ownership-warning">🔔 Recent ownership change</span>' : ''}
+        </div>
+        ${isExpanded ? `
+            <div class="facility-details">
+                <div class="detail-row"><strong>Status:</strong> ${facility.status}</div>
+                <div class="detail-row"><strong>Phone:</strong> <a href="tel:${facility.phone}">${facility.phone}</a></div>
+                <div class="detail-row"><strong>Capacity:</strong> ${facility.capacity} residents</div>
+                <div class="detail-row"><strong>Total Citations:</strong> ${facility.total_citations}</div>
+                <div class="detail-row"><strong>License Date:</strong> ${facility.ownership_change ? '⚠️ Within last year (new ownership)' : 'More than 1 year ago'}</div>
+                <div class="detail-row">
+                    <a href="${dssUrl}" target="_blank" rel="noopener noreferrer">View Full Details on DSS Website →</a>
+                </div>
+            </div>
+        ` : ''}
+    `;
+
+    // Click/Enter to expand
+    item.addEventListener('click', () => toggleFacilityExpansion(facility.facility_number));
+    item.addEventListener('keypress', (e) => {
+        if (e.key === 'Enter' || e.key === ' ') {
+            e.preventDefault();
+            toggleFacilityExpansion(facility.facility_number);
+        }
+    });
+
+    // Hover to highlight on map
+    item.addEventListener('mouseenter', () => {
+        const marker = markerById.get(facility.facility_number);
+        if (marker) {
+            marker.openPopup();
+        }
+    });
+
+    return item;
+}
+
+// Update sidebar with facilities
+function updateSidebar() {
+    const sidebarCount = document.getElementById('sidebar-count');
+    sidebarCount.textContent = `${filteredFacilities.length} facilities found`;
+
+    if (!sidebarList) {
+        sidebarList = createVirtualList(
+            document.getElementById('facilities-list'),
+            document.querySelector('.info-sidebar'),
+            110, renderSidebarItem);
+    }
+    setVirtualListItems(sidebarList, filteredFacilities);
+}
+
+// Card for one facility in the list-only view
+function renderListCard(facility) {
+    const card = document.createElement('div');
+    card.className = 'facility-card';
+    card.setAttribute('role', 'listitem');
+
+    const dssUrl = `https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/${facility.facility_number}`;
+
+    card.innerHTML = `
+        <div class="facility-header-row">
+            <div class="facility-name">${facility.name} ${getStatusBadge(facility.status)}</div>
+            <div class="distance-badge">${facility.distance} miles</div>
+        </div>
+        <div class="detail-row"><strong>Status:</strong> ${facility.status}</div>
+        <div class="detail-row"><strong>Address:</strong> ${facility.address}, ${facility.city}, CA ${facility.zip}</div>
+        <div class="detail-row"><strong>Phone:</strong> <a href="tel:${facility.phone}">${facility.phone}</a></div>
+        <div class="detail-row"><strong>Capacity:</strong> ${facility.capacity} residents</div>
+        <div class="detail-row">
+            <a href="${dssUrl}" target="_blank" rel="noopener noreferrer">View Full Details on DSS Website →</a>
+        </div>
+        <div style="margin-top: 10px;">
+            <div class="violation-badge ${facility.shade}" style="display: inline-block; margin-bottom: 4px;">
+                <strong>Total Citations:</strong> ${facility.total_citations}
+            </div>
+            ${facility.ownership_change ? '<div style="margin-top: 4px;"><span class="ownership-warning">🔔 Recent ownership change</span></div>' : ''}
+        </div>
+    `;
+
+    return card;
+}
+
+// Update list-only view
+function updateListView() {
+    if (!listViewList) {
+        listViewList = createVirtualList(
+            document.getElementById('list-only-facilities'),
+            window, 250, renderListCard);
+    }
+    setVirtualListItems(listViewList, filteredFacilities);
+}
+
+// Toggle facility expansion
+function toggleFacilityExpansion(facilityId) {
+    if (expandedFacilityId === facilityId) {
+        expandedFacilityId = null;
+    } else {
+        expandedFacilityId = facilityId;
+    }
+    refreshVirtualList(sidebarList);
+}
+
+// Expand facility in sidebar
+function expandFacilityInSidebar(facilityId) {
+    expandedFacilityId = facilityId;
+    refreshVirtualList(sidebarList);
+}
+
+// Highlight facility in sidebar
+function highlightFacilityInSidebar(facilityId) {
+    const items = document.querySelectorAll('.facility-item');
+    items.forEach(item => {
+        if (item.getAttribute('data-facility-id') === facilityId) {
+            item.classList.add('highlighted');
+        }
+    });
+}
+
+// Unhighlight facility in sidebar
+function unhighlightFacilityInSidebar(facilityId) {
+    const items = document.querySelectorAll('.facility-item');
+    items.forEach(item => {
+        if (item.getAttribute('data-facility-id') === facilityId) {
+            item.classList.remove('highlighted');
+        }
+    });
+}
+
+// Scroll to facility in sidebar
+function scrollToFacility(facilityId) {
+    const index = filteredFacilities.findIndex(f => f.facility_number === facilityId);
+    if (index < 0) {
+        return;
+    }
+    const item = scrollVirtualListTo(sidebarList, index);
+    if (item) {
+        item.focus({ preventScroll: true });
+    }
+}
+
+// View controls
+function showMapView() {
+    currentView = 'map';
+    document.getElementById('map-view-panel').classList.remove('hidden');
+    document.getElementById('list-view-panel').classList.add('hidden');
+    document.getElementById('map-view-btn').classList.add('active');
+    document.getElementById('list-view-btn').classList.remove('active');
+    document.getElementById('map-view-btn').setAttribute('aria-selected', 'true');
+    document.getElementById('list-view-btn').setAttribute('aria-selected', 'false');
+
+    // Refresh map
+    if (map) {
+        setTimeout(() => map.invalidateSize(), 100);
+    }
+    if (sidebarList) {
+        refreshVirtualList(sidebarList);
+    }
+}
+
+function showListView() {
+    currentView = 'list';
+    document.getElementById('map-view-panel').classList.add('hidden');
+    document.getElementById('list-view-panel').classList.remove('hidden');
+    document.getElementById('map-view-btn').classList.remove('active');
+    document.getElementById('list-view-btn').classList.add('active');
+    document.getElementById('map-view-btn').setAttribute('aria-selected', 'false');
+    document.getElementById('list-view-btn').setAttribute('aria-selected', 'true');
+
+    // Rows were laid out while the list was hidden
+    if (listViewList) {
+        refreshVirtualList(listViewList);
+    }
+}
+
+// Download CSV
+function downloadCSV() {
+    if (filteredFacilities.length === 0) {
+        alert('No facilities to download');
+        return;
+    }
+
+    const headers = [
+        'Name', 'Status', 'Address', 'City', 'State', 'ZIP', 'Phone', 'Distance (miles)',
+        'Capacity',
+        'Total Citations',
+        'Recent Ownership Change',
+        'DSS Details URL'
+    ];
+
+    const rows = filteredFacilities.map(f => [
+        f.name, f.status, f.address, f.city, f.state, f.zip, f.phone, f.distance,
+        f.capacity,
+        f.total_citations,
+        f.ownership_change ? 'Yes' : 'No',
+        `https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/${f.facility_number}`
+    ]);
+
+    const csvContent = [
+        headers.join(','),
+        ...rows.map(row => row.map(cell => `"${cell}"`).join(','))
+    ].join('\n');
+
+    const blob = new Blob([csvContent], { type: 'text/csv' });
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `rcfe-facilities-${new Date().toISOString().split('T')[0]}.csv`;
+    a.click();
+    URL.revokeObjectURL(url);
+}
+
+// Open README
+function openReadme() {
+    window.open('/static/README.md', '_blank');
+}
+
+// Download Data Dictionary
+function downloadDataDictionary() {
+    window.open('/static/DATA_DICTIONARY.md', '_blank');
+}
+
+// Keyboard shortcuts
+document.addEventListener('keydown', (e) => {
+    // Ctrl/Cmd + K to focus search
+    if ((e.ctrlKey || e.metaKey) && e.key === 'k') {
+        e.preventDefault();
+        document.getElementById('address-search').focus();
+    }
+});
+
+// Allow Enter key to trigger search
+document.getElementById('address-search').addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        searchAddress();
+    }
+});
+
+// Back to Map button functionality
+function scrollToMap() {
+    window.scrollTo({
+        top: 0,
+        behavior: 'smooth'
+    });
+}
@@ -0,0 +1,194 @@
+// Offline search: the whole searchable dataset is downloaded once in compact
+// form (see compact_dataset.py), kept in IndexedDB and searched in the
+// browser. The server is then only asked for the data version and to
+// geocode street addresses.
+
+const OFFLINE_DB_NAME = 'rcfe-finder';
+const OFFLINE_STORE = 'datasets';
+const OFFLINE_KEY = 'search'; // The one stored dataset (the server's default)
+const OFFLINE_SETTING = 'offlineSearch'; // localStorage key: 'on' when enabled
+const EARTH_RADIUS_MILES = 3959; // Same constant as facility_search.py
+const LOCAL_RESULT_LIMIT = 50;
+
+let offlineFacilities = null; // Decoded facilities while offline search is on
+
+function openOfflineDb() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(OFFLINE_DB_NAME, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(OFFLINE_STORE);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function offlineDbRequest(mode, operation) {
+    const db = await openOfflineDb();
+    try {
+        return await new Promise((resolve, reject) => {
+            const request = operation(db.transaction(OFFLINE_STORE, mode).objectStore(OFFLINE_STORE));
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    } finally {
+        db.close();
+    }
+}
+
+// Rebuild the /api/search result dicts from the columns
+function decodeCompact(compact) {
+    const columns = compact.columns;
+    const facilities = new Array(compact.count);
+    const decoded = {};
+    for (const [field, column] of Object.entries(columns)) {
+        decoded[field] = Array.isArray(column) ? column : column.codes.map(code => column.values[code]);
+    }
+    for (let i = 0; i < compact.count; i++) {
+        const facility = {};
+        for (const field in decoded) {
+            facility[field] = decoded[field][i];
+        }
+        facility.lat /= compact.scale;
+        facility.lon /= compact.scale;
+        facility.ownership_change = facility.ownership_change === 1;
+        facilities[i] = facility;
+    }
+    return facilities;
+}
+
+// Load the stored copy, downloading the data again if the server has a newer
+// version. Without a connection the stored copy is used as is.
+async function syncOfflineData() {
+    const status = document.getElementById('offline-status');
+    status.textContent = 'Checking data version...';
+
+    let current = null;
+    try {
+        const response = await fetch('/api/data-version');
+        const versions = await response.json();
+        current = versions.datasets[versions.default];
+    } catch (error) {
+        console.warn('Data version check failed, using the stored copy:', error);
+    }
+
+    let stored = null;
+    try {
+        stored = await offlineDbRequest('readonly', store => store.get(OFFLINE_KEY));
+    } catch (error) {
+        console.error('IndexedDB unavailable:', error);
+    }
+
+    if (current && (!stored || stored.version !== current.version)) {
+        status.textContent = `Downloading ${current.count.toLocaleString()} facilities...`;
+        const response = await fetch(current.url);
+        if (!response.ok) {
+            throw new Error(`Dataset download failed (${response.status})`);
+        }
+        stored = await response.json();
+        try {
+            await offlineDbRequest('readwrite', store => store.put(stored, OFFLINE_KEY));
+        } catch (error) {
+            console.error('Could not store the dataset:', error);
+        }
+    }
+
+    if (!stored) {
+        status.textContent = 'Offline data unavailable';
+        offlineFacilities = null;
+        return;
+    }
+    offlineFacilities = decodeCompact(stored);
+    status.textContent = `${offlineFacilities.length.toLocaleString()} facilities searched on this device`;
+}
+
+async function setOfflineSearch(enabled) {
+    localStorage.setItem(OFFLINE_SETTING, enabled ? 'on' : 'off');
+    if (!enabled) {
+        offlineFacilities = null;
+        document.getElementById('offline-status').textContent = '';
+        return;
+    }
+    try {
+        await syncOfflineData();
+    } catch (error) {
+        console.error('Offline data error:', error);
+        document.getElementById('offline-status').textContent = 'Offline data unavailable';
+        offlineFacilities = null;
+    }
+}
+
+// Great-circle distance in miles, rounded like the server's
+function distanceMiles(lat1, lon1, lat2, lon2) {
+    const toRad = Math.PI / 180;
+    const dLat = (lat2 - lat1) * toRad;
+    const dLon = (lon2 - lon1) * toRad;
+    const a = Math.sin(dLat / 2) ** 2 +
+        Math.cos(lat1 * toRad) * Math.cos(lat2 * toRad) * Math.sin(dLon / 2) ** 2;
+    return Math.round(EARTH_RADIUS_MILES * 2 * Math.asin(Math.sqrt(a)) * 100) / 100;
+}
+
+// Nearest facilities within the radius, as /api/search ranks them
+function localSearch(lat, lon, radiusMiles) {
+    const hits = [];
+    offlineFacilities.forEach((facility, i) => {
+        const distance = distanceMiles(lat, lon, facility.lat, facility.lon);
+        if (distance <= radiusMiles) {
+            hits.push([distance, i]);
+        }
+    });
+    hits.sort((x, y) => x[0] - y[0] || x[1] - y[1]);
+    return hits.slice(0, LOCAL_RESULT_LIMIT).map(([distance, i]) => ({ ...offlineFacilities[i], distance }));
+}
+
+// Lower median of a list of numbers (statistics.median_low in place_tables.py)
+function medianOf(values) {
+    const sorted = [...values].sort((x, y) => x - y);
+    return sorted[Math.floor((sorted.length - 1) / 2)];
+}
+
+// A ZIP code or city in the data, at the median position of its facilities
+// (the same origin /api/place uses)
+function localPlace(text) {
+    const query = text.toUpperCase().split(/\s+/).filter(Boolean).join(' ');
+    const zip = query.match(/^(?:CA\s+)?(\d{5})(?:-\d{4})?$/);
+    const city = query.replace(/,?\s+(?:CA|CALIFORNIA)$/, '');
+    let matches;
+    if (zip) {
+        matches = offlineFacilities.filter(f => String(f.zip).slice(0, 5) === zip[1]);
+    } else if (city && !/[\d,]/.test(city)) {
+        matches = offlineFacilities.filter(f => f.city.toUpperCase().split(/\s+/).filter(Boolean).join(' ') === city);
+    } else {
+        return null;
+    }
+    if (matches.length === 0) {
+        return null;
+    }
+    return {
+        lat: medianOf(matches.map(f => f.lat)),
+        lon: medianOf(matches.map(f => f.lon))
+    };
+}
+
+// Facility name suggestions, nearest to the last search first
+function localSuggest(query, origin, limit = 10) {
+    const words = query.toLowerCase().split(/\s+/).filter(Boolean);
+    const matches = offlineFacilities.filter(f => {
+        const name = f.name.toLowerCase();
+        return words.every(word => name.includes(word));
+    });
+    if (!origin) {
+        return matches.sort((x, y) => x.name.localeCompare(y.name)).slice(0, limit);
+    }
+    return matches
+        .map(f => ({ ...f, distance: distanceMiles(origin.lat, origin.lon, f.lat, f.lon) }))
+        .sort((x, y) => x.distance - y.distance)
+        .slice(0, limit);
+}
+
+// Restore the setting from the last visit
+document.addEventListener('DOMContentLoaded', () => {
+    const enabled = localStorage.getItem(OFFLINE_SETTING) === 'on';
+    document.getElementById('offline-toggle').checked = enabled;
+    if (enabled) {
+        setOfflineSearch(true);
+    }
+});
@@ -0,0 +1,96 @@
+"""
+RCFE Static Asset Pipeline
+Serves the page's CSS and JS under content-hashed names so browsers can
+cache them forever, precompressed once at startup.
+
+Each source file becomes /assets/<name>.<hash>.<ext>; a changed file gets a
+new URL, so the old one never needs invalidating. Gzip and (when the brotli
+package is installed) Brotli variants are built in memory when the app
+starts and picked per request from Accept-Encoding.
+
+Usage:
+    from static_assets import build_assets, precompress, choose_variant
+    assets = build_assets({'app.css': 'static/css/app.css'})
+    assets['urls']['app.css']     # '/assets/app.3f9a1c0b7e2d.css'
+"""
+
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip alone still covers every browser
+    brotli = None
+
+# Configuration
+URL_PREFIX = '/assets/'
+HASH_LENGTH = 12
+MIN_COMPRESS_BYTES = 512   # Smaller bodies aren't worth an encoded variant
+
+def precompress(body):
+    """
+    Build the encoded variants of a response body.
+
+    Args:
+        body: Bytes to serve
+
+    Returns:
+        dict of content encoding ('identity', 'gzip', 'br') -> bytes; only
+        variants that are actually smaller are kept
+    """
+    variants = {'identity': body}
+    if len(body) < MIN_COMPRESS_BYTES:
+        return variants
+
+    encoded = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body, quality=11)
+    for encoding, data in encoded.items():
+        if len(data) < len(body):
+            variants[encoding] = data
+    return variants
+
+def choose_variant(variants, accept_encodings):
+    """
+    Pick the smallest variant the client accepts.
+
+    Args:
+        variants: dict from precompress()
+        accept_encodings: request.accept_encodings (or any container of
+                          encoding names)
+
+    Returns:
+        (content encoding, bytes) tuple
+    """
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and encoding in accept_encodings:
+            return encoding, variants[encoding]
+    return 'identity', variants['identity']
+
+def build_assets(sources):
+    """
+    Fingerprint and precompress the asset files.
+
+    Args:
+        sources: dict of logical name ('app.css') -> source file path
+
+    Returns:
+        dict with 'urls' (logical name -> fingerprinted URL) and 'files'
+        (fingerprinted file name -> {'mimetype', 'etag', 'variants'})
+    """
+    assets = {'urls': {}, 'files': {}}
+    for name, path in sources.items():
+        body = Path(path).read_bytes()
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        stem, dot, ext = name.rpartition('.')
+        filename = f'{stem}.{digest}{dot}{ext}'
+
+        assets['urls'][name] = URL_PREFIX + filename
+        assets['files'][filename] = {
+            'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            'etag': digest,
+            'variants': precompress(body),
+        }
+    return assets
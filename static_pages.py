@@ -0,0 +1,262 @@
+"""
+RCFE Static Facility Pages
+Renders one HTML page and a JSON twin per active facility, with its visit
+and citation history, so facility details can be served as plain files by
+the web server or a CDN (and indexed by search engines).
+
+Generation is incremental: the update pipeline passes the facilities in its
+changelog (see facility_delta.py) plus those whose citations were re-parsed
+since the last build, and only those pages are re-rendered, across a
+process pool. Everything is rebuilt on the first run, when the page template
+changes, or with --all.
+
+Output:
+    site/facility/<number>.html, site/facility/<number>.json
+    site/sitemap.xml (when SITE_URL is set)
+
+Usage:
+    python static_pages.py [--all] [--workers N] [--dataset rcfe]
+    python static_pages.py --facility 015601302
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import citation_store
+import datasets
+import geocode_store
+
+# Configuration
+SITE_DIR = Path('site')
+PAGE_DIR_NAME = 'facility'
+TEMPLATE_DIR = Path('templates')
+TEMPLATE_NAME = 'facility.html'
+SITE_URL = os.environ.get('SITE_URL', '').rstrip('/')  # e.g. https://example.org (for sitemap.xml)
+DETAILS_URL = 'https://www.ccld.dss.ca.gov/carefacilitysearch/FacDetail/{facility}'
+ACTIVE_STATUSES = ('LICENSED', 'PENDING', 'ON PROBATION')
+POOL_MIN_PAGES = 50   # Fewer pages than this render in-process (no pool startup)
+
+_template = None  # Loaded once per worker process
+
+def _count(value):
+    """Integer from a CSV field (0 if blank)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def page_data(row, coords, dataset_name):
+    """
+    The facility fields shown on its page (and saved as its JSON twin).
+
+    Args:
+        row: CSV row
+        coords: Geocode cache entry (or None)
+        dataset_name: Dataset the facility belongs to
+
+    Returns:
+        dict (without visit history)
+    """
+    number = str(row.get('Facility Number', ''))
+    citations = [c for c in (row.get('Citation Numbers') or '').split(',') if c.strip()]
+    coords = coords or {}
+    return {
+        'facility_number': number,
+        'dataset': dataset_name,
+        'name': row.get('Facility Name', ''),
+        'facility_type': row.get('Facility Type', ''),
+        'licensee': row.get('Licensee', ''),
+        'administrator': row.get('Facility Administrator', ''),
+        'phone': row.get('Facility Telephone Number', ''),
+        'address': row.get('Facility Address', ''),
+        'city': row.get('Facility City', ''),
+        'state': row.get('Facility State', ''),
+        'zip': row.get('Facility Zip', ''),
+        'county': row.get('County Name', ''),
+        'capacity': _count(row.get('Facility Capacity')),
+        'status': row.get('Facility Status', ''),
+        'license_first_date': row.get('License First Date', ''),
+        'last_visit_date': row.get('Last Visit Date', ''),
+        'total_visits': _count(row.get('Total Visits')),
+        'total_citations': len(citations),
+        'substantiated_allegations': _count(row.get('Substantiated Allegations')),
+        'lat': coords.get('lat'),
+        'lon': coords.get('lon'),
+        'details_url': DETAILS_URL.format(facility=number),
+    }
+
+def template_fingerprint():
+    """Hash of the page template; a change means every page is re-rendered."""
+    return hashlib.sha256((TEMPLATE_DIR / TEMPLATE_NAME).read_bytes()).hexdigest()[:16]
+
+def _write(path, text):
+    """Atomically write a text file."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def render_page(job):
+    """
+    Render and write one facility's page and JSON twin (runs in a worker process).
+
+    Args:
+        job: (page data dict, page directory, citation database path)
+
+    Returns:
+        Facility number
+    """
+    global _template
+    data, page_dir, db_path = job
+    if _template is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)),
+                          autoescape=select_autoescape(['html']))
+        _template = env.get_template(TEMPLATE_NAME)
+
+    history = citation_store.facility_citations(data['facility_number'], db_path) if db_path else None
+    data = dict(data, visits=history['visits'] if history else [])
+
+    page_dir = Path(page_dir)
+    _write(page_dir / f"{data['facility_number']}.html", _template.render(f=data, site_url=SITE_URL))
+    _write(page_dir / f"{data['facility_number']}.json", json.dumps(data, separators=(',', ':')))
+    return data['facility_number']
+
+def _manifest_path(site_dir, dataset_name):
+    return site_dir / f'manifest_{dataset_name}.json'
+
+def load_manifest(site_dir, dataset_name):
+    """The last build of a dataset's pages: 'built', 'template', 'pages' (or {})."""
+    try:
+        with open(_manifest_path(site_dir, dataset_name), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def reparsed_since(since, db_path=citation_store.CITATIONS_DB):
+    """Facilities whose citations were re-imported after a timestamp."""
+    if not since or not Path(db_path).exists():
+        return set()
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        return {number for (number,) in conn.execute(
+            'SELECT facility_number FROM parsed WHERE parsed > ?', (since,))}
+    finally:
+        conn.close()
+
+def write_sitemap(site_dir):
+    """List every page in site/sitemap.xml (needs SITE_URL for absolute URLs)."""
+    if not SITE_URL:
+        return None
+    page_dir = site_dir / PAGE_DIR_NAME
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for page in sorted(page_dir.glob('*.html')):
+        lines.append(f'  <url><loc>{SITE_URL}/{PAGE_DIR_NAME}/{page.name}</loc></url>')
+    lines.append('</urlset>')
+    path = site_dir / 'sitemap.xml'
+    _write(path, '\n'.join(lines) + '\n')
+    return path
+
+def generate_pages(rows, geocode_cache, dataset_name, numbers=None,
+                   site_dir=SITE_DIR, db_path=None, workers=None):
+    """
+    Render facility pages.
+
+    Args:
+        rows: CSV rows of the dataset
+        geocode_cache: Geocode cache (facility number -> coordinates)
+        dataset_name: Dataset the rows belong to
+        numbers: Facility numbers to re-render (changed, deleted or
+                 re-parsed); None rebuilds every page
+        site_dir: Output directory
+        db_path: Citation database (None: no visit history)
+        workers: Render processes (default: one per CPU)
+
+    Returns:
+        dict with 'rendered', 'removed', 'pages' and 'seconds'
+    """
+    start = time.monotonic()
+    page_dir = site_dir / PAGE_DIR_NAME
+    page_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(site_dir, dataset_name)
+    fingerprint = template_fingerprint()
+    if not manifest or manifest.get('template') != fingerprint:
+        numbers = None
+
+    active = {str(row.get('Facility Number', '')): row for row in rows
+              if row.get('Facility Status', '') in ACTIVE_STATUSES}
+    previous = set(manifest.get('pages', []))
+    wanted = set(active) if numbers is None else {str(n) for n in numbers}
+
+    # Pages of facilities that closed or left the data
+    removed = 0
+    for number in (previous if numbers is None else wanted) - set(active):
+        for suffix in ('.html', '.json'):
+            path = page_dir / f'{number}{suffix}'
+            if path.exists():
+                path.unlink()
+                removed += 1 if suffix == '.html' else 0
+
+    jobs = [(page_data(active[n], geocode_cache.get(n), dataset_name), str(page_dir),
+             str(db_path) if db_path else None)
+            for n in sorted(wanted & set(active))]
+    if len(jobs) < POOL_MIN_PAGES:
+        rendered = [render_page(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(render_page, jobs, chunksize=32))
+
+    manifest = {
+        'built': datetime.now().isoformat(timespec='seconds'),
+        'template': fingerprint,
+        'pages': sorted(active),
+    }
+    _write(_manifest_path(site_dir, dataset_name), json.dumps(manifest))
+    write_sitemap(site_dir)
+
+    return {
+        'rendered': len(rendered),
+        'removed': removed,
+        'pages': len(active),
+        'seconds': round(time.monotonic() - start, 2),
+    }
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Render static facility pages')
+    parser.add_argument('--all', action='store_true', help='Re-render every page')
+    parser.add_argument('--facility', action='append', help='Re-render one facility (repeatable)')
+    parser.add_argument('--workers', type=int, help='Render processes (default: CPU count)')
+    parser.add_argument('--dataset', default=datasets.DEFAULT, choices=sorted(datasets.DATASETS),
+                        help='CCLD facility category (default: rcfe)')
+    args = parser.parse_args()
+    dataset = datasets.get(args.dataset)
+
+    with open(dataset.csv_file, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    cache = geocode_store.load_cache(dataset.geocode_journal, dataset.legacy_cache, migrate=False)
+    db_path = citation_store.CITATIONS_DB if dataset.name == datasets.DEFAULT else None
+
+    numbers = None
+    if args.facility:
+        numbers = args.facility
+    elif not args.all:
+        # Re-parsed citations since the last build (the update pipeline adds its diff)
+        numbers = reparsed_since(load_manifest(SITE_DIR, dataset.name).get('built'), db_path)
+
+    summary = generate_pages(rows, cache, dataset.name, numbers, db_path=db_path,
+                             workers=args.workers)
+    print(f"Rendered {summary['rendered']:,} pages, removed {summary['removed']:,} "
+          f"({summary['pages']:,} active facilities) in {summary['seconds']}s")
+
+if __name__ == '__main__':
+    main()
@@ -2,25 +2,82 @@
 Automated RCFE Data Update Script
 Updates facility data, geocodes new/changed facilities, and regenerates documentation.
 
-Usage: python update_data.py
+Usage: python update_data.py [--fresh] [--dataset adult_residential]
+
+Steps run as a dependency graph (see pipeline.py): a failed run resumes at
+the failed step when rerun, and each run writes logs/update_report_*.json.
+The running app is sent a changelog of the changed facilities (see
+facility_delta.py) and patches its data in place; it is only restarted when
+that isn't possible. Each dataset (see datasets.py) is updated separately, with its own files
+and resume state.
 """
 
+import argparse
 import csv
 import json
+import os
+import requests
 import subprocess
 import sys
 import time
 import signal
 import psutil
+import shutil
 from datetime import datetime
 from pathlib import Path
 
-# File paths
+import citation_store
+import datasets
+import facility_delta
+import facility_stats
+import geocode_store
+import history_store
+import jsonl_journal
+import place_tables
+import rcfe_scraper
+import static_pages
+import pipeline
+from pipeline import Stage, StopPipeline, run_pipeline
+
+# File paths (the RCFE dataset's; see use_dataset)
+DATASET = datasets.DEFAULT
 DATA_DIR = Path('data')
-CACHE_FILE = Path('geocode_cache.json')
+CACHE_FILE = geocode_store.JOURNAL_FILE
+LEGACY_CACHE_FILE = geocode_store.LEGACY_CACHE_FILE
+FAILURES_FILE = geocode_store.FAILURES_FILE
 README_FILE = Path('static/README.md')
 CURRENT_CSV = DATA_DIR / 'rcfe_data_latest.csv'
 PREVIOUS_CSV = DATA_DIR / 'rcfe_data_previous.csv'
+DOWNLOAD_PATTERN = 'rcfe_data_2*.csv'  # Timestamped scraper downloads
+STATS_DIR = facility_stats.STATS_DIR
+HISTORY_DB = history_store.HISTORY_DB
+
+# Blue/green app restarts
+APP_PORTS = (5001, 5002)
+ACTIVE_INSTANCE_FILE = Path('logs/active_instance.json')
+WARMUP_FILE = DATA_DIR / 'warmup_searches.json'
+HOT_SEARCH_FILE = 'logs/hot_searches_{port}.json'  # Saved by each app instance (see app.py)
+PROXY_UPSTREAM_FILE = os.environ.get('PROXY_UPSTREAM_FILE')  # e.g. an nginx upstream include
+PROXY_RELOAD_CMD = os.environ.get('PROXY_RELOAD_CMD')        # e.g. "sudo nginx -s reload"
+READY_TIMEOUT = 120  # Seconds for a new instance to pass /readyz
+DRAIN_SECONDS = 10   # Grace period for the old instance's in-flight requests
+DELTA_TIMEOUT = 30   # Seconds for the app to apply a changelog
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')  # Sent to the app's /admin endpoints (see app.py)
+
+def use_dataset(dataset):
+    """Point the update at a dataset's partition (see datasets.py)."""
+    global DATASET, DATA_DIR, CACHE_FILE, LEGACY_CACHE_FILE, FAILURES_FILE
+    global CURRENT_CSV, PREVIOUS_CSV, DOWNLOAD_PATTERN, STATS_DIR, HISTORY_DB
+    DATASET = dataset.name
+    DATA_DIR = dataset.data_dir
+    CACHE_FILE = dataset.geocode_journal
+    LEGACY_CACHE_FILE = dataset.legacy_cache
+    FAILURES_FILE = dataset.failures_file
+    CURRENT_CSV = dataset.csv_file
+    PREVIOUS_CSV = dataset.previous_csv
+    DOWNLOAD_PATTERN = dataset.download_pattern
+    STATS_DIR = dataset.stats_dir
+    HISTORY_DB = dataset.history_db
 
 def print_header(message):
     """Print a formatted header."""
@@ -29,37 +86,46 @@ def print_header(message):
     print('=' * 70 + '\n')
 
 def run_scraper():
-    """Run the web scraper to download latest data."""
+    """
+    Run the web scraper to download latest data.
+
+    Returns:
+        rcfe_scraper.UPDATED, rcfe_scraper.UNCHANGED (the server reports the
+        same data as last time), or None on failure
+    """
     print_header('STEP 1: Downloading Latest Data from DSS Website')
 
     try:
         # Check if scraper exists
         if not Path('rcfe_scraper.py').exists():
             print('❌ Error: rcfe_scraper.py not found!')
-            return False
+            return None
 
         # Run the scraper
         print('Running web scraper...')
         result = subprocess.run(
-            ['python3', 'rcfe_scraper.py'],
+            ['python3', 'rcfe_scraper.py', '--dataset', DATASET],
             capture_output=True,
             text=True,
             timeout=300  # 5 minute timeout
         )
 
-        if result.returncode == 0:
+        if result.returncode == rcfe_scraper.EXIT_UPDATED:
             print('✅ Successfully downloaded latest data')
-            return True
+            return rcfe_scraper.UPDATED
+        elif result.returncode == rcfe_scraper.EXIT_UNCHANGED:
+            print('✅ Data on the DSS website has not changed since the last download')
+            return rcfe_scraper.UNCHANGED
         else:
-            print(f'❌ Scraper failed with error:\n{result.stderr}')
-            return False
+            print(f'❌ Scraper failed with error:\n{result.stderr or result.stdout[-2000:]}')
+            return None
 
     except subprocess.TimeoutExpired:
         print('❌ Scraper timed out after 5 minutes')
-        return False
+        return None
     except Exception as e:
         print(f'❌ Error running scraper: {e}')
-        return False
+        return None
 
 def compare_data():
     """Compare current and previous data to find changes."""
@@ -198,6 +264,7 @@ def compare_data():
 
     return {
         'current_data': current_data,
+        'previous_data': previous_data,
         'new_facilities': new_facilities,
         'changed_facilities': [c['number'] for c in address_changes],
         'removed_facilities': removed_facilities,
@@ -208,20 +275,25 @@ def compare_data():
     }
 
 def update_geocode_cache(changes):
-    """Update geocode cache with new/changed facilities."""
+    """
+    Update geocode cache with new/changed facilities.
+
+    Runs on every update, even with nothing new: geocode_facilities.py also
+    retries earlier failures whose backoff has expired and regenerates the
+    not-geocoded report.
+    """
     print_header('STEP 3: Updating Geocode Cache')
 
     to_geocode = set(changes['new_facilities'] + changes['changed_facilities'])
 
     if len(to_geocode) == 0:
-        print('✅ No new facilities to geocode - cache is up to date!')
-        return True
-
-    print(f'Need to geocode {len(to_geocode):,} facilities...')
-    print('This will take approximately {:.1f} minutes'.format(len(to_geocode) / 60))
+        print('No new or moved facilities - checking for failures due a retry')
+    else:
+        print(f'Need to geocode {len(to_geocode):,} facilities...')
+        print('This will take approximately {:.1f} minutes'.format(len(to_geocode) / 60))
 
     # Create a temporary file with only facilities that need geocoding
-    temp_csv = Path('data/temp_to_geocode.csv')
+    temp_csv = DATA_DIR / 'temp_to_geocode.csv'
 
     with open(CURRENT_CSV, 'r', encoding='utf-8') as f_in:
         reader = csv.DictReader(f_in)
@@ -240,10 +312,11 @@ def update_geocode_cache(changes):
 
     # Run geocoding on just the new/changed facilities
     try:
-        # Modify geocode_facilities.py to accept a custom CSV path
-        # For now, we'll run it on the full dataset but it will skip cached ones
+        # The temp file is the work-list; stale cache entries elsewhere in the
+        # dataset are also picked up through their address fingerprints
         result = subprocess.run(
-            ['python3', 'geocode_facilities.py'],
+            ['python3', 'geocode_facilities.py', '--worklist', str(temp_csv),
+             '--dataset', DATASET],
             capture_output=True,
             text=True,
             timeout=7200  # 2 hour timeout
@@ -280,75 +353,54 @@ def remove_old_facilities(changes):
     print(f'Removing {len(removed):,} facilities from geocode cache...')
 
     # Load cache
-    with open(CACHE_FILE, 'r') as f:
-        cache = json.load(f)
+    cache = geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
 
-    # Remove old facilities
-    removed_count = 0
-    for fac_num in removed:
-        if fac_num in cache:
-            del cache[fac_num]
-            removed_count += 1
+    # Journal deletions for facilities that are still cached
+    deletions = {fac_num: None for fac_num in removed if fac_num in cache}
+    geocode_store.append_entries(deletions, CACHE_FILE)
+    removed_count = len(deletions)
+    geocode_store.compact_if_needed(CACHE_FILE)
 
-    # Save updated cache
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f, indent=2)
+    # Forget their geocoding failures too
+    failures = jsonl_journal.load(FAILURES_FILE)
+    jsonl_journal.append_entries({fac_num: None for fac_num in removed if fac_num in failures}, FAILURES_FILE)
 
     print(f'✅ Removed {removed_count:,} facilities from cache')
 
 def generate_statistics():
-    """Generate statistics for README."""
+    """Generate statistics for README and /api/stats in a single pass."""
     print_header('STEP 5: Generating Statistics')
 
-    # Load current data
+    # Load geocode cache
+    cache = geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
+
+    # Stream the current data through the statistics engine
     with open(CURRENT_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        facilities = list(reader)
+        stats = facility_stats.compute_stats(csv.DictReader(f), cache)
 
-    # Load geocode cache
-    with open(CACHE_FILE, 'r') as f:
-        cache = json.load(f)
-
-    # Calculate statistics
-    total = len(facilities)
-    licensed = sum(1 for f in facilities if f.get('Facility Status') == 'LICENSED')
-    pending = sum(1 for f in facilities if f.get('Facility Status') == 'PENDING')
-    probation = sum(1 for f in facilities if f.get('Facility Status') == 'ON PROBATION')
-    closed = sum(1 for f in facilities if f.get('Facility Status') == 'CLOSED')
-
-    active = [f for f in facilities if f.get('Facility Status') in ['LICENSED', 'PENDING', 'ON PROBATION']]
-
-    licensed_geocoded = sum(1 for f in facilities if f.get('Facility Status') == 'LICENSED' and f.get('Facility Number') in cache)
-    pending_geocoded = sum(1 for f in facilities if f.get('Facility Status') == 'PENDING' and f.get('Facility Number') in cache)
-    probation_geocoded = sum(1 for f in facilities if f.get('Facility Status') == 'ON PROBATION' and f.get('Facility Number') in cache)
-
-    total_geocoded = licensed_geocoded + pending_geocoded + probation_geocoded
-
-    stats = {
-        'total': total,
-        'licensed': licensed,
-        'pending': pending,
-        'probation': probation,
-        'closed': closed,
-        'active_total': len(active),
-        'licensed_geocoded': licensed_geocoded,
-        'pending_geocoded': pending_geocoded,
-        'probation_geocoded': probation_geocoded,
-        'total_geocoded': total_geocoded,
-        'date': datetime.now().strftime('%B %d, %Y')
-    }
+    stats_file = facility_stats.save_stats(stats, STATS_DIR)
 
     print(f'📊 Statistics:')
-    print(f'   Total facilities: {total:,}')
-    print(f'   Active facilities: {len(active):,}')
-    print(f'   Successfully geocoded: {total_geocoded:,}')
-    print(f'   Coverage: {total_geocoded/len(active)*100:.1f}%')
+    print(f'   Total facilities: {stats["total"]:,}')
+    print(f'   Active facilities: {stats["active_total"]:,}')
+    print(f'   Successfully geocoded: {stats["total_geocoded"]:,}')
+    print(f'   Coverage: {stats["total_geocoded"]/stats["active_total"]*100:.1f}%')
+    print(f'   Counties: {len(stats["by_county"]):,}')
+    print(f'   Saved to: {stats_file}')
 
     return stats
 
+def build_place_tables():
+    """Precompute the ZIP code and city search results (see place_tables.py)."""
+    print_header('STEP 6: Building ZIP and City Lookup Tables')
+
+    path, places = place_tables.build_for_dataset(datasets.get(DATASET))
+    print(f'✅ {len(places["zip"]):,} ZIP codes and {len(places["city"]):,} cities saved to {path}')
+    return len(places['zip']), len(places['city'])
+
 def update_readme(stats):
     """Update README with new statistics and date."""
-    print_header('STEP 6: Updating README')
+    print_header('STEP 7: Updating README')
 
     print(f'Updating README with data from {stats["date"]}...')
 
@@ -366,18 +418,102 @@ def update_readme(stats):
 
     print('✅ README updated')
 
+def write_changelog(changes):
+    """
+    Save the per-facility changes as a changelog the running app can apply
+    in place (see facility_delta.py).
+
+    Returns:
+        Path of the changelog (as a string), or None when there is no
+        previous data to diff against
+    """
+    print_header('STEP 8: Writing Changelog')
+
+    if not PREVIOUS_CSV.exists():
+        print('No previous data - the app will need a full restart')
+        return None
+
+    cache = geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
+    delta_dir = DATA_DIR / facility_delta.DELTA_DIR_NAME
+    base = facility_delta.file_sha256(PREVIOUS_CSV)
+    version = facility_delta.file_sha256(CURRENT_CSV)
+    previous_geocodes = facility_delta.load_geocode_base(delta_dir, base)
+    if previous_geocodes is None:
+        print('No saved geocode cache for the previous data - only changed facilities carry coordinates')
+    delta = facility_delta.build_delta(
+        DATASET, changes['previous_data'], changes['current_data'], cache,
+        base=base, version=version, previous_geocodes=previous_geocodes)
+    path = facility_delta.write_delta(delta, delta_dir)
+    facility_delta.save_geocode_base(cache, version, delta_dir)
+    print(f'✅ {len(delta["upserts"]):,} upserts, {len(delta["deletes"]):,} deletes, '
+          f'{len(delta["geocodes"]):,} geocodes: {path}')
+    return str(path)
+
+def generate_facility_pages(changelog_path):
+    """
+    Re-render the static pages of the facilities in the changelog, and of
+    those whose citations were re-parsed since the last build (see
+    static_pages.py).
+
+    Args:
+        changelog_path: Changelog from write_changelog(), or None to render
+                        every page
+    """
+    print_header('STEP 9: Generating Facility Pages')
+
+    with open(CURRENT_CSV, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    cache = geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
+    db_path = citation_store.CITATIONS_DB if DATASET == datasets.DEFAULT else None
+
+    numbers = None
+    if changelog_path:
+        with open(changelog_path, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        manifest = static_pages.load_manifest(static_pages.SITE_DIR, DATASET)
+        numbers = {row['Facility Number'] for row in delta['upserts']} | set(delta['deletes'])
+        if db_path:
+            numbers |= static_pages.reparsed_since(manifest.get('built'), db_path)
+
+    summary = static_pages.generate_pages(rows, cache, DATASET, numbers, db_path=db_path)
+    print(f"✅ Rendered {summary['rendered']:,} pages, removed {summary['removed']:,} "
+          f"({summary['pages']:,} active facilities) in {summary['seconds']}s")
+    return summary
+
 def backup_current_data():
-    """Backup current data as previous data."""
-    print_header('STEP 7: Creating Backup')
-
-    if CURRENT_CSV.exists():
-        # Copy current to previous
-        with open(CURRENT_CSV, 'r') as f_in:
-            with open(PREVIOUS_CSV, 'w') as f_out:
-                f_out.write(f_in.read())
-        print('✅ Current data backed up as previous data')
-    else:
+    """Backup current data as previous data and record it in the history store."""
+    print_header('STEP 10: Creating Backup')
+
+    if not CURRENT_CSV.exists():
         print('⚠️  No current data to backup')
+        return
+
+    # Copy current to previous (streamed, not read into memory)
+    shutil.copyfile(CURRENT_CSV, PREVIOUS_CSV)
+    print('✅ Current data backed up as previous data')
+
+    # Record this run as field-level deltas against the previous run
+    summary = history_store.record_snapshot(CURRENT_CSV, db_path=HISTORY_DB)
+    if summary is None:
+        print('⚠️  This run was already recorded in the history store')
+    else:
+        print(f'✅ Recorded run {summary["run_id"]} in {HISTORY_DB} '
+              f'({summary["field_changes"]:,} field changes)')
+
+    # Timestamped downloads whose exact contents were recorded can be rebuilt
+    # from the history store; anything else is kept
+    recorded = history_store.recorded_hashes(HISTORY_DB)
+    pruned = kept = 0
+    for download in DATA_DIR.glob(DOWNLOAD_PATTERN):
+        if rcfe_scraper.file_sha256(download) in recorded:
+            download.unlink()
+            pruned += 1
+        else:
+            kept += 1
+    if pruned:
+        print(f'🗑️  Removed {pruned:,} timestamped download(s) already in history')
+    if kept:
+        print(f'⚠️  Kept {kept:,} timestamped download(s) not in history')
 
 def find_flask_process():
     """Find the running Flask app process."""
@@ -390,18 +526,51 @@ def find_flask_process():
             continue
     return None
 
-def stop_flask():
-    """Stop the running Flask app."""
-    print_header('STEP 8: Stopping Flask App')
+def get_active_instance():
+    """
+    Find the instance currently serving traffic.
 
-    flask_proc = find_flask_process()
+    Returns:
+        (psutil.Process, port) tuple, or (None, None) if the app isn't running
+    """
+    if ACTIVE_INSTANCE_FILE.exists():
+        with open(ACTIVE_INSTANCE_FILE, 'r') as f:
+            active = json.load(f)
+        try:
+            proc = psutil.Process(active['pid'])
+            if proc.is_running() and 'app.py' in ' '.join(proc.cmdline()):
+                return proc, active['port']
+        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
+            pass
+
+    # Started by hand: assume the default port
+    proc = find_flask_process()
+    return (proc, APP_PORTS[0]) if proc else (None, None)
+
+def admin_headers():
+    """Authorization for the app's /admin endpoints."""
+    return {'Authorization': f'Bearer {ADMIN_TOKEN}'} if ADMIN_TOKEN else {}
+
+def fetch_hot_searches(port):
+    """
+    Copy the running instance's most popular searches for warmup. The app
+    saves them to disk every minute; they are never exposed over HTTP.
+    """
+    hot_file = Path(HOT_SEARCH_FILE.format(port=port))
+    try:
+        with open(hot_file, 'r') as f:
+            hot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f'⚠️  Could not read hot searches for warmup: {e}')
+        return 0
 
-    if not flask_proc:
-        print('⚠️  Flask app is not running')
-        return None
+    shutil.copyfile(hot_file, WARMUP_FILE)
+    os.chmod(WARMUP_FILE, 0o600)
+    return len(hot.get('searches', []))
 
-    print(f'Found Flask app (PID: {flask_proc.pid})')
-    print('Stopping Flask app gracefully...')
+def stop_flask(flask_proc):
+    """Stop a Flask app process: SIGTERM first, SIGKILL if it won't exit."""
+    print(f'Stopping Flask app (PID: {flask_proc.pid})...')
 
     try:
         # Try graceful shutdown first (SIGTERM)
@@ -426,72 +595,319 @@ def stop_flask():
             print('❌ Could not stop Flask app')
             return False
 
+    except psutil.NoSuchProcess:
+        return True
     except Exception as e:
         print(f'❌ Error stopping Flask: {e}')
         return False
 
-def start_flask():
-    """Start the Flask app."""
-    print_header('STEP 9: Starting Flask App')
+def start_flask(port, warmup=False):
+    """
+    Start a Flask app instance in the background.
+
+    Args:
+        port: Port for the new instance
+        warmup: Pass the saved hot searches so it can pre-warm its caches
 
-    print('Starting Flask app with updated data...')
+    Returns:
+        (subprocess.Popen, log file path) tuple, or (None, None) on error
+    """
+    print(f'Starting Flask app with updated data on port {port}...')
 
     try:
-        # Start Flask in background
         # Redirect output to a log file
-        log_file = Path('logs') / f'flask_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
+        log_file = Path('logs') / f'flask_{datetime.now().strftime("%Y%m%d_%H%M%S")}_{port}.log'
         log_file.parent.mkdir(exist_ok=True)
 
+        env = dict(os.environ, PORT=str(port), FLASK_ENV='production',
+                   HOT_SEARCH_FILE=HOT_SEARCH_FILE.format(port=port))
+        if warmup and WARMUP_FILE.exists():
+            env['WARMUP_FILE'] = str(WARMUP_FILE)
+
         with open(log_file, 'w') as f:
             proc = subprocess.Popen(
                 ['python3', 'app.py'],
                 stdout=f,
                 stderr=subprocess.STDOUT,
-                cwd=str(Path.cwd())
+                cwd=str(Path.cwd()),
+                env=env
             )
-
-        # Wait a few seconds and check if it started
-        time.sleep(5)
-
-        # Check if process is still running
-        if proc.poll() is None:
-            print(f'✅ Flask app started successfully (PID: {proc.pid})')
-            print(f'📝 Flask logs: {log_file}')
-            print(f'🌐 Access at: http://localhost:5001')
-            return True
-        else:
-            print(f'❌ Flask app failed to start')
-            print(f'Check logs: {log_file}')
-            return False
+        return proc, log_file
 
     except Exception as e:
         print(f'❌ Error starting Flask: {e}')
+        return None, None
+
+def wait_until_ready(proc, port, timeout=READY_TIMEOUT):
+    """
+    Poll an instance's /healthz and /readyz probes.
+
+    Returns:
+        True once /readyz succeeds, False if the process dies or times out
+    """
+    deadline = time.monotonic() + timeout
+    healthy = False
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            if not healthy:
+                healthy = requests.get(f'http://127.0.0.1:{port}/healthz', timeout=2).ok
+                if healthy:
+                    print('   /healthz OK, waiting for data load and warmup...')
+            if healthy:
+                response = requests.get(f'http://127.0.0.1:{port}/readyz', timeout=2)
+                if response.ok:
+                    info = response.json()
+                    print(f'   /readyz OK: {info["facilities"]:,} facilities, '
+                          f'{info["warm_searches"]} warm searches')
+                    return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def switch_traffic(port, pid):
+    """Point the reverse proxy (if configured) at the new instance and record it."""
+    if PROXY_UPSTREAM_FILE:
+        with open(PROXY_UPSTREAM_FILE, 'w') as f:
+            f.write(f'server 127.0.0.1:{port};\n')
+        if PROXY_RELOAD_CMD:
+            subprocess.run(PROXY_RELOAD_CMD, shell=True, check=True, timeout=30)
+        print(f'🔀 Proxy now routes to port {port}')
+
+    ACTIVE_INSTANCE_FILE.parent.mkdir(exist_ok=True)
+    with open(ACTIVE_INSTANCE_FILE, 'w') as f:
+        json.dump({'port': port, 'pid': pid, 'since': datetime.now().isoformat()}, f)
+
+def apply_changelog(path):
+    """
+    Send a changelog to the running app, which patches its data in place.
+
+    Returns:
+        True if the app now serves the new data, False if it needs a restart
+        (not running, or the changelog doesn't apply to what it has loaded)
+    """
+    print_header('STEP 11: Applying Changelog to Flask App')
+
+    if not ADMIN_TOKEN:
+        print('ADMIN_TOKEN is not set - the app refuses changelogs without it')
         return False
 
-def restart_flask():
-    """Stop and restart the Flask app."""
-    print_header('RESTARTING FLASK APP')
+    proc, port = get_active_instance()
+    if proc is None:
+        print('Flask app is not running')
+        return False
 
-    # Check if Flask is running
-    was_running = find_flask_process() is not None
+    with open(path, 'r', encoding='utf-8') as f:
+        delta = json.load(f)
+    try:
+        response = requests.post(f'http://127.0.0.1:{port}/admin/delta', json=delta,
+                                 headers=admin_headers(), timeout=DELTA_TIMEOUT)
+    except requests.RequestException as e:
+        print(f'⚠️  Could not send changelog: {e}')
+        return False
 
-    if was_running:
-        # Stop Flask
-        if not stop_flask():
-            print('⚠️  Warning: Could not stop Flask app')
-            print('You may need to restart it manually')
-            return False
+    if not response.ok:
+        try:
+            error = response.json().get('error')
+        except ValueError:
+            error = response.text[:200]
+        print(f'⚠️  App did not apply the changelog ({response.status_code}): {error}')
+        return False
 
-    # Start Flask
-    if not start_flask():
-        print('❌ Failed to start Flask app')
-        print('Please start it manually: python3 app.py')
+    info = response.json()
+    if info.get('applied'):
+        print(f'✅ App on port {port} updated in {info["elapsed_ms"]} ms '
+              f'({info["upserts"]:,} upserts, {info["deletes"]:,} deletes)')
+    else:
+        print(f'✅ App on port {port} already has this data')
+    return True
+
+def restart_flask():
+    """
+    Replace the running app with one serving the new data.
+
+    With a reverse proxy configured (PROXY_UPSTREAM_FILE), this is a blue/green
+    swap: the new instance starts on the other port, loads data, warms its
+    caches from the old instance's hot searches and must pass /healthz and
+    /readyz before traffic moves; the old instance then drains and stops.
+    Without a proxy the port can't move, so the old instance is stopped first
+    and the new one is readiness-probed on the same port.
+    """
+    print_header('STEP 11: Restarting Flask App')
+
+    old_proc, old_port = get_active_instance()
+    blue_green = old_proc is not None and PROXY_UPSTREAM_FILE is not None
+
+    if old_proc is not None:
+        replayed = fetch_hot_searches(old_port)
+        print(f'Saved {replayed} hot searches from port {old_port} for warmup')
+
+    if blue_green:
+        new_port = APP_PORTS[1] if old_port == APP_PORTS[0] else APP_PORTS[0]
+    else:
+        new_port = old_port or APP_PORTS[0]
+        if old_proc is not None:
+            print('⚠️  No PROXY_UPSTREAM_FILE set - restarting in place (brief downtime)')
+            if not stop_flask(old_proc):
+                print('⚠️  Warning: Could not stop Flask app')
+                print('You may need to restart it manually')
+                return False
+
+    proc, log_file = start_flask(new_port, warmup=old_proc is not None)
+    if proc is None:
+        return False
+
+    if not wait_until_ready(proc, new_port):
+        print(f'❌ New instance on port {new_port} did not become ready')
+        print(f'Check logs: {log_file}')
+        if proc.poll() is None:
+            stop_flask(psutil.Process(proc.pid))
+        if blue_green:
+            print(f'Old instance on port {old_port} is still serving')
+        return False
+
+    try:
+        switch_traffic(new_port, proc.pid)
+    except Exception as e:
+        print(f'❌ Could not switch traffic: {e}')
+        stop_flask(psutil.Process(proc.pid))
         return False
 
+    print(f'✅ Flask app ready (PID: {proc.pid})')
+    print(f'📝 Flask logs: {log_file}')
+    print(f'🌐 Access at: http://localhost:{new_port}')
+
+    if blue_green:
+        # Let in-flight requests on the old instance finish
+        print(f'Draining old instance on port {old_port} for {DRAIN_SECONDS}s...')
+        time.sleep(DRAIN_SECONDS)
+        stop_flask(old_proc)
+
     return True
 
+class UpdateError(Exception):
+    """Raised by a pipeline stage to fail the update."""
+
+def stage_scrape(inputs):
+    """
+    Pipeline stage: download the latest data.
+
+    Ends the update early when the download is unchanged and was already
+    processed (i.e. it matches the backed-up previous data).
+    """
+    status = run_scraper()
+    if status is None:
+        raise UpdateError('Could not download data')
+    if (status == rcfe_scraper.UNCHANGED and PREVIOUS_CSV.exists() and
+            rcfe_scraper.file_sha256(CURRENT_CSV) == rcfe_scraper.file_sha256(PREVIOUS_CSV)):
+        # Still give failed addresses whose backoff expired their retry; any
+        # coordinates found ship with the next changelog
+        if not update_geocode_cache({'new_facilities': [], 'changed_facilities': []}):
+            raise UpdateError('Geocoding error')
+        raise StopPipeline('Data unchanged since the last update', result=status)
+    return status, {'status': status}
+
+def stage_compare(inputs):
+    """Pipeline stage: diff the download against the previous data."""
+    changes = compare_data()
+    if changes is None:
+        raise UpdateError('Could not compare data')
+    return changes, {
+        'rows': len(changes['current_data']),
+        'new': len(changes['new_facilities']),
+        'address_changes': len(changes['changed_facilities']),
+        'removed': len(changes['removed_facilities'])
+    }
+
+def stage_geocode(inputs):
+    """Pipeline stage: geocode new and moved facilities, and retry due failures."""
+    changes = inputs['compare']
+    to_geocode = len(changes['new_facilities']) + len(changes['changed_facilities'])
+    if not update_geocode_cache(changes):
+        raise UpdateError('Geocoding error')
+    return True, {'rows': to_geocode}
+
+def stage_cleanup(inputs):
+    """Pipeline stage: drop removed facilities from the geocode cache."""
+    changes = inputs['compare']
+    remove_old_facilities(changes)
+    return True, {'rows': len(changes['removed_facilities'])}
+
+def stage_statistics(inputs):
+    """Pipeline stage: compute statistics."""
+    stats = generate_statistics()
+    return stats, {'rows': stats['total'], 'geocoded': stats['total_geocoded']}
+
+def stage_places(inputs):
+    """Pipeline stage: rebuild the ZIP code and city lookup tables."""
+    zips, cities = build_place_tables()
+    return True, {'zips': zips, 'cities': cities}
+
+def stage_readme(inputs):
+    """Pipeline stage: refresh the README (which describes the RCFE data)."""
+    if DATASET != datasets.DEFAULT:
+        return False, {'skipped': f'{DATASET} is not described in the README'}
+    update_readme(inputs['statistics'])
+    return True, {}
+
+def stage_changelog(inputs):
+    """Pipeline stage: write the changelog (before the backup replaces the previous data)."""
+    path = write_changelog(inputs['compare'])
+    return path, {'written': path is not None}
+
+def stage_pages(inputs):
+    """Pipeline stage: re-render the static pages of changed facilities."""
+    summary = generate_facility_pages(inputs['changelog'])
+    return True, {'rows': summary['rendered'], 'removed': summary['removed']}
+
+def stage_backup(inputs):
+    """Pipeline stage: back up the data and record the run in the history store."""
+    backup_current_data()
+    return True, {}
+
+def stage_restart(inputs):
+    """
+    Pipeline stage: update the running app from the changelog, or restart it
+    (a failed restart doesn't fail the update).
+    """
+    if inputs['changelog'] and apply_changelog(inputs['changelog']):
+        return True, {'mode': 'changelog'}
+    return restart_flask(), {'mode': 'restart'}
+
+# The update as a dependency graph. Geocoding and the changelog must finish
+# before the backup overwrites the previous CSV, otherwise a rerun would lose
+# the diff.
+UPDATE_STAGES = [
+    Stage('scrape', stage_scrape),
+    Stage('compare', stage_compare, deps=['scrape'], checkpoint=False),
+    Stage('geocode', stage_geocode, deps=['compare']),
+    Stage('cleanup', stage_cleanup, deps=['compare', 'geocode']),
+    Stage('statistics', stage_statistics, deps=['geocode']),
+    Stage('places', stage_places, deps=['cleanup']),
+    Stage('readme', stage_readme, deps=['statistics']),
+    Stage('changelog', stage_changelog, deps=['compare', 'cleanup']),
+    Stage('pages', stage_pages, deps=['cleanup', 'changelog']),
+    Stage('backup', stage_backup, deps=['geocode', 'changelog']),
+    Stage('restart', stage_restart, deps=['cleanup', 'places', 'readme', 'backup', 'changelog']),
+]
+
 def main():
     """Main update workflow."""
+    parser = argparse.ArgumentParser(description='Automated RCFE data update')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Start a new run instead of resuming a failed one')
+    parser.add_argument('--dataset', default=datasets.DEFAULT, choices=sorted(datasets.DATASETS),
+                        help='CCLD facility category to update (default: rcfe)')
+    args = parser.parse_args()
+    use_dataset(datasets.get(args.dataset))
+
+    # Each dataset resumes its own failed runs
+    state_file = pipeline.STATE_FILE
+    if DATASET != datasets.DEFAULT:
+        state_file = state_file.with_name(f'update_state_{DATASET}.json')
+
     print('\n' + '=' * 70)
     print('  RCFE DATA AUTOMATIC UPDATE')
     print('  California Assisted Living Finder')
@@ -499,37 +915,24 @@ def main():
 
     start_time = datetime.now()
 
-    # Step 1: Download latest data
-    if not run_scraper():
-        print('\n❌ Update failed: Could not download data')
-        sys.exit(1)
+    # Stages load the geocode cache in parallel; migrate a legacy JSON cache
+    # to the journal once, up front, so they never race to create it
+    if not Path(CACHE_FILE).exists():
+        geocode_store.load_cache(CACHE_FILE, LEGACY_CACHE_FILE)
 
-    # Step 2: Compare data
-    changes = compare_data()
-    if changes is None:
-        print('\n❌ Update failed: Could not compare data')
+    success, results = run_pipeline(UPDATE_STAGES, state_file=state_file, fresh=args.fresh)
+    if not success:
+        print(f'\n❌ Update failed - run update_data.py --dataset {DATASET} again to resume')
         sys.exit(1)
 
-    # Step 3: Update geocode cache if needed
-    if len(changes['new_facilities']) > 0 or len(changes['changed_facilities']) > 0:
-        if not update_geocode_cache(changes):
-            print('\n❌ Update failed: Geocoding error')
-            sys.exit(1)
-
-    # Step 4: Remove old facilities from cache
-    remove_old_facilities(changes)
-
-    # Step 5: Generate statistics
-    stats = generate_statistics()
-
-    # Step 6: Update README
-    update_readme(stats)
-
-    # Step 7: Backup current data
-    backup_current_data()
+    if results['statistics'] is None:
+        print_header('NO CHANGES')
+        print('✅ The DSS data has not changed since the last update - nothing to do.')
+        print('=' * 70 + '\n')
+        return
 
-    # Step 8 & 9: Restart Flask app with new data
-    flask_restarted = restart_flask()
+    stats = results['statistics']
+    flask_restarted = results['restart']
 
     # Summary
     end_time = datetime.now()
@@ -542,8 +945,7 @@ def main():
     print(f'🗺️  Searchable facilities: {stats["total_geocoded"]:,}')
 
     if flask_restarted:
-        print(f'\n🌐 Flask app restarted - website now showing updated data!')
-        print(f'   Access at: http://localhost:5001')
+        print(f'\n🌐 Flask app updated - website now showing updated data!')
     else:
         print(f'\n⚠️  Flask app needs manual restart')
         print(f'   Run: python3 app.py')